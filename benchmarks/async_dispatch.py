@@ -0,0 +1,118 @@
+"""
+Compare the event dispatch modes of AsyncSession: a task per event (the default), inline, a
+bounded pool of worker tasks and lanes sharded by key, which keep the order per key.
+
+A minimal rawsocket peer accepts the session, confirms its subscription and then sends all
+events at once, so the numbers only reflect the subscriber side.
+
+    python benchmarks/async_dispatch.py [--events 100000] [--keys 100] [--await-handler]
+"""
+
+import argparse
+import asyncio
+import time
+
+from wampproto import acceptor, messages, serializers
+from wampproto.transports.rawsocket import Handshake, MessageHeader, MSG_TYPE_WAMP
+
+from xconn.async_client import AsyncClient
+from xconn.dispatch import AsyncBoundedDispatcher, AsyncInlineDispatcher, AsyncShardedDispatcher
+from xconn.transports import RAW_SOCKET_HEADER_LENGTH
+from xconn.types import Event, TransportConfig
+
+
+class EventSource:
+    def __init__(self, events: int, keys: int):
+        self.serializer = serializers.CBORSerializer()
+        self.frames = b"".join(
+            self.frame(messages.Event(messages.EventFields(1, i + 1, [i % keys, i]))) for i in range(events)
+        )
+        self.closed = asyncio.Event()
+
+    def frame(self, msg: messages.Message) -> bytes:
+        data = self.serializer.serialize(msg)
+        return MessageHeader(MSG_TYPE_WAMP, len(data)).to_bytes() + data
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+        writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+        a = acceptor.Acceptor(serializer=self.serializer)
+        joined = False
+        while True:
+            try:
+                header = MessageHeader.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+                data = await reader.readexactly(header.length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+
+            if not joined:
+                to_send, joined = a.receive(data)
+                writer.write(MessageHeader(MSG_TYPE_WAMP, len(to_send)).to_bytes() + to_send)
+                continue
+
+            msg = self.serializer.deserialize(data)
+            if isinstance(msg, messages.Subscribe):
+                writer.write(self.frame(messages.Subscribed(messages.SubscribedFields(msg.request_id, 1))))
+                writer.write(self.frames)
+
+        writer.close()
+        self.closed.set()
+
+
+async def run(name: str, dispatcher, events: int, keys: int, await_handler: bool):
+    source = EventSource(events, keys)
+    server = await asyncio.start_server(source.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    config = TransportConfig(ping_interval=None)
+    session = await AsyncClient(serializer=serializers.CBORSerializer(), ws_config=config).connect(
+        f"rs://127.0.0.1:{port}", "realm1"
+    )
+
+    received = 0
+    done = asyncio.Event()
+
+    async def on_event(event: Event):
+        nonlocal received
+        if await_handler:
+            await asyncio.sleep(0)
+
+        received += 1
+        if received == events:
+            done.set()
+
+    start = time.perf_counter()
+    await session.subscribe("io.xconn.bench", on_event, dispatcher=dispatcher)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>8}: {events / elapsed:>12,.0f} events/s")
+
+    if dispatcher is not None:
+        dispatcher.shutdown()
+    session.wait_task.cancel()
+    await session._base_session.close()
+    await source.closed.wait()
+    server.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--await-handler", action="store_true", help="handlers yield to the loop once")
+    args = parser.parse_args()
+
+    modes = [
+        ("task", None),
+        ("inline", AsyncInlineDispatcher()),
+        ("bounded", AsyncBoundedDispatcher(workers=16, max_pending=1024)),
+        ("sharded", AsyncShardedDispatcher(lanes=16, key=lambda event: event.args[0], max_pending=1024)),
+    ]
+    for name, dispatcher in modes:
+        await run(name, dispatcher, args.events, args.keys, args.await_handler)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
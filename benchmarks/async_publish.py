@@ -0,0 +1,94 @@
+"""
+Measure AsyncSession.publish throughput over rawsocket with and without write coalescing.
+
+A minimal rawsocket peer accepts the session and counts the PUBLISH frames it receives,
+each run ends once all of them have arrived.
+
+    python benchmarks/async_publish.py [--messages 100000] [--size 32]
+"""
+
+import argparse
+import asyncio
+import time
+
+from wampproto import acceptor, serializers
+from wampproto.transports.rawsocket import Handshake, MessageHeader, MSG_TYPE_WAMP
+
+from xconn.async_client import AsyncClient
+from xconn.transports import RAW_SOCKET_HEADER_LENGTH
+from xconn.types import TransportConfig
+
+
+class SinkRouter:
+    def __init__(self, messages: int):
+        self.expected = messages
+        self.received = 0
+        self.done = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+        writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+        a = acceptor.Acceptor(serializer=serializers.CBORSerializer())
+        joined = False
+        while True:
+            try:
+                header = MessageHeader.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+                data = await reader.readexactly(header.length)
+            except asyncio.IncompleteReadError:
+                break
+
+            if not joined:
+                to_send, joined = a.receive(data)
+                writer.write(MessageHeader(MSG_TYPE_WAMP, len(to_send)).to_bytes() + to_send)
+                continue
+
+            self.received += 1
+            if self.received == self.expected:
+                self.done.set()
+
+        writer.close()
+        self.closed.set()
+
+
+async def run(coalesce: bool, messages: int, size: int):
+    sink = SinkRouter(messages)
+    server = await asyncio.start_server(sink.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    config = TransportConfig(coalesce_writes=coalesce)
+    session = await AsyncClient(serializer=serializers.CBORSerializer(), ws_config=config).connect(
+        f"rs://127.0.0.1:{port}", "realm1"
+    )
+
+    payload = b"x" * size
+    start = time.perf_counter()
+    for _ in range(messages):
+        await session.publish("io.xconn.bench", [payload])
+
+    await sink.done.wait()
+    elapsed = time.perf_counter() - start
+
+    name = "coalesced" if coalesce else "drain"
+    print(f"{name:>10}: {messages / elapsed:>12,.0f} publishes/s")
+
+    session.wait_task.cancel()
+    await session._base_session.close()
+    await sink.closed.wait()
+    server.close()
+    await server.wait_closed()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=32)
+    args = parser.parse_args()
+
+    await run(False, args.messages, args.size)
+    await run(True, args.messages, args.size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
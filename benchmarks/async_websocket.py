@@ -0,0 +1,75 @@
+"""
+Compare the async websocket backends on call round trips through an in-process xconn router.
+
+A callee and a caller connect with the same backend, the caller keeps --concurrency calls in
+flight to an echo procedure, once with small and once with large payloads.
+
+    python benchmarks/async_websocket.py [--calls 20000] [--concurrency 32] [--large 262144]
+"""
+
+import argparse
+import asyncio
+import time
+
+from wampproto import serializers
+
+from xconn import Router, Server
+from xconn.async_client import AsyncClient
+from xconn.types import Invocation, Result, TransportConfig, WebsocketBackend
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args)
+
+
+async def run(uri: str, backend: WebsocketBackend, calls: int, concurrency: int, size: int):
+    client = AsyncClient(
+        serializer=serializers.CBORSerializer(),
+        ws_config=TransportConfig(ping_interval=None),
+        websocket_backend=backend,
+    )
+    callee = await client.connect(uri, "realm1")
+    caller = await client.connect(uri, "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    payload = b"x" * size
+    remaining = calls
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await caller.call("io.xconn.echo", [payload])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    throughput = calls * size / elapsed / 2**20
+    print(f"{backend.value:>10} {size:>8}B: {calls / elapsed:>10,.0f} calls/s {throughput:>8,.1f} MiB/s")
+
+    await caller.leave()
+    await callee.leave()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--small", type=int, default=32)
+    parser.add_argument("--large", type=int, default=256 * 1024)
+    parser.add_argument("--port", type=int, default=18090)
+    args = parser.parse_args()
+
+    router = Router()
+    router.add_realm("realm1")
+    await Server(router).start("127.0.0.1", args.port)
+    uri = f"ws://127.0.0.1:{args.port}/ws"
+
+    for size, calls in ((args.small, args.calls), (args.large, max(args.calls // 20, 1))):
+        for backend in WebsocketBackend:
+            await run(uri, backend, calls, args.concurrency, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
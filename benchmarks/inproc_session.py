@@ -0,0 +1,72 @@
+"""
+Compare an in-process session, which hands message objects straight to the router, against a
+unix rawsocket session to the same router in the same process.
+
+A callee and a caller connect the same way, the caller keeps --concurrency calls in flight to an
+echo procedure.
+
+    python benchmarks/inproc_session.py [--calls 50000] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from wampproto import serializers
+
+from xconn import Router, Server, inproc
+from xconn.async_client import AsyncClient
+from xconn.types import Invocation, Result, TransportConfig
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args, invocation.kwargs)
+
+
+async def run(name: str, uri: str, calls: int, concurrency: int):
+    client = AsyncClient(
+        serializer=serializers.CBORSerializer(),
+        ws_config=TransportConfig(ping_interval=None, rawsocket_buffered_protocol=True, coalesce_writes=True),
+    )
+    callee = await client.connect(uri, "realm1")
+    caller = await client.connect(uri, "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    args, kwargs = ["hello", 1, 2.5], {"key": "value"}
+    remaining = calls
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await caller.call("io.xconn.echo", args, kwargs)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {calls / elapsed:>10,.0f} calls/s")
+
+    await caller.leave()
+    await callee.leave()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    router = Router()
+    router.add_realm("realm1")
+    inproc.serve(router, "realm1")
+    path = os.path.join(tempfile.mkdtemp(), "rs.sock")
+    await Server(router).start_unix_rawsocket(path)
+
+    await run("unix+rs", f"unix+rs://{path}", args.calls, args.concurrency)
+    await run("inproc", "inproc://realm1", args.calls, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Compare the buffered rawsocket frame reader with the previous recv-per-header/recv-per-body reader.
+
+Reports messages per second, recv syscalls per message and peak memory traced while reading.
+
+    python benchmarks/rawsocket_read.py [--messages 200000] [--size 64]
+"""
+
+import argparse
+import socket
+import threading
+import time
+import tracemalloc
+
+from wampproto.transports.rawsocket import MessageHeader, MSG_TYPE_WAMP
+
+from xconn.transports import FrameReader, RAW_SOCKET_HEADER_LENGTH, _recv_exactly
+
+
+class CountingSocket:
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self.syscalls = 0
+
+    def recv(self, n: int) -> bytes:
+        self.syscalls += 1
+        return self._sock.recv(n)
+
+    def recv_into(self, buffer) -> int:
+        self.syscalls += 1
+        return self._sock.recv_into(buffer)
+
+
+def legacy_read(sock) -> bytes:
+    header = MessageHeader.from_bytes(_recv_exactly(sock, RAW_SOCKET_HEADER_LENGTH))
+    return _recv_exactly(sock, header.length)
+
+
+def buffered_read(reader: FrameReader) -> memoryview:
+    return reader.next_frame()[1]
+
+
+def writer(sock: socket.socket, messages: int, size: int):
+    data = MessageHeader(MSG_TYPE_WAMP, size).to_bytes() + b"x" * size
+    batch = data * 64
+    sent = 0
+    while sent < messages:
+        count = min(64, messages - sent)
+        sock.sendall(batch if count == 64 else data * count)
+        sent += count
+
+
+def run(name: str, messages: int, size: int):
+    client, server = socket.socketpair()
+    counting = CountingSocket(client)
+
+    if name == "legacy":
+
+        def read():
+            return legacy_read(counting)
+    else:
+        reader = FrameReader(counting)
+
+        def read():
+            return buffered_read(reader)
+
+    thread = threading.Thread(target=writer, args=(server, messages, size), daemon=True)
+    tracemalloc.start()
+    start = time.perf_counter()
+    thread.start()
+
+    for _ in range(messages):
+        read()
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    thread.join()
+    client.close()
+    server.close()
+
+    print(
+        f"{name:>8}: {messages / elapsed:>12,.0f} msg/s  "
+        f"{counting.syscalls / messages:.3f} recv syscalls/msg  "
+        f"peak traced memory {peak / 1024:,.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--size", type=int, default=64)
+    args = parser.parse_args()
+
+    run("legacy", args.messages, args.size)
+    run("buffered", args.messages, args.size)
+
+
+if __name__ == "__main__":
+    main()
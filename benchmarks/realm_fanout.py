@@ -0,0 +1,97 @@
+"""
+Cost of fanning one publication out to many subscribers with mixed JSON, CBOR and msgpack
+serializers: the realm encodes the event once per serializer, compared with encoding it again
+for every subscriber. Subscribers are in-process sinks, so only the router side is measured.
+
+    python benchmarks/realm_fanout.py [--subscribers 5000] [--publishes 200] [--size 256]
+"""
+
+import argparse
+import asyncio
+import time
+
+from wampproto import messages, serializers
+
+from xconn import types
+from xconn.realm import Realm
+
+
+class SinkSession(types.IAsyncBaseSession):
+    # events received by all sinks together
+    received = 0
+
+    def __init__(self, sid: int, serializer: serializers.Serializer):
+        self._sid = sid
+        self._serializer = serializer
+
+    @property
+    def id(self) -> int:
+        return self._sid
+
+    @property
+    def realm(self) -> str:
+        return "realm1"
+
+    @property
+    def authid(self) -> str:
+        return "sink"
+
+    @property
+    def authrole(self) -> str:
+        return "anonymous"
+
+    @property
+    def serializer(self) -> serializers.Serializer:
+        return self._serializer
+
+    async def send(self, data: bytes | str):
+        SinkSession.received += 1
+
+    async def send_message(self, msg: messages.Message):
+        await self.send(self._serializer.serialize(msg))
+
+
+async def per_subscriber(realm: Realm, publisher: SinkSession, publish: messages.Publish):
+    # what the realm did before: every recipient serializes the event itself
+    publication = realm.broker.receive_publish(publisher.id, publish)
+    await asyncio.gather(*(realm.clients[r].send_message(publication.event) for r in publication.recipients))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--publishes", type=int, default=200)
+    parser.add_argument("--size", type=int, default=256)
+    args = parser.parse_args()
+
+    kinds = [serializers.JSONSerializer, serializers.CBORSerializer, serializers.MsgPackSerializer]
+    realm = Realm()
+    publisher = SinkSession(1, serializers.JSONSerializer())
+    realm.attach_client(publisher)
+    for i in range(args.subscribers):
+        subscriber = SinkSession(i + 2, kinds[i % len(kinds)]())
+        realm.attach_client(subscriber)
+        await realm.receive_message(subscriber.id, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.fanout")))
+
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.fanout", args=["x" * args.size, {"n": 1}]))
+    print(f"{args.subscribers} subscribers, {args.size} byte payload")
+
+    for name, fan_out in [
+        ("per subscriber", lambda: per_subscriber(realm, publisher, publish)),
+        ("once per serializer", lambda: realm.receive_message(publisher.id, publish)),
+    ]:
+        events = args.publishes * args.subscribers
+        SinkSession.received = 0
+        start = time.perf_counter()
+        for _ in range(args.publishes):
+            await fan_out()
+        # the realm hands events to the writers of the outbound queues
+        while SinkSession.received < events:
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:>20}: {events / elapsed:>12,.0f} events/s {elapsed / args.publishes * 1000:>8.2f} ms/publish")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
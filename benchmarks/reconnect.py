@@ -0,0 +1,105 @@
+"""
+Recovery time of a resilient session after a router restart: from the new router accepting
+connections until a call to one of its restored registrations succeeds, and the time the session
+itself reports from noticing the disconnect until it was usable again.
+
+The router runs in a child process that is killed and started again on the same port.
+
+    python benchmarks/reconnect.py [--registrations 100] [--restarts 5]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+
+from wampproto.transports.rawsocket import Handshake
+
+from xconn import Router, helpers
+from xconn.acceptor import AsyncRawSocketAcceptor
+from xconn.async_client import AsyncClient
+from xconn.transports import AsyncRawSocketTransport, RAW_SOCKET_HEADER_LENGTH
+from xconn.types import Invocation, Result, TransportConfig
+
+
+def serve(port: int, ready):
+    async def main():
+        router = Router()
+        router.add_realm("realm1")
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+            writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+            transport = AsyncRawSocketTransport(reader, writer)
+            base_session = await AsyncRawSocketAcceptor().accept(transport, helpers.get_rs_serializer(hs.protocol))
+            router.attach_client(base_session)
+            try:
+                while True:
+                    msg = base_session.serializer.deserialize(await transport.read())
+                    await router.receive_message(base_session, msg)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                router.detach_client(base_session)
+                writer.close()
+
+        await asyncio.start_server(handle, "127.0.0.1", port)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def start_router(port: int) -> multiprocessing.Process:
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(port, ready), daemon=True)
+    process.start()
+    ready.wait()
+
+    return process
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--registrations", type=int, default=100)
+    parser.add_argument("--restarts", type=int, default=5)
+    args = parser.parse_args()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    router = start_router(port)
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None, tcp_nodelay=True))
+    session = await client.connect_resilient(f"rs://127.0.0.1:{port}", "realm1")
+    for i in range(args.registrations):
+        await session.register(f"io.xconn.echo.{i}", echo)
+
+    first_call, recovery = [], []
+    for _ in range(args.restarts):
+        router.kill()
+        router.join()
+        router = await asyncio.to_thread(start_router, port)
+
+        start = time.perf_counter()
+        await session.call(f"io.xconn.echo.{args.registrations - 1}", [1])
+        first_call.append((time.perf_counter() - start) * 1000)
+        recovery.append(session.stats.last_recovery * 1000)
+
+    print(f"{args.registrations} registrations, {args.restarts} restarts")
+    print(f"  router up -> first call: {statistics.median(first_call):>8.1f} ms (median)")
+    print(f"  disconnect -> restored:  {statistics.median(recovery):>8.1f} ms (median, includes router startup)")
+
+    await session.leave()
+    router.kill()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
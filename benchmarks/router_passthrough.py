@@ -0,0 +1,110 @@
+"""
+Router cost of CALL and PUBLISH with and without payload passthrough, where only the envelope is
+decoded and args and kwargs are forwarded as they came.
+
+Clients are in-process sinks that speak CBOR, so only the router side is measured: decoding the
+message, routing it and encoding what goes out to the callee or the subscribers.
+
+    python benchmarks/router_passthrough.py [--messages 200] [--subscribers 10]
+"""
+
+import argparse
+import asyncio
+import time
+
+from wampproto import messages, serializers
+
+from xconn import types
+from xconn.router import Router
+
+PAYLOADS = {
+    "small": ([1, "two"], {"three": 3}),
+    "1 MiB bytes": ([b"x" * 2**20], None),
+    "10k records": ([[{"id": i, "name": f"item-{i}", "tags": ["a", "b"]} for i in range(10_000)]], None),
+}
+
+
+class SinkSession(types.IAsyncBaseSession):
+    # messages received by all sinks together
+    received = 0
+
+    def __init__(self, sid: int):
+        self._sid = sid
+        self._serializer = serializers.CBORSerializer()
+
+    @property
+    def id(self) -> int:
+        return self._sid
+
+    @property
+    def realm(self) -> str:
+        return "realm1"
+
+    @property
+    def authid(self) -> str:
+        return "sink"
+
+    @property
+    def authrole(self) -> str:
+        return "anonymous"
+
+    @property
+    def serializer(self) -> serializers.Serializer:
+        return self._serializer
+
+    async def send(self, data: bytes | str):
+        SinkSession.received += 1
+
+
+async def run(passthrough: bool, count: int, subscribers: int, args: list, kwargs: dict | None) -> tuple[float, float]:
+    router = Router(payload_passthrough=passthrough)
+    router.add_realm("realm1")
+    client = SinkSession(1)
+    sinks = [client]
+    router.attach_client(client)
+    await router.receive_message(client, messages.Register(messages.RegisterFields(1, "io.xconn.sink")))
+    for i in range(subscribers):
+        subscriber = SinkSession(i + 2)
+        sinks.append(subscriber)
+        router.attach_client(subscriber)
+        subscribe = messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic"))
+        await router.receive_message(subscriber, subscribe)
+
+    serializer = client.serializer
+    call = serializer.serialize(messages.Call(messages.CallFields(2, "io.xconn.sink", args, kwargs)))
+    publish = serializer.serialize(messages.Publish(messages.PublishFields(3, "io.xconn.topic", args, kwargs)))
+
+    timings = []
+    for data, recipients in ((call, 1), (publish, subscribers)):
+        SinkSession.received = 0
+        start = time.perf_counter()
+        for _ in range(count):
+            await router.receive_message(client, router.decode(client, data))
+
+        # the realm hands messages to the writers of the outbound queues
+        while SinkSession.received < count * recipients:
+            await asyncio.sleep(0)
+        timings.append((time.perf_counter() - start) / count * 1000)
+
+    for sink in sinks:
+        router.detach_client(sink)
+
+    return timings[0], timings[1]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--subscribers", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"ms per message, PUBLISH to {args.subscribers} subscribers")
+    for name, (payload_args, payload_kwargs) in PAYLOADS.items():
+        for passthrough in (False, True):
+            call, publish = await run(passthrough, args.messages, args.subscribers, payload_args, payload_kwargs)
+            mode = "passthrough" if passthrough else "decoded"
+            print(f"{name:>12} {mode:>12}: CALL {call:>8.3f} PUBLISH {publish:>8.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
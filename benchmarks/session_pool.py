@@ -0,0 +1,88 @@
+"""
+Call throughput of sync caller threads sharing a SessionPool of increasing size against a local
+Server. Every member brings its own connection and reader thread, so the client is no longer
+capped by a single pipe.
+
+The router and the callee run in a child process so the numbers only reflect the client side.
+When that process saturates first, the pool sizes are level.
+
+    python benchmarks/session_pool.py [--seconds 2] [--threads 8] [--sizes 1,2,4,8]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import threading
+import time
+
+from xconn import Router, Server
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.types import Invocation, PoolStrategy, Result, TransportConfig
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args)
+
+
+def serve(port: int, ready):
+    async def main():
+        router = Router()
+        router.add_realm("realm1")
+        await Server(router).start("127.0.0.1", port)
+
+        callee = await AsyncClient().connect(f"ws://127.0.0.1:{port}/ws", "realm1")
+        await callee.register("io.xconn.echo", echo)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def run(uri: str, size: int, strategy: PoolStrategy, threads: int, seconds: float):
+    client = Client(config=TransportConfig(ping_interval=None, tcp_nodelay=True))
+    pool = client.connect_pool(uri, "realm1", size=size, strategy=strategy)
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def caller(index: int):
+        while time.perf_counter() < deadline:
+            pool.call("io.xconn.echo", [index])
+            counts[index] += 1
+
+    workers = [threading.Thread(target=caller, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    print(f"{size:>3} sessions {strategy.value:>17}: {sum(counts) / seconds:>10,.0f} calls/s")
+    pool.leave()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sizes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+
+    for size in map(int, args.sizes.split(",")):
+        for strategy in PoolStrategy:
+            run(f"ws://127.0.0.1:{port}/ws", size, strategy, args.threads, args.seconds)
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
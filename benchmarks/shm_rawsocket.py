@@ -0,0 +1,94 @@
+"""
+Compare the shm+rs shared memory transport against unix rawsocket for round trips of
+binary payloads of increasing size.
+
+Both peers are minimal echo servers running on their own event loop thread, so the numbers
+reflect the transports rather than the router.
+
+    python benchmarks/shm_rawsocket.py [--seconds 2]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from wampproto.transports.rawsocket import Handshake, MessageHeader, MSG_TYPE_WAMP
+
+from xconn.shm import ShmRawSocketTransport, AsyncShmRawSocketTransport
+from xconn.transports import RawSocketTransport, RAW_SOCKET_HEADER_LENGTH
+from xconn.types import TransportConfig
+
+SIZES = (1024, 64 * 1024, 1024 * 1024, 8 * 1024 * 1024)
+
+
+async def rawsocket_echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+    writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+    try:
+        while True:
+            header = MessageHeader.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+            payload = await reader.readexactly(header.length)
+            writer.write(MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes() + payload)
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        writer.close()
+
+
+async def shm_echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    transport = await AsyncShmRawSocketTransport.accept(reader, writer)
+    try:
+        while True:
+            await transport.write(bytes(await transport.read()))
+    except ConnectionError:
+        await transport.close()
+
+
+def start_servers(rawsocket_path: str, shm_path: str):
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(asyncio.start_unix_server(rawsocket_echo, rawsocket_path))
+    loop.run_until_complete(asyncio.start_unix_server(shm_echo, shm_path))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def run(name: str, transport, size: int, seconds: float):
+    payload = os.urandom(size)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        transport.write(payload)
+        transport.read()
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    throughput = count * size * 2 / elapsed / 2**20
+    print(f"{name:>14} {size:>9}B: {count / elapsed:>10,.0f} round trips/s {throughput:>10,.1f} MiB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    rawsocket_path = os.path.join(directory, "rs.sock")
+    shm_path = os.path.join(directory, "shm.sock")
+    start_servers(rawsocket_path, shm_path)
+    time.sleep(0.2)
+
+    max_msg_size = 16 * 1024 * 1024
+    rawsocket = RawSocketTransport.connect(f"unix://{rawsocket_path}", max_msg_size=max_msg_size)
+    shm = ShmRawSocketTransport.connect(f"shm+rs://{shm_path}", max_msg_size=max_msg_size, config=TransportConfig())
+
+    for size in SIZES:
+        run("unix rawsocket", rawsocket, size, args.seconds)
+        run("shm+rs", shm, size, args.seconds)
+
+    rawsocket.close()
+    shm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Call throughput of a single sync Session shared by an increasing number of caller threads.
+
+The router and the callee run in a child process so the numbers only reflect the client side.
+On a free-threaded build (python3.13t, PYTHON_GIL=0) throughput should keep growing with the
+thread count, with the GIL it flattens out early.
+
+    python benchmarks/sync_call_threads.py [--seconds 2] [--threads 1,2,4,8]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+
+from xconn import Router, Server
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.types import Invocation, Result, TransportConfig
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args)
+
+
+def serve(port: int, ready):
+    async def main():
+        router = Router()
+        router.add_realm("realm1")
+        await Server(router).start("127.0.0.1", port)
+
+        callee = await AsyncClient().connect(f"ws://127.0.0.1:{port}/ws", "realm1")
+        await callee.register("io.xconn.echo", echo)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def run(uri: str, threads: int, seconds: float):
+    session = Client(config=TransportConfig(ping_interval=None, tcp_nodelay=True)).connect(uri, "realm1")
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def caller(index: int):
+        while time.perf_counter() < deadline:
+            # a few calls in flight per thread keep the router busy
+            futures = [session.call_async("io.xconn.echo", [index, i]) for i in range(8)]
+            for f in futures:
+                f.result()
+
+            counts[index] += len(futures)
+
+    workers = [threading.Thread(target=caller, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    print(f"{threads:>3} threads: {sum(counts) / seconds:>10,.0f} calls/s")
+    session.leave()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--threads", default="1,2,4,8")
+    args = parser.parse_args()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    for threads in map(int, args.threads.split(",")):
+        run(f"ws://127.0.0.1:{port}/ws", threads, args.seconds)
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
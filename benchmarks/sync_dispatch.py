@@ -0,0 +1,91 @@
+"""
+Compare the dispatch modes of the sync Session by delivering events to a subscriber whose
+handler does a little CPU work and optionally blocks for a while (simulated I/O).
+
+    python benchmarks/sync_dispatch.py [--events 20000] [--io-ms 0]
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from xconn import Router, Server
+from xconn.client import Client
+from xconn.dispatch import BoundedDispatcher, InlineDispatcher, PoolDispatcher, ShardedDispatcher, shared_dispatcher
+from xconn.types import Event, OverflowPolicy, TransportConfig
+
+
+def start_server() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    router = Router()
+    router.add_realm("realm1")
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(Server(router).start("127.0.0.1", port))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    return f"ws://127.0.0.1:{port}/ws"
+
+
+def run(name: str, uri: str, dispatcher, events: int, io_ms: float):
+    config = TransportConfig(ping_interval=None)
+    subscriber = Client(config=config).connect(uri, "realm1")
+    publisher = Client(config=config).connect(uri, "realm1")
+
+    received = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_event(event: Event):
+        nonlocal received
+        sum(range(200))
+        if io_ms:
+            time.sleep(io_ms / 1000)
+
+        with lock:
+            received += 1
+            if received == events:
+                done.set()
+
+    subscriber.subscribe("io.xconn.bench", on_event, dispatcher=dispatcher)
+
+    start = time.perf_counter()
+    for i in range(events):
+        publisher.publish("io.xconn.bench", [i])
+    done.wait()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>10}: {events / elapsed:>10,.0f} events/s")
+
+    publisher.leave()
+    subscriber.leave()
+    dispatcher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--io-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    uri = start_server()
+    time.sleep(0.2)
+
+    modes = {
+        "inline": InlineDispatcher(),
+        "pool": PoolDispatcher(ThreadPoolExecutor(max_workers=16), owned=True),
+        "shared": shared_dispatcher(),
+        "sharded": ShardedDispatcher(lanes=8),
+        "bounded": BoundedDispatcher(max_workers=16, max_pending=256, policy=OverflowPolicy.BLOCK),
+    }
+    for name, dispatcher in modes.items():
+        run(name, uri, dispatcher, args.events, args.io_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Threads and memory of many idle sync rawsocket sessions, with a reader thread per session
+versus the shared selectors reactor, plus the round trip time of calls while they're open.
+
+Every mode runs in a fresh child process against a router running in this one.
+
+    python benchmarks/sync_reactor.py [--sessions 1000]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+from wampproto.transports.rawsocket import Handshake
+
+from xconn import Router, helpers
+from xconn.acceptor import AsyncRawSocketAcceptor
+from xconn.client import Client
+from xconn.transports import AsyncRawSocketTransport, RAW_SOCKET_HEADER_LENGTH
+from xconn.types import Result, TransportConfig
+
+
+def start_router() -> int:
+    router = Router()
+    router.add_realm("realm1")
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+        writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+        transport = AsyncRawSocketTransport(reader, writer)
+        base_session = await AsyncRawSocketAcceptor().accept(transport, helpers.get_rs_serializer(hs.protocol))
+        router.attach_client(base_session)
+        try:
+            while True:
+                msg = base_session.serializer.deserialize(await transport.read())
+                await router.receive_message(base_session, msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            router.detach_client(base_session)
+
+            await transport.close()
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    return server.sockets[0].getsockname()[1]
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+    return 0.0
+
+
+def child(port: int, sessions: int, reactor: bool):
+    client = Client(config=TransportConfig(ping_interval=None, reactor=reactor))
+    uri = f"rs://127.0.0.1:{port}"
+
+    rss_before = rss_mib()
+    opened = [client.connect(uri, "realm1") for _ in range(sessions)]
+    threads = threading.active_count()
+    rss = rss_mib() - rss_before
+
+    opened[0].register("io.xconn.echo", lambda invocation: Result(invocation.args))
+    caller = opened[-1]
+    calls = 2000
+    start = time.perf_counter()
+    for i in range(calls):
+        caller.call("io.xconn.echo", [i])
+    elapsed = time.perf_counter() - start
+
+    name = "reactor" if reactor else "thread"
+    print(f"{name:>8}: {threads:>6} threads {rss:>8.1f} MiB {elapsed / calls * 1e6:>8.1f} us/call")
+
+    for session in opened:
+        session.leave()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--child", choices=["thread", "reactor"])
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.port, args.sessions, args.child == "reactor")
+        return
+
+    port = start_router()
+    for mode in ("thread", "reactor"):
+        subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--port", str(port), "--sessions", str(args.sessions)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
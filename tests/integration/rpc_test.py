@@ -7,7 +7,7 @@ import pytest
 from wampproto import serializers
 
 from xconn import Client
-from xconn.types import Invocation
+from xconn.types import Invocation, Result
 from xconn.client import connect_anonymous
 from xconn.exception import ApplicationError
 
@@ -77,3 +77,33 @@ def test_rpc_with_various_data(serializer: serializers.Serializer):
 
     client1.leave()
     client2.leave()
+
+
+def test_call_async_and_call_many():
+    callee = connect_anonymous("ws://localhost:8079/ws", "realm1")
+    caller = connect_anonymous("ws://localhost:8079/ws", "realm1")
+
+    def double(inv: Invocation) -> Result:
+        if inv.args[0] < 0:
+            raise ApplicationError("io.xconn.error.negative", inv.args)
+
+        return Result([inv.args[0] * 2])
+
+    registration = callee.register("io.xconn.rpc.double", double)
+
+    futures = [caller.call_async("io.xconn.rpc.double", [i]) for i in range(10)]
+    assert [f.result().args for f in futures] == [[i * 2] for i in range(10)]
+
+    results = caller.call_many("io.xconn.rpc.double", [[i] for i in range(100)])
+    assert [result.args for result in results] == [[i * 2] for i in range(100)]
+
+    with pytest.raises(ApplicationError, match="io.xconn.error.negative"):
+        caller.call_many("io.xconn.rpc.double", [[1], [-1], [2]])
+
+    results = caller.call_many("io.xconn.rpc.double", [[1], [-1]], return_exceptions=True)
+    assert results[0].args == [2]
+    assert isinstance(results[1], ApplicationError)
+
+    registration.unregister()
+    caller.leave()
+    callee.leave()
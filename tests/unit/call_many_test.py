@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from xconn.client import Client
+from xconn.exception import ApplicationError
+from xconn.types import Invocation, Result, TransportConfig
+from tests.utils import start_server
+
+
+def echo(invocation: Invocation) -> Result:
+    if invocation.args == ["fail"]:
+        raise ApplicationError("io.xconn.error.failed")
+
+    return Result(invocation.args)
+
+
+async def test_call_many_keeps_order():
+    uri = await start_server()
+
+    def run():
+        config = TransportConfig(ping_interval=None)
+        callee = Client(config=config).connect(uri, "realm1")
+        caller = Client(config=config).connect(uri, "realm1")
+        callee.register("io.xconn.echo", echo)
+
+        results = caller.call_many("io.xconn.echo", [[i] for i in range(100)])
+        assert [result.args for result in results] == [[i] for i in range(100)]
+
+        results = caller.call_many("io.xconn.echo", [[1], ["fail"], [3]], return_exceptions=True)
+        assert results[0].args == [1]
+        assert isinstance(results[1], ApplicationError)
+        assert results[2].args == [3]
+
+        with pytest.raises(ApplicationError):
+            caller.call_many("io.xconn.echo", [[1], ["fail"]])
+
+        assert not caller._call_requests
+
+        caller.leave()
+        callee.leave()
+
+    await asyncio.to_thread(run)
+
+
+async def test_call_many_raw_payload_options():
+    uri = await start_server()
+
+    def run():
+        caller = Client(config=TransportConfig(ping_interval=None)).connect(uri, "realm1")
+        options = {"x_payload_raw": True}
+        calls = [caller._build_call("io.xconn.raw", [bytearray(b"%d" % i)], {}, options) for i in range(2)]
+
+        # every call is raw and the shared options are left alone
+        assert options == {"x_payload_raw": True}
+        assert [call.payload for call in calls] == [bytearray(b"0"), bytearray(b"1")]
+        assert all(call.payload_is_binary() and "x_payload_raw" not in call.options for call in calls)
+
+        caller.leave()
+
+    await asyncio.to_thread(run)
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.types import CallOptions, Invocation, Result, TransportConfig
+from tests.utils import start_server
+
+
+class _ResultAtTimeout(Future):
+    def result(self, timeout=None):
+        if timeout is not None:
+            self.set_result(Result(["late"]))
+            raise FutureTimeoutError()
+
+        return super().result()
+
+
+async def test_async_call_timeout_interrupts_callee():
+    uri = await start_server()
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    callee = await client.connect(uri, "realm1")
+    caller = await client.connect(uri, "realm1")
+
+    interrupted = asyncio.Event()
+
+    async def slow(invocation: Invocation) -> Result:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            assert invocation.interrupted.is_set()
+            interrupted.set()
+            raise
+
+        return Result()
+
+    async def echo(invocation: Invocation) -> Result:
+        return Result(invocation.args)
+
+    await callee.register("io.xconn.slow", slow)
+    await callee.register("io.xconn.echo", echo)
+
+    with pytest.raises(TimeoutError) as exc_info:
+        await caller.call("io.xconn.slow", options=CallOptions(timeout=100))
+    assert type(exc_info.value) is TimeoutError
+
+    await asyncio.wait_for(interrupted.wait(), 2)
+    assert not caller._call_requests
+    assert not callee._invocation_tasks
+
+    # a cancelled caller task cancels its call as well
+    interrupted.clear()
+    task = asyncio.create_task(caller.call("io.xconn.slow"))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait_for(interrupted.wait(), 2)
+    assert not caller._call_requests
+
+    result = await caller.call("io.xconn.echo", [1])
+    assert result.args == [1]
+
+    await caller.leave()
+    await callee.leave()
+
+
+async def test_sync_call_timeout_interrupts_callee():
+    uri = await start_server()
+
+    def run():
+        config = TransportConfig(ping_interval=None)
+        callee = Client(config=config).connect(uri, "realm1")
+        caller = Client(config=config).connect(uri, "realm1")
+
+        interrupted = threading.Event()
+
+        def slow(invocation: Invocation) -> Result:
+            if invocation.interrupted.wait(5):
+                interrupted.set()
+
+            return Result()
+
+        callee.register("io.xconn.slow", slow)
+        callee.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+
+        with pytest.raises(TimeoutError) as exc_info:
+            caller.call("io.xconn.slow", options=CallOptions(timeout=100))
+        assert type(exc_info.value) is TimeoutError
+
+        assert interrupted.wait(2)
+        assert not caller._call_requests
+
+        results = caller.call_many(
+            "io.xconn.slow", [[1], [2]], options=CallOptions(timeout=100), return_exceptions=True
+        )
+        assert all(isinstance(result, TimeoutError) for result in results)
+
+        future = caller.call_async("io.xconn.slow")
+        future.cancel()
+        assert not caller._call_requests
+
+        echoed = caller.call("io.xconn.echo", [1]).args
+
+        # a result arriving while the call times out is returned, not dropped
+        caller.call_async = lambda *args: _ResultAtTimeout()
+        assert caller.call("io.xconn.echo", options=CallOptions(timeout=100)).args == ["late"]
+
+        caller.leave()
+        callee.leave()
+        return echoed
+
+    assert await asyncio.to_thread(run) == [1]
+
+
+async def test_sync_call_on_closed_session_fails():
+    uri = await start_server()
+
+    def run():
+        caller = Client(config=TransportConfig(ping_interval=None, coalesce_writes=True)).connect(uri, "realm1")
+        caller._base_session.close()
+        assert caller._stopped.wait(2)
+
+        with pytest.raises(ConnectionError):
+            caller.call("io.xconn.echo", [1])
+
+        with pytest.raises(ConnectionError):
+            caller.call_many("io.xconn.echo", [[1], [2]])
+
+        assert not caller._call_requests
+
+    await asyncio.to_thread(run)
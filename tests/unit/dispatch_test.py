@@ -0,0 +1,191 @@
+import asyncio
+import random
+import threading
+
+import pytest
+
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.dispatch import (
+    AsyncBoundedDispatcher,
+    AsyncInlineDispatcher,
+    AsyncShardedDispatcher,
+    BoundedDispatcher,
+    InlineDispatcher,
+    ShardedDispatcher,
+    shared_dispatcher,
+)
+from xconn.exception import ApplicationError, DispatchRejected
+from xconn.types import Event, Invocation, OverflowPolicy, Result, TransportConfig
+from xconn.uris import ERROR_UNAVAILABLE
+from tests.utils import start_server
+
+
+def test_sharded_dispatcher_keeps_order_per_key():
+    dispatcher = ShardedDispatcher(lanes=4, key=lambda event: event.args[0])
+    seen: dict[int, list[int]] = {key: [] for key in range(8)}
+    done = threading.Event()
+
+    def handle(event: Event):
+        key, seq = event.args
+        seen[key].append(seq)
+        if sum(len(items) for items in seen.values()) == 8 * 100:
+            done.set()
+
+    for seq in range(100):
+        for key in range(8):
+            event = Event([key, seq], None, None)
+            dispatcher.submit(event, lambda e=event: handle(e))
+
+    assert done.wait(5)
+    assert all(items == list(range(100)) for items in seen.values())
+    dispatcher.shutdown()
+
+
+def test_bounded_dispatcher_rejects_when_full():
+    dispatcher = BoundedDispatcher(max_workers=1, max_pending=2, policy=OverflowPolicy.REJECT)
+    release = threading.Event()
+
+    dispatcher.submit(Event(None, None, None), release.wait)
+    dispatcher.submit(Event(None, None, None), release.wait)
+    with pytest.raises(DispatchRejected):
+        dispatcher.submit(Event(None, None, None), release.wait)
+
+    assert dispatcher.rejected == 1
+    release.set()
+    dispatcher.shutdown()
+
+    with pytest.raises(ValueError):
+        BoundedDispatcher(policy=OverflowPolicy.DROP_OLDEST)
+
+
+async def test_dispatch_modes():
+    uri = await start_server()
+
+    def run():
+        config = TransportConfig(ping_interval=None)
+        callee = Client(config=config, dispatcher=shared_dispatcher()).connect(uri, "realm1")
+        caller = Client(config=config).connect(uri, "realm1")
+
+        reader = []
+        callee.register(
+            "io.xconn.inline", lambda _: Result([threading.current_thread().name]), dispatcher=InlineDispatcher()
+        )
+        reader.append(caller.call("io.xconn.inline").args[0])
+
+        release = threading.Event()
+
+        def slow(invocation: Invocation) -> Result:
+            release.wait(5)
+            return Result(invocation.args)
+
+        bounded = BoundedDispatcher(max_workers=1, max_pending=1, policy=OverflowPolicy.REJECT)
+        callee.register("io.xconn.slow", slow, dispatcher=bounded)
+        first = caller.call_async("io.xconn.slow", [1])
+        with pytest.raises(ApplicationError) as e:
+            caller.call("io.xconn.slow", [2])
+        release.set()
+
+        events = []
+        received = threading.Event()
+
+        def on_event(event: Event):
+            events.append(event.args[0])
+            if len(events) == 50:
+                received.set()
+
+        sharded = ShardedDispatcher(lanes=2, key=lambda _: "topic")
+        callee.subscribe("io.xconn.topic", on_event, dispatcher=sharded)
+        for i in range(50):
+            caller.publish("io.xconn.topic", [i])
+        received.wait(5)
+
+        caller.leave()
+        callee.leave()
+        bounded.shutdown()
+        sharded.shutdown()
+
+        return reader[0], first.result().args, e.value.message, events
+
+    thread_name, first, error, events = await asyncio.to_thread(run)
+    assert not thread_name.startswith("xconn-")
+    assert first == [1]
+    assert error == ERROR_UNAVAILABLE
+    assert events == list(range(50))
+
+
+async def test_async_sharded_dispatcher_keeps_order_per_key():
+    dispatcher = AsyncShardedDispatcher(lanes=4, key=lambda event: event.args[0])
+    seen: dict[int, list[int]] = {key: [] for key in range(8)}
+    done = asyncio.Event()
+
+    async def handle(event: Event):
+        # handlers that await would reorder events handled in tasks of their own
+        await asyncio.sleep(random.random() / 1000)
+        key, seq = event.args
+        seen[key].append(seq)
+        if sum(len(items) for items in seen.values()) == 8 * 20:
+            done.set()
+
+    for seq in range(20):
+        for key in range(8):
+            event = Event([key, seq], None, None)
+            await dispatcher.submit(event, lambda e=event: handle(e))
+
+    await asyncio.wait_for(done.wait(), 5)
+    assert all(items == list(range(20)) for items in seen.values())
+    dispatcher.shutdown()
+
+
+async def test_async_bounded_dispatcher_rejects_when_full():
+    dispatcher = AsyncBoundedDispatcher(workers=1, max_pending=1, policy=OverflowPolicy.REJECT)
+    release = asyncio.Event()
+
+    await dispatcher.submit(Event(None, None, None), release.wait)
+    # let the worker pick up the first one
+    await asyncio.sleep(0)
+    await dispatcher.submit(Event(None, None, None), release.wait)
+    with pytest.raises(DispatchRejected):
+        await dispatcher.submit(Event(None, None, None), release.wait)
+
+    assert dispatcher.rejected == 1
+    release.set()
+    dispatcher.shutdown()
+
+    with pytest.raises(ValueError):
+        AsyncBoundedDispatcher(policy=OverflowPolicy.DROP_OLDEST)
+
+
+async def test_async_dispatch_modes():
+    uri = await start_server()
+
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    subscriber = await client.connect(uri, "realm1")
+    publisher = await client.connect(uri, "realm1")
+
+    received: dict[str, list[int]] = {"inline": [], "sharded": []}
+    done = asyncio.Event()
+
+    def handler(mode: str):
+        async def on_event(event: Event):
+            await asyncio.sleep(0)
+            received[mode].append(event.args[0])
+            if all(len(events) == 50 for events in received.values()):
+                done.set()
+
+        return on_event
+
+    sharded = AsyncShardedDispatcher(lanes=2, key=lambda event: "topic")
+    await subscriber.subscribe("io.xconn.inline", handler("inline"), dispatcher=AsyncInlineDispatcher())
+    await subscriber.subscribe("io.xconn.sharded", handler("sharded"), dispatcher=sharded)
+    for i in range(50):
+        await publisher.publish("io.xconn.inline", [i])
+        await publisher.publish("io.xconn.sharded", [i])
+
+    await asyncio.wait_for(done.wait(), 5)
+    assert received["inline"] == list(range(50))
+    assert received["sharded"] == list(range(50))
+
+    sharded.shutdown()
+    await publisher.leave()
+    await subscriber.leave()
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from xconn.async_client import AsyncClient
+from xconn.async_session import AsyncSession, EventStream
+from xconn.types import OverflowPolicy, TransportConfig
+from tests.utils import start_server
+
+
+async def connect_pair() -> tuple[AsyncSession, AsyncSession]:
+    uri = await start_server()
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    return await client.connect(uri, "realm1"), await client.connect(uri, "realm1")
+
+
+async def wait_for_arrival(stream: EventStream, count: int):
+    for _ in range(100):
+        if stream.pending + stream.dropped == count:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize(
+    "overflow,expected",
+    [("drop_oldest", [7, 8, 9]), ("drop_newest", [0, 1, 2])],
+)
+async def test_event_stream_drops_on_overflow(overflow: str, expected: list[int]):
+    subscriber, publisher = await connect_pair()
+
+    async with subscriber.events("io.xconn.topic", maxsize=3, overflow=overflow) as stream:
+        for i in range(10):
+            await publisher.publish("io.xconn.topic", [i])
+
+        await wait_for_arrival(stream, 10)
+        received = []
+        async for event in stream:
+            received.append(event.args[0])
+            if stream.pending == 0:
+                break
+
+    assert received == expected
+    assert stream.dropped == 7
+
+    await publisher.leave()
+    await subscriber.leave()
+
+
+async def test_event_stream_blocks_on_overflow():
+    subscriber, publisher = await connect_pair()
+
+    stream = subscriber.events("io.xconn.topic", maxsize=2, overflow=OverflowPolicy.BLOCK)
+    await stream.subscribe()
+    for i in range(20):
+        await publisher.publish("io.xconn.topic", [i])
+
+    received = []
+    async for event in stream:
+        received.append(event.args[0])
+        # the session waits for room instead of dropping, so slow consumers get everything
+        await asyncio.sleep(0.001)
+        if len(received) == 20:
+            break
+
+    assert received == list(range(20))
+    assert stream.dropped == 0
+
+    await stream.close()
+    # closing unsubscribed, the session can go on with other work
+    await publisher.publish("io.xconn.topic", [20])
+    await subscriber.publish("io.xconn.other", [])
+    assert not subscriber._event_streams
+
+    await publisher.leave()
+    await subscriber.leave()
+
+
+async def test_event_stream_ends_with_the_connection():
+    subscriber, publisher = await connect_pair()
+
+    stream = subscriber.events("io.xconn.topic")
+    await stream.subscribe()
+    await publisher.publish("io.xconn.topic", [1])
+    await wait_for_arrival(stream, 1)
+
+    await subscriber._base_session.close()
+    # buffered events are still delivered first
+    assert (await stream.__anext__()).args == [1]
+    with pytest.raises(ConnectionError):
+        await stream.__anext__()
+
+    await publisher.leave()
+
+
+@pytest.mark.parametrize("overflow", [OverflowPolicy.REJECT, OverflowPolicy.DISCONNECT])
+async def test_event_stream_refuses_unsupported_overflow(overflow: OverflowPolicy):
+    subscriber, publisher = await connect_pair()
+
+    with pytest.raises(ValueError):
+        subscriber.events("io.xconn.topic", overflow=overflow)
+
+    await subscriber.leave()
+    await publisher.leave()
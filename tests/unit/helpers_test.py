@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from wampproto import idgen
+
+from xconn.helpers import SessionScopeIDGenerator
+
+
+def test_session_scope_ids_are_unique_across_threads():
+    generator = SessionScopeIDGenerator()
+
+    def take(_):
+        return [generator.next() for _ in range(1000)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ids = [i for chunk in executor.map(take, range(16)) for i in chunk]
+
+    assert len(set(ids)) == len(ids)
+    assert min(ids) >= 1
+
+
+def test_session_scope_ids_wrap_around():
+    generator = SessionScopeIDGenerator()
+    assert [generator.next() for _ in range(3)] == [1, 2, 3]
+
+    generator.id = idgen.ID_MAX - 1
+    generator._local.ids = None
+    assert generator.next() == 1
@@ -0,0 +1,88 @@
+import asyncio
+import gc
+import weakref
+
+import pytest
+from wampproto import auth, serializers
+
+from xconn import Router, Server, inproc
+from xconn.async_client import AsyncClient
+from xconn.types import Event, Invocation, Result, TransportConfig
+from tests.utils import free_port
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args, invocation.kwargs)
+
+
+@pytest.mark.parametrize("payload_passthrough", [False, True])
+async def test_inproc_sessions_next_to_network_ones(payload_passthrough: bool):
+    router = Router(payload_passthrough=payload_passthrough)
+    router.add_realm("realm1")
+    inproc.serve(router, "realm1")
+    port = free_port()
+    await Server(router).start_rawsocket("127.0.0.1", port)
+
+    local = await AsyncClient().connect("inproc://realm1", "realm1")
+    remote = await AsyncClient(
+        serializer=serializers.CBORSerializer(), ws_config=TransportConfig(ping_interval=None)
+    ).connect(f"rs://127.0.0.1:{port}", "realm1")
+
+    await local.register("io.xconn.local", echo)
+    await remote.register("io.xconn.remote", echo)
+
+    # objects go in and out of the in-process session untouched, remote ones are serialized as usual
+    assert (await remote.call("io.xconn.local", [b"\x01", {"a": [1]}], {"k": "v"})).args == [b"\x01", {"a": [1]}]
+    result = await local.call("io.xconn.remote", [b"\x02"], {"k": "v"})
+    assert result.args == [b"\x02"]
+    assert result.kwargs == {"k": "v"}
+
+    received = []
+    done = asyncio.Event()
+
+    async def on_event(event: Event):
+        received.append(event.args)
+        done.set()
+
+    await local.subscribe("io.xconn.topic", on_event)
+    await remote.publish("io.xconn.topic", [1, "two"], options={"acknowledge": True})
+    await asyncio.wait_for(done.wait(), 1)
+    assert received == [[1, "two"]]
+
+    await local.leave()
+    await remote.leave()
+    assert router.realms["realm1"].clients == {}
+
+
+async def test_inproc_unknown_router():
+    with pytest.raises(ConnectionRefusedError):
+        await AsyncClient().connect("inproc://io.xconn.nowhere", "realm1")
+
+
+class AllowAnonymous(auth.IServerAuthenticator):
+    def methods(self) -> list[str]:
+        return ["anonymous"]
+
+    def authenticate(self, request: auth.Request) -> auth.Response:
+        return auth.Response(request.authid, "anonymous")
+
+
+async def test_inproc_router_served_while_alive():
+    authenticator = AllowAnonymous()
+    router = Router()
+    router.add_realm("realm1")
+    inproc.serve(router, "short-lived", authenticator)
+
+    session = await AsyncClient().connect("inproc://short-lived", "realm1")
+    await session.leave()
+    await asyncio.sleep(0)
+
+    authenticator_ref = weakref.ref(authenticator)
+    del router, authenticator, session
+    gc.collect()
+
+    # neither the router nor its authenticator are kept alive by having been served
+    assert "short-lived" not in inproc._endpoints
+    assert authenticator_ref() is None
+    with pytest.raises(ConnectionRefusedError):
+        await AsyncClient().connect("inproc://short-lived", "realm1")
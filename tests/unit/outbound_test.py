@@ -0,0 +1,133 @@
+import asyncio
+from collections import deque
+
+import pytest
+from wampproto import messages, serializers
+
+from xconn import types
+from xconn.realm import Realm
+from xconn.types import OutboundConfig, OverflowPolicy
+
+
+class Client(types.IAsyncBaseSession):
+    """Records what the realm sends, slow ones only get to write once released."""
+
+    def __init__(self, sid: int, slow: bool = False):
+        self._sid = sid
+        self._serializer = serializers.JSONSerializer()
+        self.received: deque[messages.Message] = deque()
+        self.release = asyncio.Event()
+        if not slow:
+            self.release.set()
+        self.closed = False
+
+    @property
+    def id(self) -> int:
+        return self._sid
+
+    @property
+    def realm(self) -> str:
+        return "realm1"
+
+    @property
+    def authid(self) -> str:
+        return "client"
+
+    @property
+    def authrole(self) -> str:
+        return "anonymous"
+
+    @property
+    def serializer(self) -> serializers.Serializer:
+        return self._serializer
+
+    async def send(self, data: bytes | str):
+        await self.release.wait()
+        self.received.append(self._serializer.deserialize(data))
+
+    async def close(self):
+        self.closed = True
+
+
+async def setup(config: OutboundConfig) -> tuple[Realm, Client, Client, Client]:
+    realm = Realm(config)
+    publisher, fast, slow = Client(1), Client(2), Client(3, slow=True)
+    for client in (publisher, fast, slow):
+        realm.attach_client(client)
+
+    for client in (fast, slow):
+        await realm.receive_message(client.id, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+
+    # the slow one's writer is stuck writing SUBSCRIBED
+    await asyncio.sleep(0)
+    return realm, publisher, fast, slow
+
+
+async def publish(realm: Realm, publisher: Client, count: int):
+    for i in range(count):
+        await realm.receive_message(
+            publisher.id, messages.Publish(messages.PublishFields(i + 2, "io.xconn.topic", [i]))
+        )
+        # like a server reading the next message, which lets the writers run
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_events_are_dropped():
+    realm, publisher, fast, slow = await setup(OutboundConfig(maxsize=4, overflow=OverflowPolicy.DROP_NEWEST))
+
+    # the publisher isn't held up by the slow subscriber
+    await asyncio.wait_for(publish(realm, publisher, 20), 1)
+    await asyncio.sleep(0.01)
+
+    assert [msg.args[0] for msg in fast.received if isinstance(msg, messages.Event)] == list(range(20))
+    stats = realm.outbound_stats()[slow.id]
+    assert stats.depth == 4
+    assert stats.dropped == 16
+
+    slow.release.set()
+    await asyncio.sleep(0.01)
+    # what fit in the queue arrives in order
+    assert [msg.args[0] for msg in slow.received if isinstance(msg, messages.Event)] == [0, 1, 2, 3]
+    assert realm.outbound_stats()[slow.id].depth == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected():
+    realm, publisher, fast, slow = await setup(OutboundConfig(maxsize=4, overflow=OverflowPolicy.DISCONNECT))
+
+    await asyncio.wait_for(publish(realm, publisher, 20), 1)
+    await asyncio.sleep(0.01)
+
+    assert slow.closed
+    assert not fast.closed
+    assert len([msg for msg in fast.received if isinstance(msg, messages.Event)]) == 20
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_blocks_publisher():
+    realm, publisher, fast, slow = await setup(OutboundConfig(maxsize=4, overflow=OverflowPolicy.BLOCK))
+
+    publishing = asyncio.create_task(publish(realm, publisher, 20))
+    await asyncio.sleep(0.05)
+    assert not publishing.done()
+    assert realm.outbound_stats()[slow.id].max_depth == 4
+
+    slow.release.set()
+    await asyncio.wait_for(publishing, 1)
+    await asyncio.sleep(0.01)
+    assert [msg.args[0] for msg in slow.received if isinstance(msg, messages.Event)] == list(range(20))
+    assert realm.outbound_stats()[slow.id].dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_detach_after_goodbye():
+    realm, publisher, fast, slow = await setup(OutboundConfig())
+    await realm.receive_message(fast.id, messages.Goodbye(messages.GoodbyeFields({}, "wamp.close.close_realm")))
+    assert fast.closed
+
+    # the server detaches every client once its connection is gone
+    realm.detach_client(fast)
+    realm.detach_client(slow)
+    realm.detach_client(slow)
+    assert list(realm.clients) == [publisher.id]
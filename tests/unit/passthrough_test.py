@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from wampproto import messages, serializers
+
+from xconn import Router, Server
+from xconn.async_client import AsyncClient
+from xconn.passthrough import RawPayload, decode, encode
+from xconn.types import Event, Invocation, Result, TransportConfig
+from tests.utils import free_port
+
+SERIALIZERS = [serializers.JSONSerializer(), serializers.MsgPackSerializer(), serializers.CBORSerializer()]
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+@pytest.mark.parametrize("recipient", SERIALIZERS)
+def test_payload_is_passed_through(serializer: serializers.Serializer, recipient: serializers.Serializer):
+    call = messages.Call(messages.CallFields(5, "io.xconn.echo", [1, "two", [3]], {"four": 4}, {"timeout": 10}))
+
+    decoded = decode(serializer, serializer.serialize(call))
+    assert decoded.procedure == "io.xconn.echo"
+    assert decoded.options == {"timeout": 10}
+    assert decoded.args is None
+    assert isinstance(decoded.payload, RawPayload)
+
+    invocation = messages.Invocation(messages.InvocationFields(7, 9, details={}, payload=decoded.payload))
+    received = recipient.deserialize(encode(recipient, invocation))
+    assert isinstance(received, messages.Invocation)
+    assert received.request_id == 7
+    assert received.args == [1, "two", [3]]
+    assert received.kwargs == {"four": 4}
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_messages_without_payload_are_decoded(serializer: serializers.Serializer):
+    publish = messages.Publish(messages.PublishFields(3, "io.xconn.topic", options={"acknowledge": True}))
+    decoded = decode(serializer, serializer.serialize(publish))
+    assert decoded.topic == "io.xconn.topic"
+    assert decoded.payload is None
+
+    subscribe = messages.Subscribe(messages.SubscribeFields(4, "io.xconn.topic"))
+    assert decode(serializer, serializer.serialize(subscribe)).topic == "io.xconn.topic"
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args, invocation.kwargs)
+
+
+async def test_router_payload_passthrough():
+    router = Router(payload_passthrough=True)
+    router.add_realm("realm1")
+    port = free_port()
+    await Server(router).start_rawsocket("127.0.0.1", port)
+    uri = f"rs://127.0.0.1:{port}"
+    config = TransportConfig(ping_interval=None)
+
+    callee = await AsyncClient(serializer=serializers.CBORSerializer(), ws_config=config).connect(uri, "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    received: dict[str, list] = {"cbor": [], "json": []}
+    done = asyncio.Event()
+    subscribers = []
+    for name, serializer in [("cbor", serializers.CBORSerializer()), ("json", serializers.JSONSerializer())]:
+        session = await AsyncClient(serializer=serializer, ws_config=config).connect(uri, "realm1")
+
+        async def on_event(event: Event, name=name):
+            received[name].append((event.args, event.kwargs))
+            if all(received.values()):
+                done.set()
+
+        await session.subscribe("io.xconn.topic", on_event)
+        subscribers.append(session)
+
+    # the same serializer as the callee gets the bytes as they are, JSON has them decoded once
+    for serializer in [serializers.CBORSerializer(), serializers.JSONSerializer()]:
+        caller = await AsyncClient(serializer=serializer, ws_config=config).connect(uri, "realm1")
+        result = await caller.call("io.xconn.echo", ["hello", {"nested": [1, 2]}], {"key": "value"})
+        assert result.args == ["hello", {"nested": [1, 2]}]
+        assert result.kwargs == {"key": "value"}
+
+        result = await caller.call("io.xconn.echo")
+        assert result.args is None or result.args == []
+        await caller.leave()
+
+    publisher = subscribers[0]
+    await publisher.publish("io.xconn.topic", [1, "two"], {"three": 3}, options={"acknowledge": True})
+    await asyncio.wait_for(done.wait(), 1)
+    assert received == {"cbor": [([1, "two"], {"three": 3})], "json": [([1, "two"], {"three": 3})]}
+
+    for session in subscribers:
+        await session.leave()
+    await callee.leave()
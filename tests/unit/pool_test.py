@@ -0,0 +1,82 @@
+import asyncio
+
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.types import Invocation, PoolStrategy, Result, TransportConfig
+from tests.utils import start_server
+
+
+async def test_async_pool_spreads_calls():
+    uri = await start_server()
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    callee = await client.connect(uri, "realm1")
+
+    release = asyncio.Event()
+
+    async def echo(invocation: Invocation) -> Result:
+        return Result(invocation.args)
+
+    async def slow(invocation: Invocation) -> Result:
+        await release.wait()
+        return Result()
+
+    await callee.register("io.xconn.echo", echo)
+    await callee.register("io.xconn.slow", slow)
+
+    pool = await client.connect_pool(uri, "realm1", size=3)
+    results = await asyncio.gather(*(pool.call("io.xconn.echo", [i]) for i in range(30)))
+    assert [result.args[0] for result in results] == list(range(30))
+    assert pool.stats.requests == [10, 10, 10]
+    assert pool.stats.connected == 3
+
+    # a member that drops is skipped while it reconnects
+    await pool.members[0].session._base_session.close()
+    await pool.members[0].session.wait_task
+    await pool.call("io.xconn.echo", [1])
+    for _ in range(50):
+        if pool.stats.reconnects == 1:
+            break
+        await asyncio.sleep(0.02)
+    assert pool.stats.reconnects == 1
+    assert pool.stats.connected == 3
+
+    await pool.leave()
+
+    pool = await client.connect_pool(uri, "realm1", size=2, strategy=PoolStrategy.LEAST_OUTSTANDING)
+    blocked = asyncio.create_task(pool.call("io.xconn.slow"))
+    await asyncio.sleep(0.05)
+    # the busy member is avoided
+    for i in range(4):
+        await pool.call("io.xconn.echo", [i])
+    assert pool.stats.requests == [1, 4]
+    assert pool.stats.outstanding == [1, 0]
+
+    release.set()
+    await blocked
+    assert pool.stats.outstanding == [0, 0]
+    assert pool.stats.errors == 0
+
+    await pool.leave()
+    await callee.leave()
+
+
+async def test_sync_pool_spreads_calls():
+    uri = await start_server()
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None))
+        callee = client.connect(uri, "realm1")
+        callee.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+
+        pool = client.connect_pool(uri, "realm1", size=2)
+        results = [pool.call("io.xconn.echo", [i]).args[0] for i in range(10)]
+        stats = pool.stats
+
+        pool.leave()
+        callee.leave()
+        return results, stats
+
+    results, stats = await asyncio.to_thread(run)
+    assert results == list(range(10))
+    assert stats.requests == [5, 5]
+    assert stats.connected == 2
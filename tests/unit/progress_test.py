@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.exception import StreamOverflow
+from xconn.types import Invocation, Result, TransportConfig
+from tests.utils import start_server
+
+
+async def count(invocation: Invocation):
+    for i in range(invocation.args[0]):
+        yield Result([i])
+
+
+def sync_count(invocation: Invocation):
+    for i in range(invocation.args[0]):
+        yield Result([i])
+
+
+async def test_async_call_stream():
+    uri = await start_server()
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    callee = await client.connect(uri, "realm1")
+    caller = await client.connect(uri, "realm1")
+    await callee.register("io.xconn.count", count)
+
+    results = [result.args[0] async for result in caller.call_stream("io.xconn.count", [100])]
+    assert results == list(range(100))
+
+    # a consumer falling behind doesn't hold up the session, its call is cancelled instead
+    with pytest.raises(StreamOverflow):
+        async for _ in caller.call_stream("io.xconn.count", [10_000], maxsize=2):
+            await caller.call("io.xconn.count", [1])
+
+    assert not caller._stream_requests
+
+    # without receive_progress only the last result arrives
+    assert (await caller.call("io.xconn.count", [5])).args == [4]
+
+    # leaving early cancels the call
+    async with contextlib.aclosing(caller.call_stream("io.xconn.count", [10_000])) as stream:
+        async for result in stream:
+            if result.args[0] == 3:
+                break
+
+    assert not caller._stream_requests
+    assert (await caller.call("io.xconn.count", [1])).args == [0]
+
+    await caller.leave()
+    await callee.leave()
+
+
+async def test_sync_call_stream():
+    uri = await start_server()
+
+    def run():
+        config = TransportConfig(ping_interval=None)
+        callee = Client(config=config).connect(uri, "realm1")
+        caller = Client(config=config).connect(uri, "realm1")
+        callee.register("io.xconn.count", sync_count)
+
+        results = [result.args[0] for result in caller.call_stream("io.xconn.count", [100])]
+        last = caller.call("io.xconn.count", [5]).args
+
+        # a consumer falling behind doesn't hold up the session, its call is cancelled instead
+        with pytest.raises(StreamOverflow):
+            for _ in caller.call_stream("io.xconn.count", [10_000], maxsize=2):
+                caller.call("io.xconn.count", [1])
+
+        stream = caller.call_stream("io.xconn.count", [10_000])
+        for result in stream:
+            if result.args[0] == 3:
+                break
+        stream.close()
+
+        leaked = dict(caller._stream_requests)
+        after = caller.call("io.xconn.count", [1]).args
+
+        caller.leave()
+        callee.leave()
+        return results, last, leaked, after
+
+    results, last, leaked, after = await asyncio.to_thread(run)
+    assert results == list(range(100))
+    assert last == [4]
+    assert not leaked
+    assert after == [0]
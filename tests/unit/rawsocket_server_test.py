@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from wampproto import serializers
+from wampproto.joiner import Joiner
+from wampproto.transports.rawsocket import Handshake, MAGIC, MessageHeader, MSG_TYPE_WAMP, SERIALIZER_TYPE_CBOR
+
+from xconn import Router, Server, CBORSerializer, JSONSerializer, MsgPackSerializer
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.transports import DEFAULT_MAX_MSG_SIZE, RAW_SOCKET_HEADER_LENGTH, RAW_SOCKET_ERROR_SERIALIZER_UNSUPPORTED
+from xconn.types import Invocation, Result, TransportConfig
+from tests.utils import free_port
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args, invocation.kwargs)
+
+
+def start_router() -> Server:
+    router = Router()
+    router.add_realm("realm1")
+    return Server(router)
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), CBORSerializer(), MsgPackSerializer()])
+async def test_rawsocket_and_websocket_share_a_port(serializer):
+    port = free_port()
+    await start_router().start_rawsocket("127.0.0.1", port, websocket=True)
+
+    config = TransportConfig(ping_interval=None)
+    callee = await AsyncClient(serializer=serializer, ws_config=config).connect(f"rs://127.0.0.1:{port}", "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    caller = await AsyncClient(ws_config=config).connect(f"ws://127.0.0.1:{port}/ws", "realm1")
+    result = await caller.call("io.xconn.echo", ["hello", 1], {"key": "value"})
+    assert result.args == ["hello", 1]
+    assert result.kwargs == {"key": "value"}
+
+    await caller.leave()
+    await callee.leave()
+
+
+async def test_rawsocket_only_rejects_websocket():
+    port = free_port()
+    await start_router().start_rawsocket("127.0.0.1", port)
+
+    with pytest.raises(Exception):
+        await AsyncClient(ws_config=TransportConfig(ping_interval=None)).connect(f"ws://127.0.0.1:{port}/ws", "realm1")
+
+
+async def test_unix_rawsocket(tmp_path):
+    path = str(tmp_path / "rs.sock")
+    await start_router().start_unix_rawsocket(path)
+
+    config = TransportConfig(ping_interval=None)
+    callee = await AsyncClient(serializer=CBORSerializer(), ws_config=config).connect(f"unix+rs://{path}", "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    def call() -> list:
+        session = Client(serializer=CBORSerializer()).connect(f"unix+rs://{path}", "realm1")
+        try:
+            return session.call("io.xconn.echo", [b"\x01" * 100_000]).args
+        finally:
+            session.leave()
+
+    assert await asyncio.to_thread(call) == [b"\x01" * 100_000]
+    await callee.leave()
+
+
+async def test_rawsocket_unsupported_serializer():
+    port = free_port()
+    await start_router().start_rawsocket("127.0.0.1", port)
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(Handshake(9, 2**20).to_bytes())
+    response = await reader.readexactly(RAW_SOCKET_HEADER_LENGTH)
+    assert response[0] == MAGIC
+    assert response[1] >> 4 == RAW_SOCKET_ERROR_SERIALIZER_UNSUPPORTED
+    # the server hangs up after the error
+    assert await reader.read() == b""
+    writer.close()
+
+
+async def test_rawsocket_handshake_and_malformed_frame(capsys):
+    port = free_port()
+    server = start_router()
+    await server.start_rawsocket("127.0.0.1", port)
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(Handshake(SERIALIZER_TYPE_CBOR, 2**9).to_bytes())
+    # the server answers with its own limit, not the client's
+    response = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+    assert response.max_msg_size == DEFAULT_MAX_MSG_SIZE
+
+    hello = Joiner("realm1", serializer=serializers.CBORSerializer()).send_hello()
+    writer.write(MessageHeader(MSG_TYPE_WAMP, len(hello)).to_bytes() + hello)
+    welcome = MessageHeader.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+    await reader.readexactly(welcome.length)
+
+    writer.write(MessageHeader(MSG_TYPE_WAMP, 3).to_bytes() + b"\xff\xff\xff")
+    # not WAMP, the server reports it and hangs up
+    assert await asyncio.wait_for(reader.read(), 2) == b""
+    writer.close()
+    await asyncio.sleep(0)
+    assert not server._rawsocket_tasks
+    assert "Error: " in capsys.readouterr().out
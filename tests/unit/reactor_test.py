@@ -0,0 +1,178 @@
+import asyncio
+import socket
+import threading
+from os import cpu_count
+
+from wampproto.transports.rawsocket import Handshake, MessageHeader, MSG_TYPE_WAMP, SERIALIZER_TYPE_CBOR
+
+from xconn import Router, helpers
+from xconn.acceptor import AsyncRawSocketAcceptor
+from xconn.client import Client
+from xconn.reactor import Reactor, get_reactor
+from xconn.transports import AsyncRawSocketTransport, RawSocketTransport, RAW_SOCKET_HEADER_LENGTH
+from xconn.types import Event, Invocation, Result, TransportConfig
+
+
+async def start_rawsocket_router(router: Router) -> asyncio.Server:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+        writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+        transport = AsyncRawSocketTransport(reader, writer)
+        base_session = await AsyncRawSocketAcceptor().accept(transport, helpers.get_rs_serializer(hs.protocol))
+        router.attach_client(base_session)
+        try:
+            while True:
+                msg = base_session.serializer.deserialize(await transport.read())
+                await router.receive_message(base_session, msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            router.detach_client(base_session)
+
+            await transport.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def test_reactor_sessions():
+    router = Router()
+    router.add_realm("realm1")
+    server = await start_rawsocket_router(router)
+    uri = f"rs://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None, reactor=True))
+        threads_before = threading.active_count()
+        sessions = [client.connect(uri, "realm1") for _ in range(20)]
+        threads_added = threading.active_count() - threads_before
+
+        callee = sessions[0]
+        callee.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+
+        received = []
+        done = threading.Event()
+
+        def on_event(event: Event):
+            received.append(event.args[0])
+            if len(received) == 19:
+                done.set()
+
+        callee.subscribe("io.xconn.topic", on_event)
+
+        results = []
+        for i, session in enumerate(sessions[1:]):
+            results.append(session.call("io.xconn.echo", [i]).args[0])
+            session.publish("io.xconn.topic", [i])
+
+        done.wait(5)
+
+        disconnected = threading.Event()
+        last = client.connect(uri, "realm1", disconnect_callback=disconnected.set)
+        last.leave()
+        for session in sessions:
+            session.leave()
+
+        return threads_added, results, sorted(received), disconnected.wait(5)
+
+    threads_added, results, received, disconnected = await asyncio.to_thread(run)
+    # the reactor thread, no reader thread per session
+    assert threads_added <= 2
+    assert results == list(range(19))
+    assert received == list(range(19))
+    assert disconnected
+    # closed transports are dropped by the reactor thread
+    for _ in range(50):
+        if not get_reactor()._watches:
+            break
+        await asyncio.sleep(0.02)
+    assert not get_reactor()._watches
+
+    server.close()
+
+
+async def test_reactor_sessions_share_one_dispatcher():
+    router = Router()
+    router.add_realm("realm1")
+    server = await start_rawsocket_router(router)
+    uri = f"rs://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    # more sessions than the shared pool has threads
+    count = (cpu_count() or 1) * 4 + 20
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None, reactor=True))
+        sessions = [client.connect(uri, "realm1") for _ in range(count)]
+        threads_before = threading.active_count()
+
+        received = threading.Semaphore(0)
+        for session in sessions:
+            session.subscribe("io.xconn.topic", lambda event: received.release())
+
+        sessions[0].publish("io.xconn.topic", options={"exclude_me": False})
+        handled = all(received.acquire(timeout=5) for _ in sessions)
+        threads_added = threading.active_count() - threads_before
+
+        for session in sessions:
+            session.leave()
+
+        return handled, threads_added
+
+    handled, threads_added = await asyncio.to_thread(run)
+    assert handled
+    # handlers ran on the shared pool, not on a pool per session
+    assert threads_added <= (cpu_count() or 1) * 4
+
+    server.close()
+
+
+async def test_reactor_handles_large_messages():
+    router = Router()
+    router.add_realm("realm1")
+    server = await start_rawsocket_router(router)
+    uri = f"rs://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None, reactor=True))
+        callee = client.connect(uri, "realm1")
+        caller = client.connect(uri, "realm1")
+
+        def echo(invocation: Invocation) -> Result:
+            return Result(invocation.args)
+
+        callee.register("io.xconn.echo", echo)
+        payload = "x" * 3_000_000
+        result = caller.call("io.xconn.echo", [payload]).args[0]
+
+        caller.leave()
+        callee.leave()
+        return result == payload
+
+    assert await asyncio.to_thread(run)
+    server.close()
+
+
+def test_reactor_survives_a_transport_it_cannot_watch():
+    reactor = Reactor()
+
+    # closed before the reactor thread gets to register it
+    broken, _ = socket.socketpair()
+    broken_transport = RawSocketTransport(broken, SERIALIZER_TYPE_CBOR)
+    broken.close()
+    broken_closed = threading.Event()
+    reactor.add(broken_transport, lambda data: None, broken_closed.set)
+    assert broken_closed.wait(2)
+
+    client, server = socket.socketpair()
+    received = []
+    done = threading.Event()
+
+    def on_message(data):
+        received.append(bytes(data))
+        done.set()
+
+    reactor.add(RawSocketTransport(client, SERIALIZER_TYPE_CBOR), on_message, lambda: None)
+    server.sendall(MessageHeader(MSG_TYPE_WAMP, 1).to_bytes() + b"\x80")
+    assert done.wait(2)
+    assert received == [b"\x80"]
+
+    server.close()
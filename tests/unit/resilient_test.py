@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+import socket
+import threading
+import time
+
+import pytest
+from wampproto.transports.rawsocket import Handshake
+
+from xconn import Router, helpers
+from xconn.acceptor import AsyncRawSocketAcceptor
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.resilient import AsyncResilientSession, ResilientRegistration, ResilientSession, backoff_delays
+from xconn.transports import AsyncRawSocketTransport, RAW_SOCKET_HEADER_LENGTH
+from xconn.types import Event, Invocation, OverflowPolicy, ReconnectConfig, Result, TransportConfig
+
+
+class RestartableRouter:
+    """A rawsocket router that can be stopped, dropping all its connections, and started again on the same port."""
+
+    def __init__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        self.uri = f"rs://127.0.0.1:{self.port}"
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self):
+        router = Router()
+        router.add_realm("realm1")
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            self._writers.add(writer)
+            hs = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+            writer.write(Handshake(hs.protocol, hs.max_msg_size).to_bytes())
+
+            transport = AsyncRawSocketTransport(reader, writer)
+            base_session = await AsyncRawSocketAcceptor().accept(transport, helpers.get_rs_serializer(hs.protocol))
+            router.attach_client(base_session)
+            try:
+                while True:
+                    msg = base_session.serializer.deserialize(await transport.read())
+                    await router.receive_message(base_session, msg)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                router.detach_client(base_session)
+                self._writers.discard(writer)
+                writer.close()
+
+        self._server = await asyncio.start_server(handle, "127.0.0.1", self.port)
+
+    async def stop(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+
+        await self._server.wait_closed()
+
+
+def test_backoff_delays():
+    config = ReconnectConfig(initial_delay=0.01, max_delay=0.1, multiplier=2, jitter=0.5)
+    delays = list(itertools.islice(backoff_delays(config), 10))
+
+    assert delays[0] == 0
+    assert 0.005 <= delays[1] <= 0.01
+    assert all(0.05 <= delay <= 0.1 for delay in delays[5:])
+
+
+async def test_async_resilient_session_survives_router_restart():
+    router = RestartableRouter()
+    await router.start()
+
+    client = AsyncClient(ws_config=TransportConfig(ping_interval=None))
+    session = await client.connect_resilient(router.uri, "realm1")
+
+    release = asyncio.Event()
+    received = []
+
+    async def slow(invocation: Invocation) -> Result:
+        await release.wait()
+        return Result()
+
+    async def echo(invocation: Invocation) -> Result:
+        return Result(invocation.args)
+
+    async def on_event(event: Event):
+        received.append(event.args[0])
+
+    await session.register("io.xconn.slow", slow)
+    await session.register("io.xconn.echo", echo)
+    await session.subscribe("io.xconn.topic", on_event)
+
+    pending = asyncio.create_task(session.call("io.xconn.slow"))
+    await asyncio.sleep(0.05)
+    await router.stop()
+
+    # calls in flight fail, publishes are kept until the session is back
+    with pytest.raises(ConnectionError):
+        await pending
+
+    for i in range(3):
+        await session.publish("io.xconn.topic", [i])
+    assert len(session._publishes) == 3
+    release.set()
+
+    await router.start()
+    # waits for the reconnect, the registrations are back by then
+    result = await session.call("io.xconn.echo", [1])
+    assert result.args == [1]
+
+    for _ in range(50):
+        if len(received) == 3:
+            break
+        await asyncio.sleep(0.02)
+
+    assert received == [0, 1, 2]
+    assert session.stats.reconnects == 1
+    assert session.stats.last_recovery < 1
+
+    await session.leave()
+    await router.stop()
+
+
+async def test_sync_resilient_session_survives_router_restart():
+    router = RestartableRouter()
+    await router.start()
+    loop = asyncio.get_running_loop()
+
+    def run():
+        config = ReconnectConfig(publish_buffer=2, publish_overflow=OverflowPolicy.DROP_OLDEST)
+        client = Client(config=TransportConfig(ping_interval=None))
+        session = client.connect_resilient(router.uri, "realm1", config)
+
+        received = []
+        done = threading.Event()
+
+        def on_event(event: Event):
+            received.append(event.args[0])
+            if len(received) == 2:
+                done.set()
+
+        session.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+        session.subscribe("io.xconn.topic", on_event)
+        first = session.session
+
+        asyncio.run_coroutine_threadsafe(router.stop(), loop).result()
+        while not first._closed:
+            time.sleep(0.01)
+
+        # the buffer holds two, the oldest one is dropped
+        for i in range(3):
+            session.publish("io.xconn.topic", [i])
+
+        asyncio.run_coroutine_threadsafe(router.start(), loop).result()
+        echoed = session.call("io.xconn.echo", [1]).args
+
+        done.wait(2)
+        stats = session.stats
+        session.leave()
+        return echoed, received, stats
+
+    echoed, received, stats = await asyncio.to_thread(run)
+    assert echoed == [1]
+    assert received == [1, 2]
+    assert stats.reconnects == 1
+    assert stats.dropped_publishes == 1
+
+    await router.stop()
+
+
+async def test_sync_call_waits_when_connection_drops_after_wait():
+    router = RestartableRouter()
+    await router.start()
+    loop = asyncio.get_running_loop()
+
+    def drop_connections():
+        for writer in list(router._writers):
+            writer.close()
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None, coalesce_writes=True))
+        session = client.connect_resilient(router.uri, "realm1")
+        session.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+        first = session.session
+
+        wait_connected = session._wait_connected
+
+        def drop_after_wait(deadline=None):
+            connected = wait_connected(deadline)
+            if connected is first:
+                # the connection is lost right before the call goes out
+                loop.call_soon_threadsafe(drop_connections)
+                assert connected._stopped.wait(2)
+
+            return connected
+
+        session._wait_connected = drop_after_wait
+        echoed = session.call("io.xconn.echo", [1]).args
+        reconnects = session.stats.reconnects
+        session.leave()
+        return echoed, reconnects
+
+    assert await asyncio.to_thread(run) == ([1], 1)
+
+    await router.stop()
+
+
+async def test_sync_restore_skips_registrations_that_fail():
+    router = RestartableRouter()
+    await router.start()
+    loop = asyncio.get_running_loop()
+
+    def fail(_):
+        raise RuntimeError("can't register")
+
+    def run():
+        client = Client(config=TransportConfig(ping_interval=None))
+        session = client.connect_resilient(router.uri, "realm1")
+        session.register("io.xconn.echo", lambda invocation: Result(invocation.args))
+        # replayed along with the one above, failing on every new connection
+        session._handles[ResilientRegistration(session, fail)] = None
+        first = session.session
+
+        asyncio.run_coroutine_threadsafe(router.stop(), loop).result()
+        while not first._closed:
+            time.sleep(0.01)
+
+        asyncio.run_coroutine_threadsafe(router.start(), loop).result()
+        echoed = session.call("io.xconn.echo", [1], options={"timeout": 5000}).args
+        reconnects = session.stats.reconnects
+        session.leave()
+        return echoed, reconnects
+
+    assert await asyncio.to_thread(run) == ([1], 1)
+
+    await router.stop()
+
+
+def test_resilient_session_refuses_unsupported_overflow():
+    config = ReconnectConfig(publish_overflow=OverflowPolicy.DISCONNECT)
+    with pytest.raises(ValueError):
+        ResilientSession(lambda callback: None, config)
+
+    with pytest.raises(ValueError):
+        AsyncResilientSession(lambda callback: None, config)
@@ -1,3 +1,4 @@
+import asyncio
 from collections import deque
 
 import pytest
@@ -37,10 +38,18 @@ class MockBaseSession(types.IAsyncBaseSession):
     def authrole(self) -> str:
         return self._authrole
 
+    @property
+    def serializer(self) -> serializers.Serializer:
+        return self._serializer
+
     async def send(self, data: bytes):
         self.messages.append(data)
 
     async def receive(self) -> bytes:
+        # the router writes to every client from a task of its own
+        while not self.messages:
+            await asyncio.sleep(0)
+
         return self.messages.popleft()
 
     async def send_message(self, msg: messages.Message):
@@ -93,3 +102,74 @@ async def test_router():
 
     await callee.register("foo.bar", r)
     await caller.call("foo.bar", r)
+
+
+class CountingJSONSerializer(serializers.JSONSerializer):
+    calls = 0
+
+    def serialize(self, message: messages.Message) -> str:
+        CountingJSONSerializer.calls += 1
+        return super().serialize(message)
+
+
+class CountingCBORSerializer(serializers.CBORSerializer):
+    calls = 0
+
+    def serialize(self, message: messages.Message) -> bytes:
+        CountingCBORSerializer.calls += 1
+        return super().serialize(message)
+
+
+@pytest.mark.asyncio
+async def test_publish_serializes_event_once_per_serializer():
+    r = router.Router()
+    r.add_realm("realm1")
+
+    publisher = MockBaseSession(1, "realm1", "john", "anonymous", serializers.JSONSerializer())
+    r.attach_client(publisher)
+
+    subscribers = []
+    for sid in range(2, 12):
+        serializer = CountingJSONSerializer() if sid % 2 else CountingCBORSerializer()
+        subscriber = MockBaseSession(sid, "realm1", "alex", "anonymous", serializer)
+        r.attach_client(subscriber)
+        await r.receive_message(subscriber, messages.Subscribe(messages.SubscribeFields(1, "foo.bar")))
+        assert isinstance(await subscriber.receive_message(), messages.Subscribed)
+        subscribers.append(subscriber)
+
+    CountingJSONSerializer.calls = CountingCBORSerializer.calls = 0
+    await r.receive_message(publisher, messages.Publish(messages.PublishFields(2, "foo.bar", args=[1])))
+
+    assert CountingJSONSerializer.calls == 1
+    assert CountingCBORSerializer.calls == 1
+    for subscriber in subscribers:
+        event = await subscriber.receive_message()
+        assert isinstance(event, messages.Event)
+        assert event.args == [1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_kill_is_downgraded_to_killnowait():
+    caller = MockBaseSession(1, "realm1", "john", "anonymous", serializers.JSONSerializer())
+    callee = MockBaseSession(2, "realm1", "alex", "anonymous", serializers.JSONSerializer())
+
+    r = router.Router()
+    r.add_realm("realm1")
+    r.attach_client(callee)
+    r.attach_client(caller)
+    await callee.register("foo.bar", r)
+
+    await r.receive_message(caller, messages.Call(messages.CallFields(3, "foo.bar")))
+    invocation = await callee.receive_message()
+    assert isinstance(invocation, messages.Invocation)
+
+    await r.receive_message(caller, messages.Cancel(messages.CancelFields(3, options={"mode": "kill"})))
+
+    interrupt = await callee.receive_message()
+    assert isinstance(interrupt, messages.Interrupt)
+    assert interrupt.options == {"mode": "killnowait"}
+
+    # the caller doesn't wait for the callee
+    error = await caller.receive_message()
+    assert isinstance(error, messages.Error)
+    assert error.uri == "wamp.error.canceled"
@@ -0,0 +1,170 @@
+import asyncio
+import struct
+
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+from wampproto.transports.rawsocket import MessageHeader, MSG_TYPE_WAMP
+
+from xconn import Router, Server, CBORSerializer
+from xconn.async_client import AsyncClient
+from xconn.client import Client
+from xconn.shm import (
+    DOORBELL,
+    MIN_RING_SIZE,
+    AsyncShmRawSocketTransport,
+    ShmFrameReader,
+    ShmRawSocketTransport,
+    ShmRing,
+    decode_ring_names,
+)
+from xconn.types import Invocation, Result, TransportConfig
+
+
+def test_ring_wraps_around():
+    ring = ShmRing.create(16)
+    try:
+        out = bytearray(16)
+        for i in range(10):
+            data = bytes([i]) * 11
+            assert ring.write(memoryview(data)) == 11
+            assert ring.write(memoryview(b"overflow")) == 5
+
+            assert ring.read_into(memoryview(out)) == 16
+            assert bytes(out) == data + b"overf"
+    finally:
+        ring.unlink()
+
+
+def test_frame_reader_reassembles_frames_larger_than_ring():
+    ring = ShmRing.create(64)
+    try:
+        reader = ShmFrameReader(ring)
+        payload = bytes(range(256)) * 4
+        data = memoryview(MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes() + payload)
+
+        while data:
+            assert reader.next_frame() is None
+            data = data[ring.write(data) :]
+
+        assert reader.next_frame() == (MSG_TYPE_WAMP, payload)
+        assert reader.next_frame() is None
+    finally:
+        ring.unlink()
+
+
+def test_attach_checks_the_capacity_header():
+    ring = ShmRing.create(64)
+    try:
+        # claims more than the segment holds
+        struct.pack_into("<Q", ring._buf, 0, 1 << 20)
+        with pytest.raises(ValueError):
+            ShmRing.attach(ring.name)
+    finally:
+        ring.unlink()
+        ring.close()
+
+
+@pytest.mark.parametrize("data", [b"", b"a", b"a b c", b" b", b"a\xff b"])
+def test_decode_ring_names_rejects_malformed_input(data: bytes):
+    with pytest.raises(ValueError):
+        decode_ring_names(data)
+
+
+async def test_server_creates_and_unlinks_rings(tmp_path):
+    path = str(tmp_path / "shm.sock")
+    accepted: asyncio.Future[AsyncShmRawSocketTransport] = asyncio.get_running_loop().create_future()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        accepted.set_result(await AsyncShmRawSocketTransport.accept(reader, writer))
+
+    server = await asyncio.start_unix_server(handle, path)
+    client = await AsyncShmRawSocketTransport.connect(f"shm+rs://{path}", config=TransportConfig(shm_ring_size=1))
+    transport = await accepted
+
+    # the requested size is raised to the minimum and the names are gone once both sides mapped the rings
+    assert client._inbound.capacity == transport._outbound.capacity == MIN_RING_SIZE
+    for ring in (client._inbound, client._outbound):
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=ring.name)
+
+    await client.write(b"hello")
+    assert await transport.read() == b"hello"
+
+    await client.close()
+    await transport.close()
+    server.close()
+    with pytest.raises(ConnectionError):
+        await transport.read()
+
+
+async def start_echo_transport_server(path: str) -> asyncio.Future[AsyncShmRawSocketTransport]:
+    accepted: asyncio.Future[AsyncShmRawSocketTransport] = asyncio.get_running_loop().create_future()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        accepted.set_result(await AsyncShmRawSocketTransport.accept(reader, writer))
+
+    await asyncio.start_unix_server(handle, path)
+    return accepted
+
+
+async def test_full_ring_rings_the_doorbell_once(tmp_path):
+    path = str(tmp_path / "shm.sock")
+    accepted = await start_echo_transport_server(path)
+    client = await AsyncShmRawSocketTransport.connect(f"shm+rs://{path}", config=TransportConfig(shm_ring_size=1))
+    transport = await accepted
+
+    # the peer doesn't read, the writer keeps waiting for space without ringing again
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.write(b"\x01" * MIN_RING_SIZE * 2), 0.1)
+
+    assert await transport._doorbell_reader.read(4096) == DOORBELL
+
+    await client.close()
+    await transport.close()
+
+
+async def test_sync_close_unmaps_rings(tmp_path):
+    path = str(tmp_path / "shm.sock")
+    accepted = await start_echo_transport_server(path)
+    client = await asyncio.to_thread(ShmRawSocketTransport.connect, f"shm+rs://{path}")
+    transport = await accepted
+
+    client.close()
+    assert client._inbound._shm.buf is None
+    assert client._outbound._shm.buf is None
+    with pytest.raises(ConnectionError):
+        client.read()
+
+    await transport.close()
+
+
+async def echo(invocation: Invocation) -> Result:
+    return Result(invocation.args)
+
+
+async def test_shm_rawsocket_session(tmp_path):
+    router = Router()
+    router.add_realm("realm1")
+    path = str(tmp_path / "shm.sock")
+    await Server(router).start_shm_server(path)
+
+    # rings much smaller than the payloads
+    config = TransportConfig(shm_ring_size=4096)
+    callee = await AsyncClient(serializer=CBORSerializer(), ws_config=config).connect(f"shm+rs://{path}", "realm1")
+    await callee.register("io.xconn.echo", echo)
+
+    payload = b"\x01" * 100_000
+
+    def call():
+        session = Client(serializer=CBORSerializer(), config=config).connect(f"shm+rs://{path}", "realm1")
+        try:
+            return session.call("io.xconn.echo", [payload]).args
+        finally:
+            session.leave()
+
+    assert await asyncio.to_thread(call) == [payload]
+
+    await callee.leave()
+    with pytest.raises(ConnectionError):
+        await callee.call("io.xconn.echo")
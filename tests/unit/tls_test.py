@@ -0,0 +1,81 @@
+import asyncio
+import os
+import ssl
+import threading
+
+import pytest
+from wampproto.transports.rawsocket import SERIALIZER_TYPE_CBOR
+
+from xconn.transports import (
+    RawSocketTransport,
+    AsyncRawSocketTransport,
+    AsyncBufferedRawSocketTransport,
+    create_client_ssl_context,
+)
+from xconn.types import TransportConfig
+
+CERTS = os.path.join(os.path.dirname(__file__), "certs")
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    writer.write(await reader.readexactly(4))
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+def server_ssl_context() -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(os.path.join(CERTS, "localhost.crt"), os.path.join(CERTS, "localhost.key"))
+    return context
+
+
+def client_config() -> TransportConfig:
+    context = create_client_ssl_context(cafile=os.path.join(CERTS, "localhost.crt"))
+    return TransportConfig(ssl_context=context, ping_interval=None)
+
+
+def test_rawsocket_tls_session_resumption():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0, ssl=server_ssl_context()))
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    config = client_config()
+    reused = []
+    for _ in range(2):
+        transport = RawSocketTransport.connect(f"rss://localhost:{port}", SERIALIZER_TYPE_CBOR, config=config)
+        reused.append(transport._sock.session_reused)
+        transport.write(b"hello")
+        transport.close()
+
+    assert reused == [False, True]
+
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+@pytest.mark.parametrize("transport_class", [AsyncRawSocketTransport, AsyncBufferedRawSocketTransport])
+async def test_async_rawsocket_tls_session_resumption(transport_class):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=server_ssl_context())
+    port = server.sockets[0].getsockname()[1]
+
+    config = client_config()
+    reused = []
+    for _ in range(2):
+        transport = await transport_class.connect(f"tcps://localhost:{port}", SERIALIZER_TYPE_CBOR, config=config)
+        await transport.write(b"hello")
+        if isinstance(transport, AsyncRawSocketTransport):
+            ssl_object = transport._writer.get_extra_info("ssl_object")
+        else:
+            ssl_object = transport._protocol.transport.get_extra_info("ssl_object")
+
+        reused.append(ssl_object.session_reused)
+        await transport.close()
+
+    assert reused == [False, True]
+
+    server.close()
+    await server.wait_closed()
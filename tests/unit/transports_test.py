@@ -0,0 +1,306 @@
+import asyncio
+import math
+import socket
+import threading
+
+import pytest
+from aiohttp import web
+from websockets.sync.server import ServerConnection, serve, unix_serve
+
+from wampproto.transports.rawsocket import (
+    MessageHeader,
+    MSG_TYPE_WAMP,
+    MSG_TYPE_PING,
+    MSG_TYPE_PONG,
+    SERIALIZER_TYPE_CBOR,
+    SERIALIZER_TYPE_JSON,
+)
+
+from xconn.transports import (
+    RawSocketTransport,
+    FrameReader,
+    AsyncRawSocketTransport,
+    AsyncBufferedRawSocketTransport,
+    WebSocketTransport,
+    AIOHttpWebSocketTransport,
+)
+from xconn.types import TransportConfig, RTTStats
+
+
+def frame(kind: int, payload: bytes) -> bytes:
+    return MessageHeader(kind, len(payload)).to_bytes() + payload
+
+
+def test_frame_reader_batches_frames():
+    client, server = socket.socketpair()
+    reader = FrameReader(client, buffer_size=64)
+
+    payloads = [b"a" * n for n in (0, 1, 10, 40)]
+    server.sendall(b"".join(frame(MSG_TYPE_WAMP, payload) for payload in payloads))
+
+    for payload in payloads:
+        kind, data = reader.next_frame()
+        assert kind == MSG_TYPE_WAMP
+        assert bytes(data) == payload
+
+    client.close()
+    server.close()
+
+
+def test_frame_reader_grows_for_large_frames():
+    client, server = socket.socketpair()
+    reader = FrameReader(client, buffer_size=16)
+
+    large = bytes(range(256)) * 64
+    server.sendall(frame(MSG_TYPE_WAMP, b"small") + frame(MSG_TYPE_WAMP, large) + frame(MSG_TYPE_WAMP, b"next"))
+
+    assert bytes(reader.next_frame()[1]) == b"small"
+    assert bytes(reader.next_frame()[1]) == large
+    assert bytes(reader.next_frame()[1]) == b"next"
+
+    client.close()
+    server.close()
+
+
+def test_rawsocket_read_answers_ping():
+    client, server = socket.socketpair()
+    transport = RawSocketTransport(client, SERIALIZER_TYPE_CBOR)
+
+    server.sendall(frame(MSG_TYPE_PING, b"ping-payload") + frame(MSG_TYPE_WAMP, b"\x80"))
+    assert bytes(transport.read()) == b"\x80"
+
+    header = MessageHeader.from_bytes(server.recv(4))
+    assert header.kind == MSG_TYPE_PONG
+    assert server.recv(header.length) == b"ping-payload"
+
+    transport.close()
+    server.close()
+
+
+def test_rawsocket_read_json_returns_text():
+    client, server = socket.socketpair()
+    transport = RawSocketTransport(client, SERIALIZER_TYPE_JSON)
+
+    server.sendall(frame(MSG_TYPE_WAMP, b"[1]"))
+    assert transport.read() == "[1]"
+
+    transport.close()
+    server.close()
+
+
+async def test_buffered_protocol_transport():
+    received = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(await reader.readexactly(4))
+        writer.write(frame(MSG_TYPE_PING, b"ping") + b"".join(frame(MSG_TYPE_WAMP, b"%d" % i) for i in range(3)))
+        await writer.drain()
+
+        for _ in range(2):
+            header = MessageHeader.from_bytes(await reader.readexactly(4))
+            received.append((header.kind, await reader.readexactly(header.length)))
+
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    transport = await AsyncBufferedRawSocketTransport.connect(f"rs://127.0.0.1:{port}", SERIALIZER_TYPE_JSON)
+    assert await transport.read() == "0"
+    assert await transport.read_batch() == ["1", "2"]
+
+    await transport.write("hello")
+    with pytest.raises(ConnectionError):
+        await transport.read()
+
+    assert received == [(MSG_TYPE_PONG, b"ping"), (MSG_TYPE_WAMP, b"hello")]
+    assert not await transport.is_connected()
+
+    server.close()
+    await server.wait_closed()
+
+
+def test_rawsocket_write_many():
+    client, server = socket.socketpair()
+    transport = RawSocketTransport(client, SERIALIZER_TYPE_CBOR)
+    reader = FrameReader(server)
+
+    payloads = [b"first", b"", "text", b"x" * 100_000]
+    transport.write_many(payloads)
+    transport.write(b"last")
+
+    for expected in payloads + [b"last"]:
+        kind, data = reader.next_frame()
+        assert kind == MSG_TYPE_WAMP
+        assert bytes(data) == (expected.encode() if isinstance(expected, str) else expected)
+
+    transport.close()
+    server.close()
+
+
+@pytest.mark.parametrize("transport_class", [AsyncRawSocketTransport, AsyncBufferedRawSocketTransport])
+async def test_coalesced_writes(transport_class):
+    received = []
+    done = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(await reader.readexactly(4))
+        for _ in range(1000):
+            header = MessageHeader.from_bytes(await reader.readexactly(4))
+            received.append(await reader.readexactly(header.length))
+
+        writer.close()
+        done.set()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    config = TransportConfig(coalesce_writes=True, write_buffer_high=1024)
+    transport = await transport_class.connect(f"rs://127.0.0.1:{port}", SERIALIZER_TYPE_CBOR, config=config)
+    for i in range(1000):
+        await transport.write(b"%d" % i)
+
+    await asyncio.wait_for(done.wait(), 5)
+    assert received == [b"%d" % i for i in range(1000)]
+
+    await transport.close()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.parametrize("interval,timeout", [(0.05, 0.2), (0.1, None)])
+def test_rawsocket_keepalive(interval: float, timeout: float | None):
+    client, server = socket.socketpair()
+    transport = RawSocketTransport(client, SERIALIZER_TYPE_CBOR)
+    transport._start_keepalive(interval, timeout)
+
+    # answer the first ping, then go silent
+    header = MessageHeader.from_bytes(server.recv(4))
+    assert header.kind == MSG_TYPE_PING
+    server.sendall(frame(MSG_TYPE_PONG, server.recv(header.length)))
+    with pytest.raises(ConnectionError):
+        transport.read()
+
+    assert transport.rtt_stats.count == 1
+    assert transport.rtt_stats.timeouts == 1
+    assert not transport.is_connected()
+    assert transport._pending_pings == {}
+
+    server.close()
+
+
+@pytest.mark.parametrize("timeout", [0.1, None])
+async def test_async_rawsocket_keepalive_closes_dead_connection(timeout: float | None):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(await reader.readexactly(4))
+        await reader.read()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    config = TransportConfig(ping_interval=0.05, ping_timeout=timeout)
+    transport = await AsyncRawSocketTransport.connect(f"rs://127.0.0.1:{port}", SERIALIZER_TYPE_CBOR, config=config)
+    with pytest.raises(asyncio.IncompleteReadError):
+        await asyncio.wait_for(transport.read(), 2)
+
+    assert transport.rtt_stats.timeouts == 1
+    assert not await transport.is_connected()
+
+    server.close()
+    await server.wait_closed()
+
+
+def test_rtt_stats():
+    stats = RTTStats(window=4)
+    for rtt in (0.5, 3, 40, 7000, 30):
+        stats.add(rtt)
+
+    assert stats.count == 4
+    assert stats.min == 3
+    assert stats.max == 7000
+    assert stats.percentile(50) == 30
+    histogram = stats.histogram()
+    assert histogram[5] == 1
+    assert histogram[50] == 2
+    assert histogram[math.inf] == 1
+
+
+@pytest.mark.parametrize("scheme", ["ws", "unix+ws"])
+def test_websocket_transport(scheme, tmp_path):
+    def handler(connection: ServerConnection):
+        connection.send(["frag", "mented"])
+        connection.send(b"\x80")
+        for message in connection:
+            connection.send(message)
+
+    if scheme == "ws":
+        server = serve(handler, "127.0.0.1", 0, subprotocols=["wamp.2.json"])
+        uri = f"ws://127.0.0.1:{server.socket.getsockname()[1]}/ws"
+    else:
+        path = str(tmp_path / "ws.sock")
+        server = unix_serve(handler, path, subprotocols=["wamp.2.json"])
+        uri = f"unix+ws://{path}"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    transport = WebSocketTransport.connect(uri, ["wamp.2.json"], TransportConfig(ping_interval=None))
+    assert transport.read() == "fragmented"
+    assert transport.read() == b"\x80"
+
+    transport.write_many(["one", b"two"])
+    assert transport.read() == "one"
+    assert transport.read() == b"two"
+
+    def read_until_closed():
+        with pytest.raises(ConnectionError):
+            transport.read()
+
+    reader = threading.Thread(target=read_until_closed)
+    reader.start()
+    assert transport.ping(timeout=5) >= 0
+    assert transport.rtt_stats.count == 1
+
+    transport.close()
+    reader.join(5)
+    assert not reader.is_alive()
+    assert not transport.is_connected()
+
+    server.shutdown()
+
+
+async def test_aiohttp_websocket_transport():
+    async def handler(request):
+        ws = web.WebSocketResponse(protocols=["wamp.2.json"])
+        await ws.prepare(request)
+        await ws.ping(b"from-server")
+        async for msg in ws:
+            await (ws.send_str(msg.data) if msg.type == web.WSMsgType.TEXT else ws.send_bytes(msg.data))
+
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    transport = await AIOHttpWebSocketTransport.connect(
+        f"ws://127.0.0.1:{port}/ws", ["wamp.2.json"], TransportConfig(ping_interval=None)
+    )
+    await transport.write("text")
+    await transport.write(b"\x80")
+    assert await transport.read() == "text"
+    assert await transport.read() == b"\x80"
+
+    read = asyncio.create_task(transport.read())
+    assert await transport.ping(timeout=5) >= 0
+    assert transport.rtt_stats.count == 1
+
+    await transport.close()
+    with pytest.raises(ConnectionError):
+        await read
+
+    assert not await transport.is_connected()
+    await runner.cleanup()
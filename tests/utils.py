@@ -1,6 +1,33 @@
+import socket
+
+from xconn import Router, Server
+
 XCONN_URL = "ws://localhost:8080/ws"
 CROSSBAR_URL = "ws://localhost:8081/ws"
 NEXUS_URL = "ws://localhost:8082/ws"
 XCONN_RAWSOCKET_URL = "unix:///tmp/nxt.sock"
 ROUTER_URL = [XCONN_URL, CROSSBAR_URL, NEXUS_URL, XCONN_RAWSOCKET_URL]
 REALM = "realm1"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def realm_router() -> Router:
+    router = Router()
+    router.add_realm(REALM)
+    return router
+
+
+async def start_server(server: Server | None = None) -> str:
+    """Start server, by default one for a router with REALM, on a free port and return its websocket URI."""
+    if server is None:
+        server = Server(realm_router())
+
+    port = free_port()
+    await server.start("127.0.0.1", port)
+
+    return f"ws://127.0.0.1:{port}/ws"
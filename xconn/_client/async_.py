@@ -43,8 +43,11 @@ async def _setup(app: App, session: AsyncSession):
 
 
 async def _connect_async(app: App, config: ClientConfig, start_router: bool = False):
+    url = config.url
     if start_router:
         await start_server_async(config)
+        # the app's own session runs next to the router, it skips the network and the serializer
+        url = f"inproc://{config.realm}"
 
     auth = select_authenticator(config)
     client = AsyncClient(authenticator=auth, ws_config=config.websocket_config)
@@ -55,7 +58,7 @@ async def _connect_async(app: App, config: ClientConfig, start_router: bool = Fa
         await asyncio.sleep(next_wait)
 
         try:
-            new_session = await client.connect(config.url, config.realm, on_connect, on_disconnect)
+            new_session = await client.connect(url, config.realm, on_connect, on_disconnect)
         except Exception as e:
             print(e)
 
@@ -71,7 +74,7 @@ async def _connect_async(app: App, config: ClientConfig, start_router: bool = Fa
         print("disconnected", config.realm)
         await wait_and_connect()
 
-    session = await client.connect(config.url, config.realm, on_connect, on_disconnect)
+    session = await client.connect(url, config.realm, on_connect, on_disconnect)
     await _setup(app, session)
 
     if app.schema_procedure is not None and app.schema_procedure != "":
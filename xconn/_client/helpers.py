@@ -34,7 +34,7 @@ from wampproto.auth import (
     IClientAuthenticator,
 )
 
-from xconn import Router, Server
+from xconn import Router, Server, inproc
 from xconn.app import App, ExecutionMode
 from xconn._client.types import ClientConfig, CommandArgs
 from xconn.exception import ApplicationError
@@ -465,12 +465,15 @@ def select_authenticator(config: ClientConfig) -> IClientAuthenticator:
     return auth
 
 
-async def start_server_async(config: ClientConfig):
+async def start_server_async(config: ClientConfig) -> Router:
     r = Router()
     r.add_realm(config.realm)
+    # sessions of this process can join as inproc://<realm>
+    inproc.serve(r, config.realm)
     server = Server(r)
     url_parsed = urlparse(config.url)
     await server.start(url_parsed.hostname, url_parsed.port)
+    return r
 
 
 def start_server_sync(config: ClientConfig):
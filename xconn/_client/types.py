@@ -1,6 +1,6 @@
 import enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from xconn.types import WebsocketConfig
 
@@ -12,6 +12,9 @@ class ConfigSource(str, enum.Enum):
 
 
 class ClientConfig(BaseModel):
+    # TransportConfig may carry an ssl.SSLContext
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     url: str
     realm: str
     websocket_config: WebsocketConfig = WebsocketConfig()
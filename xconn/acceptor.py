@@ -44,10 +44,40 @@ class WebsocketsAcceptor:
                 return types.BaseSession(ws, a.get_session_details(), serializer)
 
 
-class AIOHttpAcceptor:
+class AsyncRawSocketAcceptor:
+    """Performs the WAMP handshake on an already connected rawsocket style transport."""
+
     def __init__(self, authenticator: auth.IServerAuthenticator = None) -> None:
         self.authenticator = authenticator
 
+    async def accept(
+        self, transport: types.IAsyncTransport, serializer: serializers.Serializer
+    ) -> types.AsyncBaseSession:
+        a = acceptor.Acceptor(serializer=serializer, authenticator=self.authenticator)
+
+        while True:
+            data = await transport.read()
+            to_send, is_final = a.receive(data)
+            await transport.write(to_send)
+            if is_final:
+                if a.is_aborted():
+                    abort: messages.Abort = serializer.deserialize(to_send)
+                    raise Exception(abort.reason)
+
+                return types.AsyncBaseSession(transport, a.get_session_details(), serializer)
+
+
+class AIOHttpAcceptor:
+    def __init__(
+        self,
+        authenticator: auth.IServerAuthenticator = None,
+        compression: types.DeflateConfig | None = None,
+        compression_stats: types.CompressionStats | None = None,
+    ) -> None:
+        self.authenticator = authenticator
+        self.compression = compression
+        self.compression_stats = compression_stats
+
     async def accept(self, ws: web.WebSocketResponse) -> types.AIOHttpBaseSession:
         serializer = helpers.get_serializer(ws.ws_protocol)
         a = acceptor.Acceptor(serializer=serializer, authenticator=self.authenticator)
@@ -68,4 +98,6 @@ class AIOHttpAcceptor:
                     abort: messages.Abort = serializer.deserialize(to_send)
                     raise Exception(abort.reason)
 
-                return types.AIOHttpBaseSession(ws, a.get_session_details(), serializer)
+                return types.AIOHttpBaseSession(
+                    ws, a.get_session_details(), serializer, self.compression, self.compression_stats
+                )
@@ -1,10 +1,15 @@
+import asyncio
+import dataclasses
 from typing import Callable, Awaitable
 from urllib.parse import urlparse
 
 from wampproto import auth, serializers
 
 from xconn import types
+from xconn.inproc import AsyncInprocJoiner
 from xconn.async_session import AsyncSession
+from xconn.pool import AsyncSessionPool
+from xconn.resilient import AsyncResilientSession
 from xconn.joiner import AsyncWebsocketsJoiner, AsyncRawSocketJoiner
 
 
@@ -14,7 +19,11 @@ class AsyncClient:
         authenticator: auth.IClientAuthenticator = auth.AnonymousAuthenticator(""),
         serializer: serializers.Serializer = serializers.JSONSerializer(),
         ws_config: types.WebsocketConfig = types.WebsocketConfig(),
+        websocket_backend: types.WebsocketBackend | None = None,
     ):
+        if websocket_backend is not None:
+            ws_config = dataclasses.replace(ws_config, websocket_backend=websocket_backend)
+
         self._authenticator = authenticator
         self._serializer = serializer
         self._ws_config = ws_config
@@ -26,10 +35,43 @@ class AsyncClient:
         connect_callback: Callable[[], Awaitable[None]] | None = None,
         disconnect_callback: Callable[[], Awaitable[None]] | None = None,
     ) -> AsyncSession:
+        """
+        Join realm on the router at uri. inproc://name URIs reach a router served in this process
+        with xconn.inproc.serve(), messages are passed without serializing them, so args and kwargs
+        are shared with the peers instead of copied, see serve().
+        """
         return await connect(
             uri, realm, self._authenticator, self._serializer, self._ws_config, connect_callback, disconnect_callback
         )
 
+    async def connect_resilient(
+        self, uri: str, realm: str, config: types.ReconnectConfig = types.ReconnectConfig()
+    ) -> AsyncResilientSession:
+        """Connect with a session that reconnects by itself and restores its registrations and subscriptions."""
+        return await AsyncResilientSession.create(
+            lambda disconnect_callback: self.connect(uri, realm, disconnect_callback=disconnect_callback), config
+        )
+
+    async def connect_pool(
+        self,
+        uri: str,
+        realm: str,
+        size: int = 4,
+        strategy: types.PoolStrategy = types.PoolStrategy.ROUND_ROBIN,
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ) -> AsyncSessionPool:
+        """Open size resilient sessions to realm and spread calls and publishes across them."""
+        results = await asyncio.gather(
+            *(self.connect_resilient(uri, realm, config) for _ in range(size)), return_exceptions=True
+        )
+        members = [result for result in results if isinstance(result, AsyncResilientSession)]
+        if len(members) != size:
+            for member in members:
+                await member.leave()
+            raise next(result for result in results if isinstance(result, BaseException))
+
+        return AsyncSessionPool(members, strategy)
+
 
 async def connect(
     uri: str,
@@ -41,7 +83,7 @@ async def connect(
     disconnect_callback: Callable[[], Awaitable[None]] | None = None,
 ) -> AsyncSession:
     parsed = urlparse(uri)
-    if parsed.scheme == "ws" or parsed.scheme == "wss":
+    if parsed.scheme == "ws" or parsed.scheme == "wss" or parsed.scheme == "unix+ws":
         j = AsyncWebsocketsJoiner(authenticator, serializer, ws_config)
     elif (
         parsed.scheme == "rs"
@@ -50,8 +92,12 @@ async def connect(
         or parsed.scheme == "tcps"
         or parsed.scheme == "unix"
         or parsed.scheme == "unix+rs"
+        or parsed.scheme == "shm+rs"
     ):
-        j = AsyncRawSocketJoiner(authenticator, serializer)
+        j = AsyncRawSocketJoiner(authenticator, serializer, ws_config)
+    elif parsed.scheme == "inproc":
+        # messages are handed to the router as they are, the serializer doesn't apply
+        j = AsyncInprocJoiner(authenticator)
     else:
         raise RuntimeError(f"Unsupported scheme {parsed.scheme}")
 
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import inspect
 from dataclasses import dataclass
 from asyncio import Future, get_event_loop
-from typing import Callable, Union, Awaitable, Any
+from typing import Callable, Union, Awaitable, Any, AsyncGenerator, AsyncIterator
 
-from wampproto import messages, idgen, session
+from wampproto import messages, idgen
 
 from xconn import types, uris as xconn_uris, exception
-from xconn.exception import ApplicationError
-from xconn.helpers import exception_from_error
+from xconn.dispatch import AsyncInlineDispatcher, IAsyncDispatcher
+from xconn.exception import ApplicationError, DispatchRejected, StreamOverflow
+from xconn.helpers import exception_from_error, progressive_yield, WAMPSession
 
 
 @dataclass
@@ -32,6 +34,7 @@ class Registration:
 class SubscribeRequest:
     future: Future[Subscription]
     endpoint: Callable[[types.Event], Awaitable[None]]
+    dispatcher: IAsyncDispatcher | None = None
 
 
 class Subscription:
@@ -43,6 +46,120 @@ class Subscription:
         return await self._session._unsubscribe(self)
 
 
+class EventStream:
+    """
+    Events of a topic, held in a queue of at most maxsize until iterated. When it's full, overflow
+    decides: DROP_OLDEST and DROP_NEWEST discard an event and count it in dropped, BLOCK stops the
+    session from reading (holding up its other messages too) until there is room again.
+
+    The topic is subscribed with the first iteration, or right away with `async with`, which also
+    unsubscribes at the end. Otherwise call close() when done.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        topic: str,
+        maxsize: int,
+        overflow: types.OverflowPolicy,
+        options: dict | None = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        if overflow not in (
+            types.OverflowPolicy.BLOCK,
+            types.OverflowPolicy.DROP_OLDEST,
+            types.OverflowPolicy.DROP_NEWEST,
+        ):
+            raise ValueError(f"unsupported overflow policy for event streams: {overflow}, drop or block events instead")
+
+        self._session = session
+        self._topic = topic
+        self._options = options
+        self._overflow = overflow
+        # events, and None once finished
+        self._queue: asyncio.Queue[types.Event | None] = asyncio.Queue(maxsize)
+        self._subscription: Subscription | None = None
+        self._finished = False
+        self._error: Exception | None = None
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def subscribe(self) -> None:
+        if self._subscription is None and not self._finished:
+            self._subscription = await self._session.subscribe(
+                self._topic, self._put, self._options, dispatcher=AsyncInlineDispatcher()
+            )
+            self._session._event_streams.add(self)
+
+    async def _put(self, event: types.Event):
+        if self._finished:
+            return
+
+        if self._overflow == types.OverflowPolicy.BLOCK:
+            await self._queue.put(event)
+        elif not self._queue.full():
+            self._queue.put_nowait(event)
+        elif self._overflow == types.OverflowPolicy.DROP_OLDEST:
+            self._queue.get_nowait()
+            self._queue.put_nowait(event)
+            self.dropped += 1
+        else:
+            self.dropped += 1
+
+    def _finish(self, error: Exception | None = None):
+        if self._finished:
+            return
+
+        self._finished = True
+        self._error = error
+        self._session._event_streams.discard(self)
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # __anext__ notices once the queue ran empty
+            pass
+
+    async def close(self) -> None:
+        subscription, self._subscription = self._subscription, None
+        # nobody takes them anymore, a reader blocked on the full queue must get going again
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+        self._finish()
+        if subscription is not None and not self._session._closed:
+            await subscription.unsubscribe()
+
+    def __aiter__(self) -> EventStream:
+        return self
+
+    async def __anext__(self) -> types.Event:
+        await self.subscribe()
+        if self._finished and self._queue.empty():
+            item = None
+        else:
+            item = await self._queue.get()
+
+        if item is None:
+            if self._error is not None:
+                raise self._error
+
+            raise StopAsyncIteration
+
+        return item
+
+    async def __aenter__(self) -> EventStream:
+        await self.subscribe()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
 class AsyncSession:
     def __init__(self, base_session: types.IAsyncBaseSession):
         # RPC data structures
@@ -53,12 +170,19 @@ class AsyncSession:
             Union[Callable[[types.Invocation], types.Result], Callable[[types.Invocation], Awaitable[types.Result]]],
         ] = {}
         self._unregister_requests: dict[int, types.UnregisterRequest] = {}
+        # progressive results of call_stream(), ending with None or an exception, and their maxsize
+        self._stream_requests: dict[int, tuple[asyncio.Queue[types.Result | Exception | None], int]] = {}
+        # running invocation handlers by request id, so INTERRUPT can cancel them
+        self._invocation_tasks: dict[int, tuple[asyncio.Task[None], types.Invocation]] = {}
 
         # PubSub data structures
         self._publish_requests: dict[int, Future[None]] = {}
         self._subscribe_requests: dict[int, SubscribeRequest] = {}
-        self._subscriptions: dict[int, Callable[[types.Event], Awaitable[None]]] = {}
+        # event handlers by subscription id, without a dispatcher every event gets its own task
+        self._subscriptions: dict[int, tuple[Callable[[types.Event], Awaitable[None]], IAsyncDispatcher | None]] = {}
         self._unsubscribe_requests: dict[int, types.UnsubscribeRequest] = {}
+        # open events() iterators, ended when the connection goes away
+        self._event_streams: set[EventStream] = set()
 
         self._goodbye_request = Future()
 
@@ -68,9 +192,11 @@ class AsyncSession:
         self._base_session = base_session
 
         # initialize the sans-io wamp session
-        self._session = session.WAMPSession(base_session.serializer)
+        self._session = WAMPSession(base_session.serializer)
 
         self._disconnect_callback: list[Callable[[], Awaitable[None]] | None] = []
+        # set once the connection is gone, before pending requests are failed
+        self._closed = False
 
         self._tasks: set[asyncio.Task[None]] = set()
         self._loop = get_event_loop()
@@ -79,12 +205,26 @@ class AsyncSession:
     async def _handle_invocation(
         self,
         msg: messages.Invocation,
+        invocation: types.Invocation,
         endpoint: Union[
             Callable[[types.Invocation], types.Result], Callable[[types.Invocation], Awaitable[types.Result]]
         ],
     ):
         try:
-            result = await endpoint(types.Invocation(msg.args, msg.kwargs, msg.details))
+            try:
+                handler = endpoint(invocation)
+                if inspect.isasyncgen(handler):
+                    result = await self._yield_progress(msg, handler)
+                else:
+                    result = await handler
+            except asyncio.CancelledError:
+                if not invocation.interrupted.is_set():
+                    raise
+
+                raise ApplicationError(xconn_uris.ERROR_CANCELED)
+            finally:
+                # an INTERRUPT from here on must not cancel sending the answer
+                self._invocation_tasks.pop(msg.request_id, None)
 
             if result is None:
                 data = self._session.send_message(messages.Yield(messages.YieldFields(msg.request_id)))
@@ -113,26 +253,105 @@ class AsyncSession:
             data = self._session.send_message(msg_to_send)
             await self._base_session.send(data)
 
-    async def _handle_event(self, msg: messages.Event, endpoint: Callable[[types.Event], Awaitable[None]]):
+    async def _yield_progress(
+        self, msg: messages.Invocation, results: AsyncGenerator[types.Result | None]
+    ) -> types.Result | None:
+        """
+        Send all but the last result of a streaming handler as progressive YIELDs, the last one is
+        returned as the final result. Callers that didn't ask for progress only get that one.
+        """
+        progress = msg.details.get("receive_progress", False)
+        previous: types.Result | None = None
+        started = False
+        async for result in results:
+            if not (result is None or isinstance(result, types.Result)):
+                await results.aclose()
+                raise TypeError(f"streaming handler must yield types.Result or None, got: {type(result)}")
+
+            if started and progress:
+                await self._base_session.send(self._session.send_message(progressive_yield(msg.request_id, previous)))
+
+            previous = result
+            started = True
+
+        return previous
+
+    def _interrupt(self, msg: messages.Interrupt):
+        running = self._invocation_tasks.get(msg.request_id)
+        if running is None:
+            return
+
+        task, invocation = running
+        invocation.interrupted.set()
+        task.cancel()
+
+    def _invocation_done(self, msg: messages.Invocation, task: asyncio.Task[None]):
+        self._tasks.discard(task)
+        # a task cancelled before it started never got to answer the invocation
+        if task.cancelled() and self._invocation_tasks.pop(msg.request_id, None) is not None:
+            error = messages.Error(messages.ErrorFields(msg.TYPE, msg.request_id, xconn_uris.ERROR_CANCELED))
+            send = self._loop.create_task(self._base_session.send(self._session.send_message(error)))
+            self._tasks.add(send)
+            send.add_done_callback(self._tasks.discard)
+
+    async def _handle_event(self, event: types.Event, endpoint: Callable[[types.Event], Awaitable[None]]):
         try:
-            await endpoint(types.Event(msg.args, msg.kwargs, msg.details))
+            await endpoint(event)
         except Exception as e:
             print(e)
 
     async def _wait(self):
         while await self._base_session.transport.is_connected():
             try:
-                data = await self._base_session.receive()
+                batch = await self._base_session.receive_batch()
             except Exception as e:
                 print(e)
                 break
 
-            await self._process_incoming_message(self._session.receive(data))
+            for data in batch:
+                await self._process_incoming_message(self._session.receive(data))
+
+        self._closed = True
+        self._fail_pending_requests()
 
         if self._disconnect_callback:
             callbacks = [callback() for callback in self._disconnect_callback]
             await asyncio.gather(*callbacks)
 
+    def _fail_pending_requests(self):
+        """Nothing answers requests of a closed session anymore, fail them instead of waiting forever."""
+        for f in self._call_requests.values():
+            if not f.done():
+                f.set_exception(ConnectionError("connection closed before the call returned"))
+        self._call_requests.clear()
+
+        for queue, _ in self._stream_requests.values():
+            # the consumer gets the error after what's buffered
+            queue.put_nowait(ConnectionError("connection closed before the stream ended"))
+        self._stream_requests.clear()
+
+        for requests in (
+            self._register_requests,
+            self._unregister_requests,
+            self._subscribe_requests,
+            self._unsubscribe_requests,
+        ):
+            for request in requests.values():
+                if not request.future.done():
+                    request.future.set_exception(ConnectionError("connection closed"))
+            requests.clear()
+
+        for f in self._publish_requests.values():
+            if not f.done():
+                f.set_exception(ConnectionError("connection closed before the publication was acknowledged"))
+        self._publish_requests.clear()
+
+        for stream in list(self._event_streams):
+            stream._finish(ConnectionError("connection closed"))
+
+        if not self._goodbye_request.done():
+            self._goodbye_request.set_result(None)
+
     async def _process_incoming_message(self, msg: messages.Message):
         if isinstance(msg, messages.Registered):
             request = self._register_requests.pop(msg.request_id)
@@ -142,17 +361,38 @@ class AsyncSession:
             request = self._unregister_requests.pop(msg.request_id)
             del self._registrations[request.registration_id]
             request.future.set_result(None)
+        elif isinstance(msg, messages.Result) and msg.request_id in self._stream_requests:
+            result = types.Result(msg.args, msg.kwargs, msg.details)
+            if msg.details.get("progress", False):
+                queue, maxsize = self._stream_requests[msg.request_id]
+                if queue.qsize() < maxsize:
+                    queue.put_nowait(result)
+                else:
+                    await self._overflow_stream(msg.request_id)
+            else:
+                queue, _ = self._stream_requests.pop(msg.request_id)
+                # the final result of a streaming callee is empty
+                if msg.args or msg.kwargs:
+                    queue.put_nowait(result)
+
+                queue.put_nowait(None)
         elif isinstance(msg, messages.Result):
-            request = self._call_requests.pop(msg.request_id)
-            request.set_result(types.Result(msg.args, msg.kwargs, msg.details))
+            # gone or done if the call was cancelled
+            request = self._call_requests.pop(msg.request_id, None)
+            if request is not None and not request.done():
+                request.set_result(types.Result(msg.args, msg.kwargs, msg.details))
         elif isinstance(msg, messages.Invocation):
             endpoint = self._registrations[msg.registration_id]
-            task = self._loop.create_task(self._handle_invocation(msg, endpoint))
+            invocation = types.Invocation(msg.args, msg.kwargs, msg.details)
+            task = self._loop.create_task(self._handle_invocation(msg, invocation, endpoint))
             self._tasks.add(task)
-            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(functools.partial(self._invocation_done, msg))
+            self._invocation_tasks[msg.request_id] = (task, invocation)
+        elif isinstance(msg, messages.Interrupt):
+            self._interrupt(msg)
         elif isinstance(msg, messages.Subscribed):
             request = self._subscribe_requests.pop(msg.request_id)
-            self._subscriptions[msg.subscription_id] = request.endpoint
+            self._subscriptions[msg.subscription_id] = (request.endpoint, request.dispatcher)
             request.future.set_result(Subscription(msg.subscription_id, self))
         elif isinstance(msg, messages.Unsubscribed):
             request = self._unsubscribe_requests.pop(msg.request_id)
@@ -162,15 +402,26 @@ class AsyncSession:
             request = self._publish_requests.pop(msg.request_id)
             request.set_result(None)
         elif isinstance(msg, messages.Event):
-            endpoint = self._subscriptions[msg.subscription_id]
-            task = self._loop.create_task(self._handle_event(msg, endpoint))
-            self._tasks.add(task)
-            task.add_done_callback(self._tasks.discard)
+            endpoint, dispatcher = self._subscriptions[msg.subscription_id]
+            event = types.Event(msg.args, msg.kwargs, msg.details)
+            if dispatcher is None:
+                task = self._loop.create_task(self._handle_event(event, endpoint))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                try:
+                    await dispatcher.submit(event, functools.partial(self._handle_event, event, endpoint))
+                except DispatchRejected:
+                    # events are fire and forget, there's no one to tell
+                    pass
         elif isinstance(msg, messages.Error):
             match msg.message_type:
+                case messages.Call.TYPE if msg.request_id in self._stream_requests:
+                    self._stream_requests.pop(msg.request_id)[0].put_nowait(exception_from_error(msg))
                 case messages.Call.TYPE:
-                    call_request = self._call_requests.pop(msg.request_id)
-                    call_request.set_exception(exception_from_error(msg))
+                    call_request = self._call_requests.pop(msg.request_id, None)
+                    if call_request is not None and not call_request.done():
+                        call_request.set_exception(exception_from_error(msg))
                 case messages.Register.TYPE:
                     register_request = self._register_requests.pop(msg.request_id)
                     register_request.future.set_exception(exception_from_error(msg))
@@ -199,9 +450,10 @@ class AsyncSession:
         invocation_handler: Callable[[types.Invocation], Awaitable[types.Result]],
         options: dict = None,
     ) -> Registration:
-        if not inspect.iscoroutinefunction(invocation_handler):
+        if not (inspect.iscoroutinefunction(invocation_handler) or inspect.isasyncgenfunction(invocation_handler)):
             raise RuntimeError(
-                f"function {invocation_handler.__name__} for procedure '{procedure}' must be a coroutine"
+                f"function {invocation_handler.__name__} for procedure '{procedure}' must be a coroutine "
+                "or async generator"
             )
 
         register = messages.Register(messages.RegisterFields(self._idgen.next(), procedure, options=options))
@@ -220,6 +472,12 @@ class AsyncSession:
         kwargs: dict[str, Any] | None = None,
         options: dict[str, Any] | None = None,
     ) -> types.Result:
+        """
+        Call procedure and wait for its result. With the "timeout" option (milliseconds) the call
+        is cancelled and TimeoutError raised once it passed, routers supporting call timeouts
+        enforce it as well.
+        Cancelling the awaiting task cancels the call too.
+        """
         call = messages.Call(messages.CallFields(self._idgen.next(), procedure, args, kwargs, options=options))
         data = self._session.send_message(call)
 
@@ -228,7 +486,93 @@ class AsyncSession:
 
         await self._base_session.send(data)
 
-        return await f
+        timeout = options.get("timeout") if options is not None else None
+        try:
+            if timeout:
+                return await asyncio.wait_for(f, timeout / 1000)
+
+            return await f
+        except asyncio.TimeoutError:
+            await self._cancel_call(call.request_id)
+            # a different class than the builtin before python 3.11
+            raise TimeoutError("call timed out") from None
+        except asyncio.CancelledError:
+            await self._cancel_call(call.request_id)
+            raise
+
+    async def call_stream(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+        maxsize: int = 1024,
+    ) -> AsyncIterator[types.Result]:
+        """
+        Call procedure asking for progressive results and iterate over them as they arrive.
+        At most maxsize results are buffered. The session never stops reading for a slow
+        consumer, as that would deadlock a loop making calls on this session. Instead, a result
+        arriving with the buffer full cancels the call and the iterator raises StreamOverflow after
+        what's buffered. Closing the iterator early (contextlib.aclosing) cancels the call, the
+        "timeout" option (milliseconds) bounds the whole stream and raises TimeoutError.
+        """
+        options = dict(options or {})
+        options["receive_progress"] = True
+        call = messages.Call(messages.CallFields(self._idgen.next(), procedure, args, kwargs, options=options))
+        data = self._session.send_message(call)
+
+        # unbounded, the reader enforces maxsize without waiting for room
+        queue: asyncio.Queue[types.Result | Exception | None] = asyncio.Queue()
+        self._stream_requests[call.request_id] = (queue, maxsize)
+        await self._base_session.send(data)
+
+        timeout = options.get("timeout")
+        deadline = None if not timeout else self._loop.time() + timeout / 1000
+        finished = False
+        try:
+            while True:
+                if deadline is None:
+                    item = await queue.get()
+                else:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(deadline - self._loop.time(), 0))
+                    except asyncio.TimeoutError:
+                        raise TimeoutError("call timed out") from None
+
+                if item is None:
+                    finished = True
+                    return
+
+                if isinstance(item, Exception):
+                    finished = True
+                    raise item
+
+                yield item
+        finally:
+            if not finished:
+                await self._cancel_call(call.request_id)
+
+    async def _overflow_stream(self, request_id: int):
+        queue, maxsize = self._stream_requests.pop(request_id)
+        queue.put_nowait(StreamOverflow(f"more than {maxsize} results buffered"))
+        cancel = messages.Cancel(messages.CancelFields(request_id))
+        try:
+            await self._base_session.send(self._session.send_message(cancel))
+        except Exception:
+            # nothing left to cancel on a dead connection
+            pass
+
+    async def _cancel_call(self, request_id: int):
+        # if the entry is gone the reply was faster
+        if self._call_requests.pop(request_id, None) is None and self._stream_requests.pop(request_id, None) is None:
+            return
+
+        cancel = messages.Cancel(messages.CancelFields(request_id))
+        try:
+            await self._base_session.send(self._session.send_message(cancel))
+        except Exception:
+            # nothing left to cancel on a dead connection
+            pass
 
     async def _unregister(self, reg: Registration) -> None:
         if not await self._base_session.transport.is_connected():
@@ -244,8 +588,16 @@ class AsyncSession:
         return await f
 
     async def subscribe(
-        self, topic: str, event_handler: Callable[[types.Event], Awaitable[None]], options: dict | None = None
+        self,
+        topic: str,
+        event_handler: Callable[[types.Event], Awaitable[None]],
+        options: dict | None = None,
+        dispatcher: IAsyncDispatcher | None = None,
     ) -> Subscription:
+        """
+        Subscribe event_handler to topic. By default every event runs in a task of its own, a
+        dispatcher can run them inline, on a bounded pool of worker tasks or ordered per key.
+        """
         if not inspect.iscoroutinefunction(event_handler):
             raise RuntimeError(f"function {event_handler.__name__} for topic '{topic}' must be a coroutine")
 
@@ -253,11 +605,24 @@ class AsyncSession:
         data = self._session.send_message(subscribe)
 
         f: Future[Subscription] = Future()
-        self._subscribe_requests[subscribe.request_id] = SubscribeRequest(f, event_handler)
+        self._subscribe_requests[subscribe.request_id] = SubscribeRequest(f, event_handler, dispatcher)
         await self._base_session.send(data)
 
         return await f
 
+    def events(
+        self,
+        topic: str,
+        maxsize: int = 1024,
+        overflow: types.OverflowPolicy | str = types.OverflowPolicy.DROP_OLDEST,
+        options: dict | None = None,
+    ) -> EventStream:
+        """
+        Iterate over the events of topic, `async for event in session.events(topic)`. The events
+        wait in a bounded queue for the consumer, see EventStream for what happens when it's full.
+        """
+        return EventStream(self, topic, maxsize, types.OverflowPolicy(overflow), options)
+
     async def publish(
         self, topic: str, args: list[Any] | None = None, kwargs: dict | None = None, options: dict | None = None
     ) -> None:
@@ -309,6 +674,16 @@ class AsyncSession:
     async def ping(self, timeout: int = 10) -> float:
         return await self._base_session.transport.ping(timeout)
 
+    @property
+    def rtt_stats(self) -> types.RTTStats:
+        """Round-trip times of the pings sent on this session's transport, including keepalive pings."""
+        return self._base_session.transport.rtt_stats
+
+    @property
+    def compression_stats(self) -> types.CompressionStats | None:
+        """Per-message-deflate counters of this session's transport, None if it doesn't compress."""
+        return self._base_session.transport.compression_stats
+
     def _on_disconnect(self, callback: Callable[[], Awaitable[None]]) -> None:
         if callback is not None:
             self._disconnect_callback.append(callback)
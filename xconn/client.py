@@ -4,6 +4,9 @@ from urllib.parse import urlparse
 from wampproto import auth, serializers
 
 from xconn import types
+from xconn.dispatch import IDispatcher
+from xconn.pool import SessionPool
+from xconn.resilient import ResilientSession
 from xconn.session import Session
 from xconn.joiner import WebsocketsJoiner, RawSocketJoiner
 
@@ -14,10 +17,12 @@ class Client:
         authenticator: auth.IClientAuthenticator = auth.AnonymousAuthenticator(""),
         serializer: serializers.Serializer = serializers.JSONSerializer(),
         config: types.TransportConfig = types.TransportConfig(),
+        dispatcher: IDispatcher | None = None,
     ):
         self._authenticator = authenticator
         self._serializer = serializer
         self._config = config
+        self._dispatcher = dispatcher
 
     def connect(
         self,
@@ -27,9 +32,44 @@ class Client:
         disconnect_callback: Callable[[], None] | None = None,
     ) -> Session:
         return connect(
-            uri, realm, self._authenticator, self._serializer, self._config, connect_callback, disconnect_callback
+            uri,
+            realm,
+            self._authenticator,
+            self._serializer,
+            self._config,
+            connect_callback,
+            disconnect_callback,
+            self._dispatcher,
         )
 
+    def connect_resilient(
+        self, uri: str, realm: str, config: types.ReconnectConfig = types.ReconnectConfig()
+    ) -> ResilientSession:
+        """Connect with a session that reconnects by itself and restores its registrations and subscriptions."""
+        return ResilientSession.create(
+            lambda disconnect_callback: self.connect(uri, realm, disconnect_callback=disconnect_callback), config
+        )
+
+    def connect_pool(
+        self,
+        uri: str,
+        realm: str,
+        size: int = 4,
+        strategy: types.PoolStrategy = types.PoolStrategy.ROUND_ROBIN,
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ) -> SessionPool:
+        """Open size resilient sessions to realm and spread calls and publishes across them."""
+        members = []
+        try:
+            for _ in range(size):
+                members.append(self.connect_resilient(uri, realm, config))
+        except Exception:
+            for member in members:
+                member.leave()
+            raise
+
+        return SessionPool(members, strategy)
+
 
 def connect(
     uri: str,
@@ -39,6 +79,7 @@ def connect(
     config: types.TransportConfig = types.TransportConfig(),
     connect_callback: Callable[[], None] | None = None,
     disconnect_callback: Callable[[], None] | None = None,
+    dispatcher: IDispatcher | None = None,
 ) -> Session:
     parsed = urlparse(uri)
     if parsed.scheme == "ws" or parsed.scheme == "wss" or parsed.scheme == "unix+ws":
@@ -50,13 +91,14 @@ def connect(
         or parsed.scheme == "tcps"
         or parsed.scheme == "unix"
         or parsed.scheme == "unix+rs"
+        or parsed.scheme == "shm+rs"
     ):
         j = RawSocketJoiner(authenticator, serializer, config)
     else:
         raise RuntimeError(f"Unsupported scheme {parsed.scheme}")
 
     details = j.join(uri, realm)
-    session = Session(details)
+    session = Session(details, coalesce_writes=config.coalesce_writes, dispatcher=dispatcher, reactor=config.reactor)
 
     session._on_disconnect(disconnect_callback)
 
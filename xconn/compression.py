@@ -0,0 +1,150 @@
+import zlib
+from dataclasses import dataclass
+
+from aiohttp import WSMsgType, web, ClientWebSocketResponse
+from websockets.extensions.base import Extension
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+from websockets.frames import Frame, Opcode
+
+# trailer of a zlib sync flush, dropped from compressed messages as required by RFC 7692
+_EMPTY_UNCOMPRESSED_BLOCK = b"\x00\x00\xff\xff"
+_RSV1 = 0x40
+
+
+@dataclass(frozen=True)
+class DeflateConfig:
+    """Per-message-deflate settings of a websocket connection."""
+
+    # messages with smaller payloads are sent uncompressed, compressing tiny frames only burns CPU
+    min_size: int = 0
+
+    # zlib compression level, 1 is fastest and 9 compresses best
+    level: int = 6
+
+    # log2 of the LZ77 window our compressor uses (9-15), smaller windows use less memory per connection
+    window_bits: int = 15
+
+
+class CompressionStats:
+    """Counters of outgoing websocket messages before and after per-message-deflate."""
+
+    def __init__(self):
+        self.messages = 0
+        self.compressed_messages = 0
+        # payload bytes handed to the transport
+        self.uncompressed_bytes = 0
+        # payload bytes that went on the wire
+        self.compressed_bytes = 0
+
+    def add(self, uncompressed: int, compressed: int, was_compressed: bool):
+        self.messages += 1
+        self.compressed_messages += was_compressed
+        self.uncompressed_bytes += uncompressed
+        self.compressed_bytes += compressed
+
+    @property
+    def ratio(self) -> float:
+        if not self.compressed_bytes:
+            return 1.0
+
+        return self.uncompressed_bytes / self.compressed_bytes
+
+
+class DeflatePolicy(Extension):
+    """Wraps a negotiated websockets permessage-deflate extension to skip small messages and count bytes."""
+
+    def __init__(self, extension: Extension, config: DeflateConfig, stats: CompressionStats):
+        self.name = extension.name
+        self._extension = extension
+        self._min_size = config.min_size
+        self._stats = stats
+
+    def decode(self, frame: Frame, *, max_size: int | None = None) -> Frame:
+        return self._extension.decode(frame, max_size=max_size)
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode is not Opcode.TEXT and frame.opcode is not Opcode.BINARY:
+            return self._extension.encode(frame)
+
+        size = len(frame.data)
+        # RFC 7692 allows sending any message uncompressed, it's marked by a clear RSV1 bit.
+        if frame.fin and size < self._min_size:
+            self._stats.add(size, size, False)
+            return frame
+
+        encoded = self._extension.encode(frame)
+        self._stats.add(size, len(encoded.data), True)
+        return encoded
+
+
+class DeflatePolicyFactory(ClientPerMessageDeflateFactory):
+    """Client permessage-deflate offer for the websockets library that applies a DeflateConfig."""
+
+    def __init__(self, config: DeflateConfig, stats: CompressionStats):
+        super().__init__(
+            client_max_window_bits=config.window_bits,
+            compress_settings={"level": config.level, "memLevel": 5},
+        )
+        self._config = config
+        self._stats = stats
+
+    def process_response_params(self, params, accepted_extensions) -> Extension:
+        extension = super().process_response_params(params, accepted_extensions)
+        return DeflatePolicy(extension, self._config, self._stats)
+
+
+class AIOHttpDeflateSender:
+    """
+    Sends messages on an aiohttp websocket according to a DeflateConfig. aiohttp always compresses
+    at level 1 and has no size threshold, so messages are compressed here and written as ready frames.
+    That takes over from aiohttp's writer through attributes aiohttp doesn't document, which is why
+    aiohttp is pinned to the releases this was checked against. Without them compression is left
+    to aiohttp and the threshold and level don't apply.
+    """
+
+    def __init__(
+        self,
+        ws: web.WebSocketResponse | ClientWebSocketResponse,
+        config: DeflateConfig,
+        stats: CompressionStats,
+    ):
+        self._ws = ws
+        self._min_size = config.min_size
+        self._level = config.level
+        self._stats = stats
+
+        writer = getattr(ws, "_writer", None)
+        takeover = hasattr(writer, "compress") and hasattr(writer, "notakeover")
+        self._window_bits = min(ws.compress, config.window_bits) if ws.compress and takeover else 0
+        self._compressor = self._new_compressor() if self._window_bits else None
+        if self._compressor is not None:
+            # take over compression from the aiohttp writer, it has no public switch for this
+            self._no_context_takeover = writer.notakeover
+            writer.compress = 0
+
+    def _new_compressor(self):
+        return zlib.compressobj(self._level, zlib.DEFLATED, -self._window_bits)
+
+    async def send_str(self, data: str):
+        await self.send(data.encode(), WSMsgType.TEXT)
+
+    async def send_bytes(self, data: bytes):
+        await self.send(data, WSMsgType.BINARY)
+
+    async def send(self, data: bytes, opcode: WSMsgType):
+        size = len(data)
+        if self._compressor is None or size < self._min_size:
+            self._stats.add(size, size, False)
+            await self._ws.send_frame(data, opcode)
+            return
+
+        if self._no_context_takeover:
+            self._compressor = self._new_compressor()
+
+        payload = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        payload = payload.removesuffix(_EMPTY_UNCOMPRESSED_BLOCK)
+        self._stats.add(size, len(payload), True)
+
+        # the writer ORs the opcode into the first header byte, adding RSV1 marks the frame as compressed.
+        # Compression is synchronous, so frames go out in the order send() was called.
+        await self._ws.send_frame(payload, opcode | _RSV1)
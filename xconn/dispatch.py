@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from queue import SimpleQueue
+from typing import Awaitable, Callable, Hashable
+
+from xconn import types
+from xconn.exception import DispatchRejected
+
+
+class IDispatcher:
+    """Decides on which thread the handlers of a sync Session run."""
+
+    def submit(self, item: types.Invocation | types.Event, fn: Callable[[], None]) -> None:
+        """
+        Run fn, which calls the handler with item. Raises DispatchRejected if the
+        dispatcher is saturated and configured to reject.
+        """
+        raise NotImplementedError()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InlineDispatcher(IDispatcher):
+    """
+    Run handlers right on the session's reader thread. Cheapest for trivial handlers and keeps
+    order, but a slow handler stalls every other message of the session.
+    """
+
+    def submit(self, item: types.Invocation | types.Event, fn: Callable[[], None]) -> None:
+        fn()
+
+
+class PoolDispatcher(IDispatcher):
+    """Run handlers on a thread pool, order across messages is not preserved."""
+
+    def __init__(self, executor: ThreadPoolExecutor, owned: bool = False):
+        self._executor = executor
+        self._owned = owned
+
+    def submit(self, item: types.Invocation | types.Event, fn: Callable[[], None]) -> None:
+        self._executor.submit(fn)
+
+    def shutdown(self) -> None:
+        # a pool shared between sessions outlives each of them
+        if self._owned:
+            self._executor.shutdown(cancel_futures=True, wait=False)
+
+
+@functools.cache
+def shared_dispatcher() -> PoolDispatcher:
+    """Process-wide pool for sessions that shouldn't each bring their own threads."""
+    executor = ThreadPoolExecutor(max_workers=(cpu_count() or 1) * 4, thread_name_prefix="xconn-dispatch")
+    return PoolDispatcher(executor)
+
+
+class ShardedDispatcher(IDispatcher):
+    """
+    Hash each message to one of a fixed number of single threaded lanes, messages with the
+    same key run one after another in arrival order. Without a key function messages are
+    spread over the lanes round robin.
+    """
+
+    def __init__(self, lanes: int = 8, key: Callable[[types.Invocation | types.Event], Hashable] | None = None):
+        self._key = key
+        self._counter = itertools.count()
+        self._queues: list[SimpleQueue[Callable[[], None] | None]] = []
+        for lane in range(lanes):
+            queue = SimpleQueue()
+            self._queues.append(queue)
+            threading.Thread(target=self._run, args=(queue,), name=f"xconn-lane-{lane}", daemon=True).start()
+
+    @staticmethod
+    def _run(queue: SimpleQueue[Callable[[], None] | None]):
+        while (fn := queue.get()) is not None:
+            try:
+                fn()
+            except Exception:
+                pass
+
+    def submit(self, item: types.Invocation | types.Event, fn: Callable[[], None]) -> None:
+        if self._key is None:
+            lane = next(self._counter)
+        else:
+            lane = hash(self._key(item))
+
+        self._queues[lane % len(self._queues)].put(fn)
+
+    def shutdown(self) -> None:
+        for queue in self._queues:
+            queue.put(None)
+
+
+class BoundedDispatcher(IDispatcher):
+    """
+    Thread pool that holds at most max_pending handlers, running or waiting. Once full, BLOCK
+    makes the session's reader thread wait for a slot (pushing back on the router through
+    the socket) and REJECT refuses the message.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        policy: types.OverflowPolicy = types.OverflowPolicy.BLOCK,
+    ):
+        if policy not in (types.OverflowPolicy.BLOCK, types.OverflowPolicy.REJECT):
+            raise ValueError(f"unsupported overflow policy for dispatchers: {policy}")
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="xconn-bounded")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._policy = policy
+        self.rejected = 0
+
+    def _run(self, fn: Callable[[], None]):
+        try:
+            fn()
+        finally:
+            self._slots.release()
+
+    def submit(self, item: types.Invocation | types.Event, fn: Callable[[], None]) -> None:
+        if not self._slots.acquire(blocking=self._policy == types.OverflowPolicy.BLOCK):
+            self.rejected += 1
+            raise DispatchRejected("dispatcher queue is full")
+
+        self._executor.submit(self._run, fn)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(cancel_futures=True, wait=False)
+
+
+class IAsyncDispatcher:
+    """Decides how the event handlers of an AsyncSession are scheduled on its loop."""
+
+    async def submit(self, item: types.Event, fn: Callable[[], Awaitable[None]]) -> None:
+        """
+        Run or schedule fn, which calls the handler with item. While submit waits, the session
+        doesn't read further messages. Raises DispatchRejected if the dispatcher is saturated and
+        configured to reject.
+        """
+        raise NotImplementedError()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class AsyncInlineDispatcher(IAsyncDispatcher):
+    """
+    Await handlers right in the session's reader, without a task per event. Keeps order across
+    the whole subscription, but a handler that awaits stalls every other message of the session.
+    """
+
+    async def submit(self, item: types.Event, fn: Callable[[], Awaitable[None]]) -> None:
+        await fn()
+
+
+class _AsyncLanes:
+    """Bounded queues, each drained in order by its own worker task, started with the first item."""
+
+    def __init__(self, lanes: int, workers_per_lane: int, max_pending: int):
+        self._lanes = lanes
+        self._workers_per_lane = workers_per_lane
+        self._max_pending = max_pending
+        self._queues: list[asyncio.Queue[Callable[[], Awaitable[None]]]] = []
+        self._workers: list[asyncio.Task[None]] = []
+
+    @staticmethod
+    async def _run(queue: asyncio.Queue[Callable[[], Awaitable[None]]]):
+        while True:
+            fn = await queue.get()
+            try:
+                await fn()
+            except Exception:
+                pass
+
+    def queue(self, lane: int) -> asyncio.Queue[Callable[[], Awaitable[None]]]:
+        if not self._queues:
+            loop = asyncio.get_running_loop()
+            for _ in range(self._lanes):
+                queue = asyncio.Queue(self._max_pending)
+                self._queues.append(queue)
+                for _ in range(self._workers_per_lane):
+                    self._workers.append(loop.create_task(self._run(queue)))
+
+        return self._queues[lane % self._lanes]
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.cancel()
+
+
+class AsyncBoundedDispatcher(IAsyncDispatcher):
+    """
+    A fixed number of worker tasks sharing a queue of at most max_pending handlers. Once full,
+    BLOCK makes the session's reader wait for room (pushing back on the router through the socket)
+    and REJECT drops the event. Order across events is not preserved.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_pending: int = 256,
+        policy: types.OverflowPolicy = types.OverflowPolicy.BLOCK,
+    ):
+        if policy not in (types.OverflowPolicy.BLOCK, types.OverflowPolicy.REJECT):
+            raise ValueError(f"unsupported overflow policy for dispatchers: {policy}")
+
+        self._lanes = _AsyncLanes(1, workers, max_pending)
+        self._policy = policy
+        self.rejected = 0
+
+    async def submit(self, item: types.Event, fn: Callable[[], Awaitable[None]]) -> None:
+        queue = self._lanes.queue(0)
+        if self._policy == types.OverflowPolicy.BLOCK:
+            await queue.put(fn)
+            return
+
+        try:
+            queue.put_nowait(fn)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise DispatchRejected("dispatcher queue is full") from None
+
+    def shutdown(self) -> None:
+        self._lanes.shutdown()
+
+
+class AsyncShardedDispatcher(IAsyncDispatcher):
+    """
+    Hash each event to one of a fixed number of lanes, each drained by a single worker task, so
+    events with the same key (a device id, say) are handled one after another in arrival order
+    while different keys proceed concurrently. Without a key function events are spread over the
+    lanes round robin. A full lane makes the session's reader wait.
+    """
+
+    def __init__(self, lanes: int = 8, key: Callable[[types.Event], Hashable] | None = None, max_pending: int = 256):
+        self._key = key
+        self._counter = itertools.count()
+        self._lanes = _AsyncLanes(lanes, 1, max_pending)
+
+    async def submit(self, item: types.Event, fn: Callable[[], Awaitable[None]]) -> None:
+        if self._key is None:
+            lane = next(self._counter)
+        else:
+            lane = hash(self._key(item))
+
+        await self._lanes.queue(lane).put(fn)
+
+    def shutdown(self) -> None:
+        self._lanes.shutdown()
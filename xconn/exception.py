@@ -19,6 +19,25 @@ class ApplicationError(RuntimeError):
         return err
 
 
+class DispatchRejected(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
 class ProtocolError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
+
+
+class SessionClosed(ConnectionError):
+    """A request was made on a session whose connection is gone, nothing was sent."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class StreamOverflow(Exception):
+    """The consumer of a call_stream() fell maxsize results behind, the call was cancelled."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
@@ -1,6 +1,6 @@
 import threading
 
-from wampproto import serializers, idgen
+from wampproto import serializers, idgen, messages, session
 from wampproto.messages import Error
 from wampproto.transports.rawsocket import SERIALIZER_TYPE_JSON, SERIALIZER_TYPE_MSGPACK, SERIALIZER_TYPE_CBOR
 
@@ -12,6 +12,7 @@ except ImportError:
     _CAPNP_AVAILABLE = False
 
 from xconn.exception import ApplicationError
+from xconn.types import Result
 
 JSON_SUBPROTOCOL = "wamp.2.json"
 CBOR_SUBPROTOCOL = "wamp.2.cbor"
@@ -56,6 +57,23 @@ def get_rs_protocol(serializer: serializers.Serializer):
         raise ValueError("invalid serializer")
 
 
+def get_rs_serializer(protocol: int) -> serializers.Serializer:
+    if protocol == SERIALIZER_TYPE_JSON:
+        return serializers.JSONSerializer()
+    elif protocol == SERIALIZER_TYPE_CBOR:
+        return serializers.CBORSerializer()
+    elif protocol == SERIALIZER_TYPE_MSGPACK:
+        return serializers.MsgPackSerializer()
+    elif protocol == SERIALIZER_TYPE_CAPNPROTO:
+        if not _CAPNP_AVAILABLE:
+            raise ImportError(
+                "Cap'n Proto serializer support is not installed.\nInstall it with:\n  uv pip install xconn[capnproto]"
+            )
+        return CapnProtoSerializer()
+    else:
+        raise ValueError(f"invalid rawsocket serializer {protocol}")
+
+
 def get_serializer(ws_subprotocol: str) -> serializers.Serializer:
     if ws_subprotocol == JSON_SUBPROTOCOL:
         return serializers.JSONSerializer()
@@ -83,16 +101,95 @@ def exception_from_error(error: Error):
     return exc
 
 
+def progressive_yield(request_id: int, result: Result | None) -> messages.Yield:
+    if result is None:
+        return messages.Yield(messages.YieldFields(request_id, options={"progress": True}))
+
+    return messages.Yield(messages.YieldFields(request_id, result.args, result.kwargs, options={"progress": True}))
+
+
+class WAMPSession(session.WAMPSession):
+    """
+    The wampproto sans-io session plus call canceling and progressive results, which it doesn't
+    know about. Replies to cancelled calls may still arrive and are let through, so the session
+    can drop them.
+    """
+
+    def __init__(self, serializer: serializers.Serializer = serializers.JSONSerializer()):
+        super().__init__(serializer)
+        self._cancelled_calls: set[int] = set()
+
+    def send_message(self, msg: messages.Message) -> bytes:
+        if isinstance(msg, messages.Cancel):
+            if msg.request_id not in self._call_requests:
+                raise ValueError("cannot cancel unknown call request")
+
+            self._call_requests.remove(msg.request_id)
+            self._cancelled_calls.add(msg.request_id)
+            return self._serializer.serialize(msg)
+
+        if isinstance(msg, messages.Yield) and msg.options.get("progress", False):
+            # more yields follow for this invocation
+            if msg.request_id not in self._invocation_requests:
+                raise ValueError("cannot yield for unknown invocation request")
+
+            return self._serializer.serialize(msg)
+
+        return super().send_message(msg)
+
+    def receive_message(self, msg: messages.Message) -> messages.Message:
+        if isinstance(msg, messages.Interrupt):
+            # the invocation may have been answered already, the session ignores those
+            return msg
+
+        progress = isinstance(msg, messages.Result) and msg.details.get("progress", False)
+        call_error = isinstance(msg, messages.Error) and msg.message_type == messages.Call.TYPE
+        if isinstance(msg, messages.Result) or call_error:
+            if msg.request_id in self._cancelled_calls:
+                if not progress:
+                    self._cancelled_calls.remove(msg.request_id)
+
+                return msg
+
+        if progress:
+            # the call stays open until its final result
+            if msg.request_id not in self._call_requests:
+                raise ValueError("received RESULT for invalid request_id")
+
+            return msg
+
+        return super().receive_message(msg)
+
+
 class SessionScopeIDGenerator:
+    """
+    Session scope request ids for sync sessions. Every thread reserves a block of ids under the
+    lock and hands them out without it, so calling threads don't contend for each id. A single
+    thread gets consecutive ids.
+    """
+
+    BLOCK_SIZE = 64
+
     def __init__(self):
         super().__init__()
         self.id: int = 0
         self._lock = threading.Lock()
+        self._local = threading.local()
 
-    def next(self):
+    def _reserve(self) -> range:
         with self._lock:
-            if self.id >= idgen.ID_MAX:
+            if self.id + self.BLOCK_SIZE > idgen.ID_MAX:
                 self.id = 0
 
-            self.id += 1
-            return self.id
+            start = self.id + 1
+            self.id += self.BLOCK_SIZE
+            return range(start, start + self.BLOCK_SIZE)
+
+    def next(self):
+        ids = getattr(self._local, "ids", None)
+        if ids is None or (request_id := next(ids, None)) is None:
+            ids = iter(self._reserve())
+            self._local.ids = ids
+            request_id = next(ids)
+
+        return request_id
@@ -0,0 +1,176 @@
+"""
+In-process link between AsyncSession and Router.
+
+Both ends of the link pass messages.Message objects through plain deques, nothing is serialized on
+the way. Routers are made reachable with serve() and sessions join them with inproc://<name> URIs, for
+example AsyncClient().connect("inproc://realm1", "realm1").
+"""
+
+import asyncio
+import weakref
+from asyncio import Future
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from wampproto import auth, joiner, messages, serializers
+
+from xconn import types
+from xconn.acceptor import AsyncRawSocketAcceptor
+from xconn.router import Router
+
+
+@dataclass
+class _Endpoint:
+    router: "weakref.ref[Router]"
+    authenticator: auth.IServerAuthenticator | None
+
+
+# served routers by name, an entry goes away with its router
+_endpoints: dict[str, _Endpoint] = {}
+# the router side of every link
+_tasks: set[asyncio.Task] = set()
+
+
+class MessageSerializer(serializers.Serializer):
+    """Hands messages over as they are, for peers sharing a process."""
+
+    def serialize(self, message: messages.Message) -> messages.Message:
+        return message
+
+    def deserialize(self, data: messages.Message) -> messages.Message:
+        return data
+
+    def static(self) -> bool:
+        return False
+
+
+class InprocTransport(types.IAsyncTransport):
+    """One end of an in-process link, whatever is written comes out of the read side of the peer."""
+
+    def __init__(self):
+        super().__init__()
+        self._incoming: deque[messages.Message] = deque()
+        self._waiter: Future[None] | None = None
+        self._peer: InprocTransport | None = None
+        self._connected = True
+        self._rtt_stats = types.RTTStats()
+
+    @staticmethod
+    def pair() -> tuple["InprocTransport", "InprocTransport"]:
+        client, server = InprocTransport(), InprocTransport()
+        client._peer, server._peer = server, client
+        return client, server
+
+    def _wakeup(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def _wait(self):
+        while not self._incoming:
+            if not self._connected:
+                raise ConnectionError("in-process link closed")
+
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+
+    async def read(self) -> messages.Message:
+        await self._wait()
+        return self._incoming.popleft()
+
+    async def read_batch(self) -> list[messages.Message]:
+        await self._wait()
+        batch = list(self._incoming)
+        self._incoming.clear()
+        return batch
+
+    async def write(self, data: messages.Message):
+        if not self._connected:
+            raise ConnectionError("in-process link closed")
+
+        self._peer._incoming.append(data)
+        self._peer._wakeup()
+
+    async def close(self):
+        for end in (self, self._peer):
+            end._connected = False
+            end._wakeup()
+
+    async def is_connected(self) -> bool:
+        # messages written before the link closed are still read, like bytes left in a socket
+        return self._connected or bool(self._incoming)
+
+    async def ping(self, timeout: int = 10) -> float:
+        if not self._connected:
+            raise ConnectionError("in-process link closed")
+
+        return 0.0
+
+    @property
+    def rtt_stats(self) -> types.RTTStats:
+        return self._rtt_stats
+
+
+def serve(router: Router, name: str, authenticator: auth.IServerAuthenticator = None):
+    """
+    Make router reachable in this process as inproc://name, for as long as it's alive.
+
+    Nothing is copied on the way: the args and kwargs objects a caller passes are the ones the
+    callee gets, a callee's result is what the caller gets and every subscriber of a publication
+    gets the publisher's objects. Don't modify them after sending or in handlers, copy them instead.
+    """
+
+    def forget(_: "weakref.ref[Router]"):
+        if _endpoints.get(name) is endpoint:
+            del _endpoints[name]
+
+    endpoint = _Endpoint(weakref.ref(router, forget), authenticator)
+    _endpoints[name] = endpoint
+
+
+async def _serve_client(router: Router, transport: InprocTransport, authenticator: auth.IServerAuthenticator):
+    try:
+        base_session = await AsyncRawSocketAcceptor(authenticator).accept(transport, MessageSerializer())
+        router.attach_client(base_session)
+    except Exception:
+        await transport.close()
+        return
+
+    try:
+        while True:
+            for msg in await transport.read_batch():
+                await router.receive_message(base_session, msg)
+    except ConnectionError:
+        pass
+    finally:
+        router.detach_client(base_session)
+
+        await transport.close()
+
+
+class AsyncInprocJoiner:
+    def __init__(self, authenticator: auth.IClientAuthenticator = None):
+        self._authenticator = authenticator
+
+    async def join(self, uri: str, realm: str) -> types.AsyncBaseSession:
+        name = urlparse(uri).netloc
+        endpoint = _endpoints.get(name)
+        router = endpoint.router() if endpoint is not None else None
+        if router is None:
+            raise ConnectionRefusedError(f"no router is served in-process as {name}")
+
+        client, server = InprocTransport.pair()
+        task = asyncio.get_running_loop().create_task(_serve_client(router, server, endpoint.authenticator))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+        serializer = MessageSerializer()
+        j = joiner.Joiner(realm, serializer=serializer, authenticator=self._authenticator)
+        await client.write(j.send_hello())
+
+        while True:
+            to_send = j.receive(await client.read())
+            if to_send is None:
+                return types.AsyncBaseSession(client, j.get_session_details(), serializer)
+
+            await client.write(to_send)
@@ -1,8 +1,18 @@
+from urllib.parse import urlparse
+
 from wampproto import joiner, serializers, auth
 from wampproto.joiner import Joiner
 
 from xconn import types, helpers
-from xconn.transports import WebSocketTransport, AsyncWebSocketTransport, RawSocketTransport, AsyncRawSocketTransport
+from xconn.shm import ShmRawSocketTransport, AsyncShmRawSocketTransport
+from xconn.transports import (
+    WebSocketTransport,
+    AsyncWebSocketTransport,
+    RawSocketTransport,
+    AsyncRawSocketTransport,
+    AsyncBufferedRawSocketTransport,
+    AIOHttpWebSocketTransport,
+)
 
 
 class WebsocketsJoiner:
@@ -47,7 +57,12 @@ class AsyncWebsocketsJoiner:
         self._serializer = serializer
 
     async def join(self, uri: str, realm: str) -> types.AsyncBaseSession:
-        transport = await AsyncWebSocketTransport.connect(
+        if self._ws_config.websocket_backend == types.WebsocketBackend.AIOHTTP:
+            transport_class = AIOHttpWebSocketTransport
+        else:
+            transport_class = AsyncWebSocketTransport
+
+        transport = await transport_class.connect(
             uri,
             subprotocols=[helpers.get_ws_subprotocol(serializer=self._serializer)],
             config=self._ws_config,
@@ -77,7 +92,12 @@ class RawSocketJoiner:
         self._config = config
 
     def join(self, uri: str, realm: str) -> types.BaseSession:
-        transport = RawSocketTransport.connect(uri, helpers.get_rs_protocol(self._serializer), config=self._config)
+        if urlparse(uri).scheme == "shm+rs":
+            transport_class = ShmRawSocketTransport
+        else:
+            transport_class = RawSocketTransport
+
+        transport = transport_class.connect(uri, helpers.get_rs_protocol(self._serializer), config=self._config)
 
         j: Joiner = joiner.Joiner(realm, serializer=self._serializer, authenticator=self._authenticator)
         transport.write(j.send_hello())
@@ -103,9 +123,14 @@ class AsyncRawSocketJoiner:
         self._config = config
 
     async def join(self, uri: str, realm: str) -> types.AsyncBaseSession:
-        transport = await AsyncRawSocketTransport.connect(
-            uri, helpers.get_rs_protocol(self._serializer), config=self._config
-        )
+        if urlparse(uri).scheme == "shm+rs":
+            transport_class = AsyncShmRawSocketTransport
+        elif self._config.rawsocket_buffered_protocol:
+            transport_class = AsyncBufferedRawSocketTransport
+        else:
+            transport_class = AsyncRawSocketTransport
+
+        transport = await transport_class.connect(uri, helpers.get_rs_protocol(self._serializer), config=self._config)
         j: Joiner = joiner.Joiner(realm, serializer=self._serializer, authenticator=self._authenticator)
         await transport.write(j.send_hello())
 
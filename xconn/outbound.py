@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+
+from xconn import types
+
+# closes of slow clients, kept until done
+_tasks: set[asyncio.Task] = set()
+
+
+class OutboundQueue:
+    """
+    Messages on their way from the router to one client, written by a task of its own so a slow
+    connection only holds up itself. Events are subject to the overflow policy once maxsize
+    messages are waiting, anything else is always queued.
+    """
+
+    def __init__(self, client: types.IAsyncBaseSession, config: types.OutboundConfig = types.OutboundConfig()):
+        if config.overflow not in (
+            types.OverflowPolicy.BLOCK,
+            types.OverflowPolicy.DROP_NEWEST,
+            types.OverflowPolicy.DISCONNECT,
+        ):
+            raise ValueError(f"unsupported overflow policy for outbound queues: {config.overflow}")
+
+        self.client = client
+        self._config = config
+        self._items: deque[bytes | str] = deque()
+        # set while there is something to write, or the queue is closing
+        self._ready = asyncio.Event()
+        # set while there is room for events
+        self._room = asyncio.Event()
+        self._room.set()
+        self._writer: asyncio.Task[None] | None = None
+        self._closing = False
+        self.stats = types.OutboundStats()
+
+    async def put(self, data: bytes | str, event: bool = False):
+        if self._closing:
+            return
+
+        if event and len(self._items) >= self._config.maxsize:
+            match self._config.overflow:
+                case types.OverflowPolicy.DROP_NEWEST:
+                    self.stats.dropped += 1
+                    return
+                case types.OverflowPolicy.DISCONNECT:
+                    self.stats.dropped += 1
+                    self._disconnect()
+                    return
+                case types.OverflowPolicy.BLOCK:
+                    while len(self._items) >= self._config.maxsize and not self._closing:
+                        self._room.clear()
+                        await self._room.wait()
+
+                    if self._closing:
+                        return
+
+        self._items.append(data)
+        self.stats.depth = len(self._items)
+        self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+        self._ready.set()
+
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self):
+        try:
+            while True:
+                if not self._items:
+                    if self._closing:
+                        return
+
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                data = self._items.popleft()
+                self.stats.depth = len(self._items)
+                if len(self._items) < self._config.maxsize:
+                    self._room.set()
+
+                await self.client.send_serialized(data)
+                self.stats.sent += 1
+        except Exception:
+            # the client's own reader notices the broken connection and detaches it
+            self._discard()
+
+    def _discard(self):
+        self._closing = True
+        self.stats.dropped += len(self._items)
+        self._items.clear()
+        self.stats.depth = 0
+        self._ready.set()
+        self._room.set()
+
+    def _disconnect(self):
+        self._discard()
+        task = asyncio.get_running_loop().create_task(self.client.close())
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+    async def close(self):
+        """Write what's queued, then close the client's connection."""
+        self._closing = True
+        self._ready.set()
+        self._room.set()
+        if self._writer is not None:
+            await self._writer
+
+        await self.client.close()
+
+    def cancel(self):
+        """Drop what's queued, the connection is gone already."""
+        self._discard()
+        if self._writer is not None:
+            self._writer.cancel()
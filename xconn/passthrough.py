@@ -0,0 +1,221 @@
+"""
+Payload passthrough for the router.
+
+CALL, YIELD and PUBLISH are decoded up to their URI, the args and kwargs that follow stay in the
+encoding of the sender and are carried along as the payload of the message. Recipients speaking the
+same serializer get them spliced back in byte for byte, for everyone else they are decoded once.
+"""
+
+import io
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import cbor2
+import msgpack
+from wampproto import messages, serializers
+from wampproto.serializers.serializer import to_message
+
+# elements in front of args and kwargs
+_ENVELOPE_LENGTHS = {
+    messages.Call.TYPE: 4,
+    messages.Yield.TYPE: 3,
+    messages.Publish.TYPE: 4,
+}
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\n\r"
+
+
+@dataclass(frozen=True)
+class RawPayload:
+    """args and kwargs of a message, still encoded by the serializer of the peer that sent them."""
+
+    # the encoded elements following the envelope, for JSON including the closing bracket
+    data: bytes | str
+    # number of elements in data, JSON payloads only tell whether there are any
+    count: int
+    serializer: type[serializers.Serializer]
+
+
+class _PublishFields(messages.PublishFields):
+    # wampproto only carries payloads for the call related messages
+    def __init__(self, request_id: int, topic: str, options: dict[str, Any], payload: RawPayload):
+        super().__init__(request_id, topic, options=options)
+        self._payload = payload
+
+    @property
+    def payload(self) -> RawPayload:
+        return self._payload
+
+
+class _EventFields(messages.EventFields):
+    def __init__(self, subscription_id: int, publication_id: int, details: dict[str, Any], payload: RawPayload):
+        super().__init__(subscription_id, publication_id, details=details)
+        self._payload = payload
+
+    @property
+    def payload(self) -> RawPayload:
+        return self._payload
+
+
+def _skip_whitespace(data: str, pos: int) -> int:
+    while pos < len(data) and data[pos] in _JSON_WHITESPACE:
+        pos += 1
+
+    return pos
+
+
+def _decode_json(data: str | bytes) -> tuple[list[Any], RawPayload] | None:
+    if not isinstance(data, str):
+        data = str(data, "utf-8")
+
+    pos = _skip_whitespace(data, 0)
+    if data[pos : pos + 1] != "[":
+        return None
+
+    envelope: list[Any] = []
+    length = 1
+    pos += 1
+    while len(envelope) < length:
+        pos = _skip_whitespace(data, pos)
+        if envelope:
+            if data[pos : pos + 1] != ",":
+                return None
+
+            pos = _skip_whitespace(data, pos + 1)
+
+        item, pos = _JSON_DECODER.raw_decode(data, pos)
+        envelope.append(item)
+        if len(envelope) == 1:
+            length = _ENVELOPE_LENGTHS.get(item)
+            if length is None:
+                return None
+
+    tail = data[pos:]
+    return envelope, RawPayload(tail, 0 if tail.strip(_JSON_WHITESPACE) == "]" else 1, serializers.JSONSerializer)
+
+
+def _decode_msgpack(data: bytes) -> tuple[list[Any], RawPayload] | None:
+    unpacker = msgpack.Unpacker(max_buffer_size=len(data))
+    unpacker.feed(data)
+    total = unpacker.read_array_header()
+    message_type = unpacker.unpack()
+    length = _ENVELOPE_LENGTHS.get(message_type)
+    if length is None or total < length:
+        return None
+
+    envelope = [message_type] + [unpacker.unpack() for _ in range(length - 1)]
+    return envelope, RawPayload(data[unpacker.tell() :], total - length, serializers.MsgPackSerializer)
+
+
+def _decode_cbor(data: bytes) -> tuple[list[Any], RawPayload] | None:
+    head = data[0]
+    if head >> 5 != 4 or head & 0x1F >= 24:
+        # not an array, or one with a length no WAMP message has
+        return None
+
+    total = head & 0x1F
+    fp = io.BytesIO(data)
+    fp.seek(1)
+    decoder = cbor2.CBORDecoder(fp)
+    message_type = decoder.decode()
+    length = _ENVELOPE_LENGTHS.get(message_type)
+    if length is None or total < length:
+        return None
+
+    envelope = [message_type] + [decoder.decode() for _ in range(length - 1)]
+    return envelope, RawPayload(data[fp.tell() :], total - length, serializers.CBORSerializer)
+
+
+_DECODERS = {
+    serializers.JSONSerializer: _decode_json,
+    serializers.MsgPackSerializer: _decode_msgpack,
+    serializers.CBORSerializer: _decode_cbor,
+}
+
+
+def _with_payload(msg: messages.Message, payload: RawPayload) -> messages.Message:
+    match msg.TYPE:
+        case messages.Call.TYPE:
+            return messages.Call(
+                messages.CallFields(msg.request_id, msg.procedure, options=msg.options, payload=payload)
+            )
+        case messages.Yield.TYPE:
+            return messages.Yield(messages.YieldFields(msg.request_id, options=msg.options, payload=payload))
+        case messages.Publish.TYPE:
+            return messages.Publish(_PublishFields(msg.request_id, msg.topic, msg.options, payload))
+
+    raise ValueError(f"no payload passthrough for {msg.TEXT}")
+
+
+def decode(serializer: serializers.Serializer, data: bytes | str) -> messages.Message:
+    """
+    Deserialize a message, leaving the args and kwargs of CALL, YIELD and PUBLISH encoded. Other
+    messages and serializers are deserialized as usual.
+    """
+    decoder = _DECODERS.get(type(serializer))
+    try:
+        decoded = decoder(data) if decoder is not None else None
+    except Exception:
+        # malformed, the full deserializer reports it
+        decoded = None
+
+    if decoded is None:
+        return serializer.deserialize(data)
+
+    envelope, payload = decoded
+    msg = to_message(envelope)
+    if payload.count == 0:
+        return msg
+
+    return _with_payload(msg, payload)
+
+
+def _payload_items(payload: RawPayload) -> list[Any]:
+    if payload.serializer is serializers.JSONSerializer:
+        tail = payload.data.lstrip(_JSON_WHITESPACE)
+        return json.loads("[" + tail[1:]) if tail.startswith(",") else []
+    elif payload.serializer is serializers.MsgPackSerializer:
+        unpacker = msgpack.Unpacker(max_buffer_size=len(payload.data))
+        unpacker.feed(payload.data)
+        return [unpacker.unpack() for _ in range(payload.count)]
+    else:
+        decoder = cbor2.CBORDecoder(io.BytesIO(payload.data))
+        return [decoder.decode() for _ in range(payload.count)]
+
+
+def raw_payload(msg: messages.Message) -> RawPayload | None:
+    """The payload decode() left encoded, if any."""
+    payload = getattr(msg, "payload", None)
+    return payload if isinstance(payload, RawPayload) else None
+
+
+def encode(serializer: serializers.Serializer, msg: messages.Message) -> bytes | str:
+    """Serialize a message, splicing in a passed through payload when the serializer matches."""
+    payload = raw_payload(msg)
+    if payload is None:
+        return serializer.serialize(msg)
+
+    envelope = msg.marshal()
+    if type(serializer) is not payload.serializer:
+        return serializer.serialize(to_message(envelope + _payload_items(payload)))
+
+    # envelopes are short enough for the one byte array header of msgpack and CBOR
+    if payload.serializer is serializers.JSONSerializer:
+        return json.dumps(envelope)[:-1] + payload.data
+    elif payload.serializer is serializers.MsgPackSerializer:
+        return bytes([0x90 | (len(envelope) + payload.count)]) + msgpack.packb(envelope)[1:] + payload.data
+    else:
+        return bytes([0x80 | (len(envelope) + payload.count)]) + cbor2.dumps(envelope)[1:] + payload.data
+
+
+def forward(msg: messages.Message, payload: RawPayload) -> messages.Message:
+    """Attach the payload of a YIELD or PUBLISH to the RESULT or EVENT the router made of it."""
+    match msg.TYPE:
+        case messages.Result.TYPE:
+            return messages.Result(messages.ResultFields(msg.request_id, details=msg.details, payload=payload))
+        case messages.Event.TYPE:
+            return messages.Event(_EventFields(msg.subscription_id, msg.publication_id, msg.details, payload))
+
+    return msg
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Awaitable, Callable
+
+from xconn import types
+from xconn.resilient import AsyncResilientSession, ResilientSession
+
+
+class _Balancer:
+    """Picks the member for the next request and keeps the per member counters."""
+
+    def __init__(self, members: list[ResilientSession] | list[AsyncResilientSession], strategy: types.PoolStrategy):
+        self._members = members
+        self._strategy = strategy
+        self._next = 0
+        self._requests = [0] * len(members)
+        self._outstanding = [0] * len(members)
+        self._errors = 0
+
+    def acquire(self) -> int:
+        size = len(self._members)
+        if self._strategy is types.PoolStrategy.LEAST_OUTSTANDING:
+            index = None
+            for i in range(size):
+                if self._members[i].connected and (index is None or self._outstanding[i] < self._outstanding[index]):
+                    index = i
+
+            if index is None:
+                index = self._outstanding.index(min(self._outstanding))
+        else:
+            start = self._next
+            self._next = (start + 1) % size
+            index = start
+            # skip members that are reconnecting, unless all of them are
+            for i in range(size):
+                if self._members[(start + i) % size].connected:
+                    index = (start + i) % size
+                    break
+
+        self._requests[index] += 1
+        self._outstanding[index] += 1
+        return index
+
+    def release(self, index: int, failed: bool):
+        self._outstanding[index] -= 1
+        if failed:
+            self._errors += 1
+
+    def stats(self) -> types.PoolStats:
+        return types.PoolStats(
+            connected=sum(member.connected for member in self._members),
+            requests=list(self._requests),
+            outstanding=list(self._outstanding),
+            errors=self._errors,
+            reconnects=sum(member.stats.reconnects for member in self._members),
+        )
+
+
+class SessionPool:
+    """
+    Spreads calls and publishes of one client across several sessions to the same realm, each with
+    its own connection and reader. Members reconnect by themselves (see ResilientSession), requests
+    go to connected members only while there are some.
+    """
+
+    def __init__(self, members: list[ResilientSession], strategy: types.PoolStrategy = types.PoolStrategy.ROUND_ROBIN):
+        if not members:
+            raise ValueError("a session pool needs at least one member")
+
+        self._members = members
+        self._balancer = _Balancer(members, strategy)
+        self._lock = threading.Lock()
+
+    @property
+    def members(self) -> list[ResilientSession]:
+        return list(self._members)
+
+    @property
+    def stats(self) -> types.PoolStats:
+        with self._lock:
+            return self._balancer.stats()
+
+    def _route(self, request: Callable[[ResilientSession], Any]) -> Any:
+        with self._lock:
+            index = self._balancer.acquire()
+
+        failed = True
+        try:
+            result = request(self._members[index])
+            failed = False
+            return result
+        finally:
+            with self._lock:
+                self._balancer.release(index, failed)
+
+    def call(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> types.Result:
+        return self._route(lambda member: member.call(procedure, args, kwargs, options))
+
+    def publish(self, topic: str, args: list[Any] = None, kwargs: dict = None, options: dict = None):
+        return self._route(lambda member: member.publish(topic, args, kwargs, options))
+
+    def leave(self):
+        for member in self._members:
+            member.leave()
+
+
+class AsyncSessionPool:
+    """
+    Spreads calls and publishes of one client across several sessions to the same realm, each with
+    its own connection. Members reconnect by themselves (see AsyncResilientSession), requests go to
+    connected members only while there are some.
+    """
+
+    def __init__(
+        self, members: list[AsyncResilientSession], strategy: types.PoolStrategy = types.PoolStrategy.ROUND_ROBIN
+    ):
+        if not members:
+            raise ValueError("a session pool needs at least one member")
+
+        self._members = members
+        self._balancer = _Balancer(members, strategy)
+
+    @property
+    def members(self) -> list[AsyncResilientSession]:
+        return list(self._members)
+
+    @property
+    def stats(self) -> types.PoolStats:
+        return self._balancer.stats()
+
+    async def _route(self, request: Callable[[AsyncResilientSession], Awaitable[Any]]) -> Any:
+        index = self._balancer.acquire()
+
+        failed = True
+        try:
+            result = await request(self._members[index])
+            failed = False
+            return result
+        finally:
+            self._balancer.release(index, failed)
+
+    async def call(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> types.Result:
+        return await self._route(lambda member: member.call(procedure, args, kwargs, options))
+
+    async def publish(
+        self, topic: str, args: list[Any] | None = None, kwargs: dict | None = None, options: dict | None = None
+    ) -> None:
+        return await self._route(lambda member: member.publish(topic, args, kwargs, options))
+
+    async def leave(self) -> None:
+        for member in self._members:
+            await member.leave()
@@ -0,0 +1,144 @@
+import functools
+import selectors
+import socket
+import ssl
+import threading
+from dataclasses import dataclass
+from queue import SimpleQueue, Empty
+from typing import Callable
+
+from xconn.transports import RawSocketTransport
+
+
+@dataclass
+class _Watch:
+    transport: RawSocketTransport
+    on_message: Callable[[str | bytes | memoryview], None]
+    on_close: Callable[[], None]
+
+
+class Reactor:
+    """
+    A single thread that multiplexes the reads of many sync rawsocket transports with selectors
+    and hands every message to the callback of its session. Callbacks run on the reactor thread,
+    anything slow in them delays all other transports.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+        # add/remove requests from other threads, applied by the reactor thread so the
+        # selector is only ever touched from there.
+        self._changes: SimpleQueue[tuple[RawSocketTransport, _Watch | None]] = SimpleQueue()
+        self._watches: dict[RawSocketTransport, _Watch] = {}
+
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def supports(transport) -> bool:
+        # TLS may hold decrypted data the selector doesn't know about
+        return isinstance(transport, RawSocketTransport) and not isinstance(transport._sock, ssl.SSLSocket)
+
+    def add(
+        self,
+        transport: RawSocketTransport,
+        on_message: Callable[[str | bytes | memoryview], None],
+        on_close: Callable[[], None],
+    ):
+        transport._reactor = self
+        self._changes.put((transport, _Watch(transport, on_message, on_close)))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="xconn-reactor", daemon=True)
+                self._thread.start()
+
+        self._wakeup()
+
+    def remove(self, transport: RawSocketTransport):
+        """Stop watching transport and close its socket, its on_close callback is still run."""
+        self._changes.put((transport, None))
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except BlockingIOError:
+            # a wakeup is pending already
+            pass
+
+    def _apply_changes(self):
+        while True:
+            try:
+                transport, watch = self._changes.get_nowait()
+            except Empty:
+                return
+
+            if watch is None:
+                self._drop(transport)
+                continue
+
+            try:
+                self._selector.register(transport._sock, selectors.EVENT_READ, watch)
+            except Exception:
+                # e.g. the socket was closed before the reactor got to it, only this transport is lost
+                self._close(transport, watch)
+                continue
+
+            self._watches[transport] = watch
+
+    def _drop(self, transport: RawSocketTransport):
+        watch = self._watches.pop(transport, None)
+        if watch is None:
+            return
+
+        try:
+            self._selector.unregister(transport._sock)
+        except (KeyError, ValueError):
+            # the socket is closed already
+            pass
+
+        self._close(transport, watch)
+
+    @staticmethod
+    def _close(transport: RawSocketTransport, watch: _Watch):
+        transport._reactor = None
+        transport.close()
+
+        try:
+            watch.on_close()
+        except Exception:
+            pass
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    try:
+                        while self._wakeup_recv.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+
+                    self._apply_changes()
+                    continue
+
+                watch: _Watch = key.data
+                if watch.transport not in self._watches:
+                    # dropped earlier in this round
+                    continue
+
+                try:
+                    watch.transport.read_ready(watch.on_message)
+                except Exception:
+                    self._drop(watch.transport)
+
+
+@functools.cache
+def get_reactor() -> Reactor:
+    """The process-wide reactor, its thread starts with the first transport."""
+    return Reactor()
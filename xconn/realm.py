@@ -1,28 +1,36 @@
-from asyncio import gather
-
 from wampproto import dealer, broker, messages
 from wampproto.types import SessionDetails
 
-from xconn import types, uris
+from xconn import passthrough, types, uris
+from xconn.outbound import OutboundQueue
 
 
 class Realm:
-    def __init__(self):
+    def __init__(self, outbound: types.OutboundConfig = types.OutboundConfig()):
         super().__init__()
         self.dealer = dealer.Dealer()
         self.broker = broker.Broker()
 
         self.clients: dict[int, types.IAsyncBaseSession] = {}
+        # everything sent to a client goes through its queue, so a slow one doesn't hold up the realm
+        self._outbound_config = outbound
+        self._outbound: dict[int, OutboundQueue] = {}
 
     def attach_client(self, base: types.IAsyncBaseSession):
         self.clients[base.id] = base
+        self._outbound[base.id] = OutboundQueue(base, self._outbound_config)
 
         details = SessionDetails(base.id, base.realm, base.authid, base.authrole)
         self.dealer.add_session(details)
         self.broker.add_session(details)
 
     def detach_client(self, base: types.IAsyncBaseSession):
-        del self.clients[base.id]
+        # gone already if the client said GOODBYE
+        if self.clients.pop(base.id, None) is None:
+            return
+
+        if (queue := self._outbound.pop(base.id, None)) is not None:
+            queue.cancel()
         self.broker.remove_session(base.id)
         self.dealer.remove_session(base.id)
 
@@ -30,8 +38,42 @@ class Realm:
         """stop will disconnect all clients."""
         pass
 
+    def outbound_stats(self) -> dict[int, types.OutboundStats]:
+        """Outbound queue counters by session id."""
+        return {session_id: queue.stats for session_id, queue in self._outbound.items()}
+
+    async def _send(self, session_id: int, msg: messages.Message):
+        queue = self._outbound[session_id]
+        await queue.put(passthrough.encode(queue.client.serializer, msg))
+
+    async def _cancel_call(self, session_id: int, cancel: messages.Cancel):
+        invocation_id = self.dealer.call_to_invocation_id.pop((session_id, cancel.request_id), None)
+        if invocation_id is None:
+            # already answered
+            return
+
+        pending = self.dealer.pending_calls.pop(invocation_id)
+
+        # the caller gets its error right away, whatever the callee still sends is dropped. That's
+        # killnowait, kill (waiting for the callee) isn't supported and downgraded to it.
+        mode = cancel.options.get("mode", "killnowait")
+        if mode != "skip" and pending.callee_id in self.clients:
+            interrupt = messages.Interrupt(messages.InterruptFields(invocation_id, {"mode": "killnowait"}))
+            await self._send(pending.callee_id, interrupt)
+
+        if session_id in self.clients:
+            error = messages.Error(messages.ErrorFields(messages.Call.TYPE, cancel.request_id, uris.ERROR_CANCELED))
+            await self._send(session_id, error)
+
     async def receive_message(self, session_id: int, msg: messages.Message):
         match msg.TYPE:
+            case messages.Cancel.TYPE:
+                await self._cancel_call(session_id, msg)
+
+            case messages.Yield.TYPE | messages.Error.TYPE if msg.request_id not in self.dealer.pending_calls:
+                # answer to an invocation whose call got cancelled
+                return
+
             case (
                 messages.Call.TYPE
                 | messages.Yield.TYPE
@@ -40,28 +82,38 @@ class Realm:
                 | messages.Error.TYPE
             ):
                 recipient = self.dealer.receive_message(session_id, msg)
-                client = self.clients[recipient.recipient]
-                await client.send_message(recipient.message)
+                if (payload := passthrough.raw_payload(msg)) is not None:
+                    # the dealer passes CALL payloads on to the INVOCATION itself, but not those of YIELD
+                    await self._send(recipient.recipient, passthrough.forward(recipient.message, payload))
+                else:
+                    await self._send(recipient.recipient, recipient.message)
 
             case messages.Publish.TYPE:
                 publication = self.broker.receive_publish(session_id, msg)
 
                 if len(publication.recipients) != 0:
-                    tasks = []
+                    event = publication.event
+                    if (payload := passthrough.raw_payload(msg)) is not None:
+                        event = passthrough.forward(event, payload)
+
+                    # serialize the event once per kind of serializer rather than once per subscriber
+                    encoded: dict[type, bytes | str] = {}
                     for recipient in publication.recipients:
-                        client = self.clients[recipient]
-                        tasks.append(client.send_message(publication.event))
+                        queue = self._outbound[recipient]
+                        serializer = queue.client.serializer
+                        data = encoded.get(type(serializer))
+                        if data is None:
+                            data = encoded[type(serializer)] = passthrough.encode(serializer, event)
 
-                    await gather(*tasks)
+                        # only waits with the BLOCK policy for a subscriber that fell behind
+                        await queue.put(data, event=True)
 
                 if publication.ack is not None:
-                    client = self.clients[publication.ack.recipient]
-                    await client.send_message(publication.ack.message)
+                    await self._send(publication.ack.recipient, publication.ack.message)
 
             case messages.Subscribe.TYPE | messages.Unsubscribe.TYPE:
                 recipient = self.broker.receive_message(session_id, msg)
-                client = self.clients[recipient.recipient]
-                await client.send_message(recipient.message)
+                await self._send(recipient.recipient, recipient.message)
             case messages.Goodbye.TYPE:
                 self.dealer.remove_session(session_id)
                 self.broker.remove_session(session_id)
@@ -70,6 +122,8 @@ class Realm:
                 except KeyError:
                     return
 
+                queue = self._outbound.pop(session_id)
                 goodbye = messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_GOODBYE_AND_OUT))
-                await client.send_message(goodbye)
-                await client.close()
+                await queue.put(client.serializer.serialize(goodbye))
+                # closes the connection once everything queued went out
+                await queue.close()
@@ -0,0 +1,666 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Iterator
+
+from xconn import types
+from xconn.async_session import AsyncSession
+from xconn.dispatch import IAsyncDispatcher, IDispatcher
+from xconn.exception import SessionClosed
+from xconn.session import Session
+
+
+def backoff_delays(config: types.ReconnectConfig) -> Iterator[float]:
+    """Waits before the reconnect attempts: none before the first, then growing exponentially with jitter."""
+    yield 0.0
+
+    delay = config.initial_delay
+    while True:
+        yield delay * (1 - config.jitter * random.random())
+        delay = min(delay * config.multiplier, config.max_delay)
+
+
+def _check_config(config: types.ReconnectConfig):
+    if config.publish_overflow not in (
+        types.OverflowPolicy.BLOCK,
+        types.OverflowPolicy.REJECT,
+        types.OverflowPolicy.DROP_OLDEST,
+        types.OverflowPolicy.DROP_NEWEST,
+    ):
+        raise ValueError(f"unsupported overflow policy for the publish buffer: {config.publish_overflow}")
+
+
+def _dropped(session: Session | AsyncSession, e: Exception) -> bool:
+    # the reader may not have noticed yet when a write to the dead socket fails
+    return session._closed or isinstance(e, OSError)
+
+
+class _Replayed:
+    """A registration or subscription that is made again on every new connection until dropped."""
+
+    def __init__(self, owner: ResilientSession | AsyncResilientSession, make: Callable[[Any], Any]):
+        self._owner = owner
+        # makes the registration/subscription on the session passed
+        self._make = make
+        self._session: Session | AsyncSession | None = None
+        self._inner: Any = None
+
+    def _attach(self, session: Session | AsyncSession, inner: Any):
+        self._session = session
+        self._inner = inner
+
+    def _forget(self) -> Any:
+        """Stop replaying, returns the registration/subscription if it lives on the current connection."""
+        self._owner._handles.pop(self, None)
+        if self._session is not None and self._session is self._owner._session and not self._session._closed:
+            return self._inner
+
+        return None
+
+
+class ResilientRegistration(_Replayed):
+    def unregister(self) -> None:
+        if (registration := self._forget()) is not None:
+            registration.unregister()
+
+
+class ResilientSubscription(_Replayed):
+    def unsubscribe(self) -> None:
+        if (subscription := self._forget()) is not None:
+            subscription.unsubscribe()
+
+
+class AsyncResilientRegistration(_Replayed):
+    async def unregister(self) -> None:
+        if (registration := self._forget()) is not None:
+            await registration.unregister()
+
+
+class AsyncResilientSubscription(_Replayed):
+    async def unsubscribe(self) -> None:
+        if (subscription := self._forget()) is not None:
+            await subscription.unsubscribe()
+
+
+class ResilientSession:
+    """
+    A Session that survives its connection. Once it drops, the session reconnects with jittered
+    backoff, makes all registrations and subscriptions again in one pipelined batch and sends the
+    publishes buffered in the meantime. Calls in flight fail with ConnectionError, unless
+    ReconnectConfig.retry_calls makes them again. New calls wait for the connection.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[Callable[[], None]], Session],
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ):
+        _check_config(config)
+        # opens a new session, taking its disconnect callback
+        self._connect = connect
+        self._config = config
+
+        self._lock = threading.Lock()
+        self._session: Session | None = None
+        self._generation = 0
+        # set while the session is usable, or when waiting for it is pointless
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._reconnecting = False
+        self._closing = False
+        self._error: ConnectionError | None = None
+
+        self._handles: dict[_Replayed, None] = {}
+        self._publishes: deque[tuple[str, list | None, dict | None, dict | None]] = deque()
+        self.stats = types.ReconnectStats()
+
+    @classmethod
+    def create(
+        cls,
+        connect: Callable[[Callable[[], None]], Session],
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ) -> ResilientSession:
+        """Open the first session, failing right away if that's not possible."""
+        resilient = cls(connect, config)
+        resilient._session = connect(resilient._disconnect_callback(0))
+        resilient._ready.set()
+
+        return resilient
+
+    @property
+    def session(self) -> Session | None:
+        """The session of the current connection."""
+        return self._session
+
+    @property
+    def connected(self) -> bool:
+        return self._ready.is_set() and self._error is None and not self._closing and not self._session._closed
+
+    def _disconnect_callback(self, generation: int) -> Callable[[], None]:
+        return lambda: self._lose(generation)
+
+    def _lose(self, generation: int):
+        with self._lock:
+            if generation != self._generation or self._closing or self._reconnecting:
+                return
+
+            self._ready.clear()
+            self._reconnecting = True
+
+        threading.Thread(target=self._reconnect, args=(time.perf_counter(),), daemon=True).start()
+
+    def _reconnect(self, lost_at: float):
+        attempts = 0
+        for delay in backoff_delays(self._config):
+            if self._config.max_attempts is not None and attempts >= self._config.max_attempts:
+                self._give_up(ConnectionError(f"gave up reconnecting after {attempts} attempts"))
+                return
+
+            if self._stop.wait(delay):
+                return
+
+            attempts += 1
+            try:
+                session = self._connect(self._disconnect_callback(self._generation + 1))
+            except Exception:
+                continue
+
+            with self._lock:
+                self._generation += 1
+                self._session = session
+                closing = self._closing
+
+            if closing:
+                session.leave()
+                return
+
+            if self._restore(session):
+                self.stats.reconnects += 1
+                self.stats.last_recovery = time.perf_counter() - lost_at
+                return
+
+    def _restore(self, session: Session) -> bool:
+        # send all registrations and subscriptions before waiting for any of them
+        pending: list[tuple[_Replayed, Future]] = []
+        for handle in list(self._handles):
+            try:
+                pending.append((handle, handle._make(session)))
+            except Exception as e:
+                if session._closed:
+                    return False
+
+                print(f"failed to restore {handle.__class__.__name__}: {e}")
+
+        for handle, f in pending:
+            try:
+                handle._attach(session, f.result())
+            except Exception as e:
+                if session._closed:
+                    return False
+
+                print(f"failed to restore {handle.__class__.__name__}: {e}")
+
+        while True:
+            with self._lock:
+                if not self._publishes:
+                    if session._closed:
+                        return False
+
+                    self._reconnecting = False
+                    self._ready.set()
+                    return True
+
+                publish = self._publishes.popleft()
+
+            try:
+                session.publish(*publish)
+            except Exception as e:
+                if session._closed:
+                    with self._lock:
+                        self._publishes.appendleft(publish)
+
+                    return False
+
+                print(f"failed to send buffered publication: {e}")
+                self.stats.dropped_publishes += 1
+
+    def _give_up(self, error: ConnectionError):
+        with self._lock:
+            self._error = error
+            self.stats.dropped_publishes += len(self._publishes)
+            self._publishes.clear()
+            self._reconnecting = False
+            self._ready.set()
+
+    def _wait_connected(self, deadline: float | None = None) -> Session:
+        while True:
+            if self._closing:
+                raise ConnectionError("session left")
+
+            if self._error is not None:
+                raise self._error
+
+            if self._ready.is_set():
+                session = self._session
+                if not session._closed:
+                    return session
+
+                # pending requests are failed before the disconnect callbacks run
+                self._lose(self._generation)
+
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not self._ready.wait(timeout):
+                raise TimeoutError("not connected")
+
+    def _retry(self, request: Callable[[Session, dict | None], Any], options: dict | None) -> Any:
+        timeout = options.get("timeout") if options is not None else None
+        deadline = None if not timeout else time.monotonic() + timeout / 1000
+        while True:
+            session = self._wait_connected(deadline)
+            if deadline is not None:
+                # the wait for the connection counts towards the timeout
+                options = {**options, "timeout": max(int((deadline - time.monotonic()) * 1000), 1)}
+
+            try:
+                return request(session, options)
+            except Exception as e:
+                # refused by a session that closed after the wait, never sent, so it waits like a new call
+                if not isinstance(e, SessionClosed) and not (self._config.retry_calls and _dropped(session, e)):
+                    raise
+
+                if not session._closed:
+                    time.sleep(self._config.initial_delay)
+
+    def call(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> types.Result:
+        return self._retry(lambda session, opts: session.call(procedure, args, kwargs, opts), options)
+
+    def register(
+        self,
+        procedure: str,
+        invocation_handler: Callable[[types.Invocation], types.Result],
+        options: dict | None = None,
+        dispatcher: IDispatcher | None = None,
+    ) -> ResilientRegistration:
+        handle = ResilientRegistration(
+            self, lambda session: session.register_async(procedure, invocation_handler, options, dispatcher)
+        )
+        self._replay(handle)
+
+        return handle
+
+    def subscribe(
+        self,
+        topic: str,
+        event_handler: Callable[[types.Event], None],
+        options: dict | None = None,
+        dispatcher: IDispatcher | None = None,
+    ) -> ResilientSubscription:
+        handle = ResilientSubscription(
+            self, lambda session: session.subscribe_async(topic, event_handler, options, dispatcher)
+        )
+        self._replay(handle)
+
+        return handle
+
+    def _replay(self, handle: _Replayed):
+        self._handles[handle] = None
+        session = self._wait_connected()
+        if handle._session is session:
+            # a reconnect in between made it already
+            return
+
+        try:
+            handle._attach(session, handle._make(session).result())
+        except Exception as e:
+            if not _dropped(session, e):
+                self._handles.pop(handle, None)
+                raise
+
+    def publish(self, topic: str, args: list[Any] = None, kwargs: dict = None, options: dict = None):
+        """
+        Publish to topic. While disconnected, publications are buffered and sent after the reconnect,
+        acknowledged ones wait for the connection instead, just like calls.
+        """
+        if options is not None and options.get("acknowledge", False):
+            return self._retry(lambda session, opts: session.publish(topic, args, kwargs, opts), None)
+
+        with self._lock:
+            if self._closing:
+                raise ConnectionError("session left")
+
+            if self._error is not None:
+                raise self._error
+
+            session = self._session if self._ready.is_set() else None
+
+        if session is not None and not session._closed:
+            try:
+                session.publish(topic, args, kwargs, options)
+                return
+            except Exception as e:
+                if not _dropped(session, e):
+                    raise
+
+        with self._lock:
+            if len(self._publishes) < self._config.publish_buffer:
+                self._publishes.append((topic, args, kwargs, options))
+                return
+
+            match self._config.publish_overflow:
+                case types.OverflowPolicy.DROP_OLDEST:
+                    self._publishes.popleft()
+                    self._publishes.append((topic, args, kwargs, options))
+                    self.stats.dropped_publishes += 1
+                    return
+                case types.OverflowPolicy.DROP_NEWEST:
+                    self.stats.dropped_publishes += 1
+                    return
+                case types.OverflowPolicy.REJECT:
+                    self.stats.dropped_publishes += 1
+                    raise ConnectionError("not connected and the publish buffer is full")
+
+        # OverflowPolicy.BLOCK
+        self._wait_connected()
+        self.publish(topic, args, kwargs, options)
+
+    def leave(self):
+        with self._lock:
+            self._closing = True
+            self.stats.dropped_publishes += len(self._publishes)
+            self._publishes.clear()
+            session = self._session
+
+        self._stop.set()
+        self._ready.set()
+        if session is not None and not session._closed:
+            session.leave()
+
+
+class AsyncResilientSession:
+    """
+    An AsyncSession that survives its connection. Once it drops, the session reconnects with jittered
+    backoff, makes all registrations and subscriptions again in one pipelined batch and sends the
+    publishes buffered in the meantime. Calls in flight fail with ConnectionError, unless
+    ReconnectConfig.retry_calls makes them again. New calls wait for the connection.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[Callable[[], Awaitable[None]]], Awaitable[AsyncSession]],
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ):
+        _check_config(config)
+        # opens a new session, taking its disconnect callback
+        self._connect = connect
+        self._config = config
+
+        self._session: AsyncSession | None = None
+        self._generation = 0
+        # set while the session is usable, or when waiting for it is pointless
+        self._ready = asyncio.Event()
+        self._reconnect_task: asyncio.Task[None] | None = None
+        self._closing = False
+        self._error: ConnectionError | None = None
+
+        self._handles: dict[_Replayed, None] = {}
+        self._publishes: deque[tuple[str, list | None, dict | None, dict | None]] = deque()
+        self.stats = types.ReconnectStats()
+
+    @classmethod
+    async def create(
+        cls,
+        connect: Callable[[Callable[[], Awaitable[None]]], Awaitable[AsyncSession]],
+        config: types.ReconnectConfig = types.ReconnectConfig(),
+    ) -> AsyncResilientSession:
+        """Open the first session, failing right away if that's not possible."""
+        resilient = cls(connect, config)
+        resilient._session = await connect(resilient._disconnect_callback(0))
+        resilient._ready.set()
+
+        return resilient
+
+    @property
+    def session(self) -> AsyncSession | None:
+        """The session of the current connection."""
+        return self._session
+
+    @property
+    def connected(self) -> bool:
+        return self._ready.is_set() and self._error is None and not self._closing and not self._session._closed
+
+    def _disconnect_callback(self, generation: int) -> Callable[[], Awaitable[None]]:
+        async def callback():
+            self._lose(generation)
+
+        return callback
+
+    def _lose(self, generation: int):
+        if generation != self._generation or self._closing:
+            return
+
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            return
+
+        self._ready.clear()
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect(time.perf_counter()))
+
+    async def _reconnect(self, lost_at: float):
+        attempts = 0
+        for delay in backoff_delays(self._config):
+            if self._config.max_attempts is not None and attempts >= self._config.max_attempts:
+                self._give_up(ConnectionError(f"gave up reconnecting after {attempts} attempts"))
+                return
+
+            await asyncio.sleep(delay)
+
+            attempts += 1
+            try:
+                session = await self._connect(self._disconnect_callback(self._generation + 1))
+            except Exception:
+                continue
+
+            self._generation += 1
+            self._session = session
+
+            if await self._restore(session):
+                self.stats.reconnects += 1
+                self.stats.last_recovery = time.perf_counter() - lost_at
+                return
+
+    async def _restore(self, session: AsyncSession) -> bool:
+        async def replay(handle: _Replayed):
+            handle._attach(session, await handle._make(session))
+
+        # send all registrations and subscriptions before waiting for any of them
+        handles = list(self._handles)
+        results = await asyncio.gather(*(replay(handle) for handle in handles), return_exceptions=True)
+        if session._closed:
+            return False
+
+        for handle, result in zip(handles, results):
+            if isinstance(result, Exception):
+                print(f"failed to restore {handle.__class__.__name__}: {result}")
+
+        while self._publishes:
+            publish = self._publishes.popleft()
+            try:
+                await session.publish(*publish)
+            except Exception as e:
+                if session._closed:
+                    self._publishes.appendleft(publish)
+                    return False
+
+                print(f"failed to send buffered publication: {e}")
+                self.stats.dropped_publishes += 1
+
+        if session._closed:
+            return False
+
+        self._ready.set()
+        return True
+
+    def _give_up(self, error: ConnectionError):
+        self._error = error
+        self.stats.dropped_publishes += len(self._publishes)
+        self._publishes.clear()
+        self._ready.set()
+
+    async def _wait_connected(self, deadline: float | None = None) -> AsyncSession:
+        while True:
+            if self._closing:
+                raise ConnectionError("session left")
+
+            if self._error is not None:
+                raise self._error
+
+            if self._ready.is_set():
+                session = self._session
+                if not session._closed:
+                    return session
+
+                # pending requests are failed before the disconnect callbacks run
+                self._lose(self._generation)
+                continue
+
+            if deadline is None:
+                await self._ready.wait()
+            else:
+                await asyncio.wait_for(self._ready.wait(), max(deadline - time.monotonic(), 0))
+
+    async def _retry(self, request: Callable[[AsyncSession, dict | None], Awaitable[Any]], options: dict | None) -> Any:
+        timeout = options.get("timeout") if options is not None else None
+        deadline = None if not timeout else time.monotonic() + timeout / 1000
+        while True:
+            session = await self._wait_connected(deadline)
+            if deadline is not None:
+                # the wait for the connection counts towards the timeout
+                options = {**options, "timeout": max(int((deadline - time.monotonic()) * 1000), 1)}
+
+            try:
+                return await request(session, options)
+            except Exception as e:
+                if not (self._config.retry_calls and _dropped(session, e)):
+                    raise
+
+                if not session._closed:
+                    await asyncio.sleep(self._config.initial_delay)
+
+    async def call(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> types.Result:
+        return await self._retry(lambda session, opts: session.call(procedure, args, kwargs, opts), options)
+
+    async def register(
+        self,
+        procedure: str,
+        invocation_handler: Callable[[types.Invocation], Awaitable[types.Result]],
+        options: dict | None = None,
+    ) -> AsyncResilientRegistration:
+        handle = AsyncResilientRegistration(
+            self, lambda session: session.register(procedure, invocation_handler, options)
+        )
+        await self._replay(handle)
+
+        return handle
+
+    async def subscribe(
+        self,
+        topic: str,
+        event_handler: Callable[[types.Event], Awaitable[None]],
+        options: dict | None = None,
+        dispatcher: IAsyncDispatcher | None = None,
+    ) -> AsyncResilientSubscription:
+        handle = AsyncResilientSubscription(
+            self, lambda session: session.subscribe(topic, event_handler, options, dispatcher)
+        )
+        await self._replay(handle)
+
+        return handle
+
+    async def _replay(self, handle: _Replayed):
+        self._handles[handle] = None
+        session = await self._wait_connected()
+        if handle._session is session:
+            # a reconnect in between made it already
+            return
+
+        try:
+            handle._attach(session, await handle._make(session))
+        except Exception as e:
+            if not _dropped(session, e):
+                self._handles.pop(handle, None)
+                raise
+
+    async def publish(
+        self, topic: str, args: list[Any] | None = None, kwargs: dict | None = None, options: dict | None = None
+    ) -> None:
+        """
+        Publish to topic. While disconnected, publications are buffered and sent after the reconnect,
+        acknowledged ones wait for the connection instead, just like calls.
+        """
+        if options is not None and options.get("acknowledge", False):
+            return await self._retry(lambda session, opts: session.publish(topic, args, kwargs, opts), None)
+
+        if self._closing:
+            raise ConnectionError("session left")
+
+        if self._error is not None:
+            raise self._error
+
+        session = self._session
+        if self._ready.is_set() and not session._closed:
+            try:
+                await session.publish(topic, args, kwargs, options)
+                return
+            except Exception as e:
+                if not _dropped(session, e):
+                    raise
+
+        if len(self._publishes) < self._config.publish_buffer:
+            self._publishes.append((topic, args, kwargs, options))
+            return
+
+        match self._config.publish_overflow:
+            case types.OverflowPolicy.DROP_OLDEST:
+                self._publishes.popleft()
+                self._publishes.append((topic, args, kwargs, options))
+                self.stats.dropped_publishes += 1
+            case types.OverflowPolicy.DROP_NEWEST:
+                self.stats.dropped_publishes += 1
+            case types.OverflowPolicy.REJECT:
+                self.stats.dropped_publishes += 1
+                raise ConnectionError("not connected and the publish buffer is full")
+            case types.OverflowPolicy.BLOCK:
+                await self._wait_connected()
+                await self.publish(topic, args, kwargs, options)
+
+    async def leave(self) -> None:
+        self._closing = True
+        self.stats.dropped_publishes += len(self._publishes)
+        self._publishes.clear()
+        self._ready.set()
+
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+
+        if self._session is not None and not self._session._closed:
+            await self._session.leave()
@@ -1,15 +1,19 @@
 from wampproto import messages
 
-from xconn import realm, types
+from xconn import passthrough, realm, types
 
 
 class Router:
-    def __init__(self):
+    def __init__(self, outbound: types.OutboundConfig = types.OutboundConfig(), payload_passthrough: bool = False):
         super().__init__()
         self.realms: dict[str, realm.Realm] = {}
+        # bound and overflow policy of the per client outbound queues
+        self.outbound = outbound
+        # only decode the envelope of CALL, YIELD and PUBLISH, their args and kwargs are forwarded as they came
+        self.payload_passthrough = payload_passthrough
 
     def add_realm(self, name: str):
-        self.realms[name] = realm.Realm()
+        self.realms[name] = realm.Realm(self.outbound)
 
     def remove_realm(self, name: str):
         del self.realms[name]
@@ -29,6 +33,13 @@ class Router:
 
         self.realms[base_session.realm].detach_client(base_session)
 
+    def decode(self, base_session: types.IAsyncBaseSession, data: bytes | str) -> messages.Message:
+        """Deserialize a message a client sent, see payload_passthrough."""
+        if self.payload_passthrough:
+            return passthrough.decode(base_session.serializer, data)
+
+        return base_session.serializer.deserialize(data)
+
     async def receive_message(self, base_session: types.IAsyncBaseSession, msg: messages.Message):
         if base_session.realm not in self.realms:
             raise ValueError(f"cannot process message for non-existent realm {base_session.realm}")
@@ -1,19 +1,87 @@
+import asyncio
 import pathlib
 import socket
+from typing import Callable
 
 import aiohttp
 from aiohttp import web
 from wampproto.auth import IServerAuthenticator
+from wampproto.transports.rawsocket import (
+    MAGIC,
+    SERIALIZER_TYPE_CBOR,
+    SERIALIZER_TYPE_JSON,
+    SERIALIZER_TYPE_MSGPACK,
+)
 
 from xconn import helpers
+from xconn.compression import DeflateConfig, CompressionStats
 from xconn.router import Router
-from xconn.acceptor import AIOHttpAcceptor
+from xconn.acceptor import AIOHttpAcceptor, AsyncRawSocketAcceptor
+from xconn.shm import AsyncShmRawSocketTransport
+from xconn.transports import AsyncBufferedRawSocketTransport, RawSocketProtocol
+from xconn.types import TransportConfig
+
+
+class _ProtocolSniffer(asyncio.Protocol):
+    """
+    Hands a connection over to rawsocket or HTTP once the client sent its first bytes, rawsocket
+    handshakes always start with the 0x7F magic byte.
+    """
+
+    def __init__(
+        self,
+        rawsocket: Callable[[], asyncio.BufferedProtocol],
+        http: Callable[[], asyncio.Protocol],
+    ):
+        self._rawsocket = rawsocket
+        self._http = http
+        self._transport: asyncio.Transport | None = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self._transport = transport
+
+    def data_received(self, data: bytes):
+        if data[0] == MAGIC:
+            protocol = self._rawsocket()
+        else:
+            protocol = self._http()
+
+        self._transport.set_protocol(protocol)
+        protocol.connection_made(self._transport)
+
+        if isinstance(protocol, asyncio.BufferedProtocol):
+            view = memoryview(data)
+            while view:
+                buffer = protocol.get_buffer(len(view))
+                n = min(len(buffer), len(view))
+                buffer[:n] = view[:n]
+                protocol.buffer_updated(n)
+                view = view[n:]
+        else:
+            protocol.data_received(data)
+
+    def connection_lost(self, exc: Exception | None):
+        pass
 
 
 class Server:
-    def __init__(self, router: Router, authenticator: IServerAuthenticator = None):
+    def __init__(
+        self,
+        router: Router,
+        authenticator: IServerAuthenticator = None,
+        compression: DeflateConfig | None = None,
+        rawsocket_config: TransportConfig = TransportConfig(coalesce_writes=True),
+    ):
         self.router = router
         self.authenticator = authenticator
+        # per-message-deflate offered to clients, None disables compression. Off by default, it
+        # relies on undocumented parts of aiohttp to apply the threshold and level.
+        self.compression = compression
+        # outgoing byte counters summed over all websocket clients
+        self.compression_stats = CompressionStats()
+        # write settings for rawsocket clients, keepalive pings are left to the clients
+        self.rawsocket_config = rawsocket_config
+        self._rawsocket_tasks: set[asyncio.Task] = set()
 
     async def _websocket_handler(self, request):
         protocols = ["wamp.2.json", "wamp.2.cbor", "wamp.2.msgpack"]
@@ -23,28 +91,33 @@ class Server:
         except (ImportError, AttributeError):
             pass
 
-        ws = web.WebSocketResponse(protocols=protocols)
+        ws = web.WebSocketResponse(protocols=protocols, compress=self.compression is not None)
         # upgrade this connection to websocket.
         await ws.prepare(request)
 
         try:
-            acceptor = AIOHttpAcceptor(self.authenticator)
+            acceptor = AIOHttpAcceptor(self.authenticator, self.compression, self.compression_stats)
             base_session = await acceptor.accept(ws)
             self.router.attach_client(base_session)
         except Exception:
             await ws.close()
+            return ws
 
-        while not ws.closed:
-            msg = await ws.receive()
+        try:
+            while not ws.closed:
+                msg = await ws.receive()
 
-            if msg.type == aiohttp.WSMsgType.TEXT or msg.type == aiohttp.WSMsgType.BINARY:
-                msg = base_session.serializer.deserialize(msg.data)
-                await self.router.receive_message(base_session, msg)
-            elif msg.type == aiohttp.WSMsgType.ERROR:
-                print(f"Error: {msg.exception()}")
-            elif msg.type == aiohttp.WSMsgType.CLOSE:
-                print("Client disconnected")
-                break
+                if msg.type == aiohttp.WSMsgType.TEXT or msg.type == aiohttp.WSMsgType.BINARY:
+                    msg = self.router.decode(base_session, msg.data)
+                    await self.router.receive_message(base_session, msg)
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    print(f"Error: {msg.exception()}")
+                elif msg.type == aiohttp.WSMsgType.CLOSE:
+                    print("Client disconnected")
+                    break
+        finally:
+            # stops the writer of the client's outbound queue
+            self.router.detach_client(base_session)
 
         return ws
 
@@ -84,6 +157,115 @@ class Server:
         site = web.SockSite(runner, sock)
         await site.start()
 
+    def _rawsocket_protocol(self) -> RawSocketProtocol:
+        protocol = RawSocketProtocol()
+        task = asyncio.get_running_loop().create_task(self._rawsocket_handler(protocol))
+        self._rawsocket_tasks.add(task)
+        task.add_done_callback(self._rawsocket_tasks.discard)
+        return protocol
+
+    async def _rawsocket_handler(self, protocol: RawSocketProtocol):
+        rs_serializers = [SERIALIZER_TYPE_JSON, SERIALIZER_TYPE_MSGPACK, SERIALIZER_TYPE_CBOR]
+        try:
+            if helpers._CAPNP_AVAILABLE:
+                rs_serializers.append(helpers.SERIALIZER_TYPE_CAPNPROTO)
+        except (ImportError, AttributeError):
+            pass
+
+        try:
+            transport, serializer = await AsyncBufferedRawSocketTransport.accept(
+                protocol, rs_serializers, config=self.rawsocket_config
+            )
+            acceptor = AsyncRawSocketAcceptor(self.authenticator)
+            base_session = await acceptor.accept(transport, helpers.get_rs_serializer(serializer))
+            self.router.attach_client(base_session)
+        except Exception:
+            protocol.close()
+            return
+
+        try:
+            while True:
+                for data in await transport.read_batch():
+                    msg = self.router.decode(base_session, data)
+                    await self.router.receive_message(base_session, msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # a client that doesn't speak WAMP, or a router bug, either way the connection is done
+            print(f"Error: {e!r}")
+        finally:
+            self.router.detach_client(base_session)
+
+            await transport.close()
+
+    async def _rawsocket_factory(self, websocket_path: str | None) -> Callable[[], asyncio.BaseProtocol]:
+        if websocket_path is None:
+            return self._rawsocket_protocol
+
+        app = web.Application()
+        app.router.add_get(websocket_path, self._websocket_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        return lambda: _ProtocolSniffer(self._rawsocket_protocol, runner.server)
+
+    async def start_rawsocket(self, host: str, port: int, websocket: bool = False) -> None:
+        """
+        Accept rs:// clients on a TCP port. With websocket enabled, websocket clients can connect
+        to /ws on the same port, connections are told apart by their first byte.
+        """
+        print(f"starting rawsocket server on {host}:{port}")
+
+        factory = await self._rawsocket_factory("/ws" if websocket else None)
+        await asyncio.get_running_loop().create_server(factory, host, port)
+
+    async def start_unix_rawsocket(self, socket_path: str, websocket: bool = False) -> None:
+        """Accept unix+rs:// clients on a unix socket, with websocket enabled unix+ws:// ones as well."""
+        if self._is_unix_socket_alive(socket_path):
+            raise RuntimeError(f"Socket at {socket_path} is already in use")
+
+        pathlib.Path(socket_path).unlink(missing_ok=True)
+
+        print(f"Listening on unix+rs://{socket_path}")
+
+        factory = await self._rawsocket_factory("/" if websocket else None)
+        await asyncio.get_running_loop().create_unix_server(factory, socket_path)
+
+    async def _shm_handler(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            transport = await AsyncShmRawSocketTransport.accept(reader, writer)
+            acceptor = AsyncRawSocketAcceptor(self.authenticator)
+            base_session = await acceptor.accept(transport, helpers.get_rs_serializer(transport.protocol))
+            self.router.attach_client(base_session)
+        except Exception:
+            writer.close()
+            return
+
+        try:
+            while await transport.is_connected():
+                msg = self.router.decode(base_session, await transport.read())
+                await self.router.receive_message(base_session, msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.router.detach_client(base_session)
+
+            await transport.close()
+
+    async def start_shm_server(self, socket_path: str) -> None:
+        """
+        Accept shm+rs:// clients on a unix socket. The server creates two shared memory rings for
+        each client, the socket only carries the handshake and wakeups.
+        """
+        if self._is_unix_socket_alive(socket_path):
+            raise RuntimeError(f"Socket at {socket_path} is already in use")
+
+        pathlib.Path(socket_path).unlink(missing_ok=True)
+
+        print(f"Listening on shm+rs://{socket_path}")
+
+        await asyncio.start_unix_server(self._shm_handler, socket_path)
+
     def _is_unix_socket_alive(self, socket_path: str, timeout: float = 1.0) -> bool:
         try:
             with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
@@ -1,22 +1,131 @@
 from __future__ import annotations
 
-from concurrent.futures import Future, ThreadPoolExecutor, wait
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
+from queue import SimpleQueue, Empty
+import inspect
 import threading
+import time
 from os import cpu_count
-from typing import Callable, Any
+from typing import Callable, Any, Sequence, Generator, Iterator
 from dataclasses import dataclass
 
-from wampproto import messages, session, uris
+from wampproto import messages, serializers, uris
 
 from xconn import types, exception, uris as xconn_uris
-from xconn.exception import ApplicationError
-from xconn.helpers import exception_from_error, SessionScopeIDGenerator
+from xconn.dispatch import IDispatcher, PoolDispatcher, shared_dispatcher
+from xconn.exception import ApplicationError, DispatchRejected, SessionClosed, StreamOverflow
+from xconn.reactor import Reactor, get_reactor
+from xconn.helpers import exception_from_error, progressive_yield, SessionScopeIDGenerator, WAMPSession
+
+
+class _Passthrough:
+    def serialize(self, msg: messages.Message) -> messages.Message:
+        return msg
+
+
+class _LockedWAMPSession(WAMPSession):
+    """
+    WAMPSession that can be shared by caller, reader and handler threads without relying on the
+    GIL. Only its request bookkeeping runs under the lock, (de)serialization happens outside.
+    """
+
+    def __init__(self, serializer: serializers.Serializer):
+        super().__init__(_Passthrough())
+        self._message_serializer = serializer
+        self._lock = threading.Lock()
+
+    def send_message(self, msg: messages.Message) -> bytes:
+        with self._lock:
+            super().send_message(msg)
+
+        return self._message_serializer.serialize(msg)
+
+    def receive(self, data: bytes) -> messages.Message:
+        msg = self._message_serializer.deserialize(data)
+        with self._lock:
+            return self.receive_message(msg)
+
+
+def _call_timeout(options: dict[str, Any] | None) -> float | None:
+    if options is None or not options.get("timeout"):
+        return None
+
+    return options["timeout"] / 1000
+
+
+def _timed_out() -> Future[types.Result]:
+    failed: Future[types.Result] = Future()
+    failed.set_exception(TimeoutError("call timed out"))
+    return failed
+
+
+class _ResultStream:
+    """
+    Progressive results of one call_stream(), bounded: the session's reader never waits for the
+    consumer, a result arriving while maxsize are buffered is refused instead.
+    """
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._items: deque[types.Result] = deque()
+        self._cond = threading.Condition()
+        self._finished = False
+        self._error: Exception | None = None
+        self._closed = False
+
+    def put(self, result: types.Result) -> bool:
+        """Buffer result, False if the buffer is full."""
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                return False
+
+            if not self._closed:
+                self._items.append(result)
+                self._cond.notify_all()
+
+            return True
+
+    def finish(self, error: Exception | None = None, last: types.Result | None = None):
+        with self._cond:
+            if last is not None and not self._closed:
+                self._items.append(last)
+
+            self._finished = True
+            self._error = error
+            self._cond.notify_all()
+
+    def close(self):
+        """The consumer is gone, stop buffering."""
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+    def get(self, deadline: float | None) -> types.Result | None:
+        """Next result, None once the stream ended."""
+        with self._cond:
+            while not self._items and not self._finished:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    raise TimeoutError("call timed out")
+
+                self._cond.wait(timeout)
+
+            if self._items:
+                return self._items.popleft()
+
+            if self._error is not None:
+                raise self._error
+
+            return None
 
 
 @dataclass
 class RegisterRequest:
     future: Future[Registration]
     endpoint: Callable | Callable[[types.Invocation], types.Result]
+    dispatcher: IDispatcher | None = None
 
 
 class Registration:
@@ -32,6 +141,7 @@ class Registration:
 class SubscribeRequest:
     future: Future[Subscription]
     endpoint: Callable[[types.Event], None]
+    dispatcher: IDispatcher | None = None
 
 
 class Subscription:
@@ -44,17 +154,26 @@ class Subscription:
 
 
 class Session:
-    def __init__(self, base_session: types.BaseSession):
+    def __init__(
+        self,
+        base_session: types.BaseSession,
+        coalesce_writes: bool = False,
+        dispatcher: IDispatcher | None = None,
+        reactor: bool = False,
+    ):
         # RPC data structures
         self._call_requests: dict[int, Future[types.Result]] = {}
         self._register_requests: dict[int, RegisterRequest] = {}
-        self._registrations: dict[int, Callable[[types.Invocation], types.Result]] = {}
+        self._registrations: dict[int, tuple[Callable[[types.Invocation], types.Result], IDispatcher]] = {}
         self._unregister_requests: dict[int, types.UnregisterRequest] = {}
+        self._stream_requests: dict[int, _ResultStream] = {}
+        # invocations whose handler didn't answer yet, by request id, so INTERRUPT can reach them
+        self._invocations: dict[int, types.Invocation] = {}
 
         # PubSub data structures
         self._publish_requests: dict[int, Future[None]] = {}
         self._subscribe_requests: dict[int, SubscribeRequest] = {}
-        self._subscriptions: dict[int, Callable[[types.Event], None]] = {}
+        self._subscriptions: dict[int, tuple[Callable[[types.Event], None], IDispatcher]] = {}
         self._unsubscribe_requests: dict[int, types.UnsubscribeRequest] = {}
 
         self._goodbye_request = Future()
@@ -64,17 +183,91 @@ class Session:
 
         self._base_session = base_session
 
-        # initialize the sans-io wamp session
-        self._session = session.WAMPSession(base_session.serializer)
+        # initialize the sans-io wamp session. The dicts above are only ever touched with single
+        # get/set/pop operations, which are atomic with and without the GIL; the sans-io session
+        # does compound updates and brings its own lock.
+        self._session = _LockedWAMPSession(base_session.serializer)
 
         self._disconnect_callback: list[Callable[[], None] | None] = []
         self._stopped = threading.Event()
+        # set once the connection is gone, before pending requests are failed
+        self._closed = False
+
+        # runs invocation and event handlers unless a registration/subscription brings its own,
+        # sessions on the reactor share one pool instead of bringing their own threads
+        self._owns_dispatcher = dispatcher is None and not reactor
+        if dispatcher is None:
+            if reactor:
+                dispatcher = shared_dispatcher()
+            else:
+                dispatcher = PoolDispatcher(ThreadPoolExecutor(max_workers=(cpu_count() or 1) * 4), owned=True)
+        self._dispatcher = dispatcher
+
+        # when coalescing, messages from all threads are queued and written by a single writer thread,
+        # everything that piled up while the previous write was in progress goes out in one syscall.
+        self._write_queue: SimpleQueue[bytes | str | None] | None = None
+        self._write_error: Exception | None = None
+        if coalesce_writes:
+            self._write_queue = SimpleQueue()
+            threading.Thread(target=self._write_loop, daemon=True).start()
+
+        # with the reactor a single thread reads all rawsocket sessions of the process
+        if reactor and Reactor.supports(base_session.transport):
+            get_reactor().add(base_session.transport, self._on_reactor_message, self._on_reactor_close)
+        else:
+            thread = threading.Thread(target=self._wait, daemon=True)
+            thread.start()
+
+    def _check_writable(self):
+        # requests are registered before they are sent, once this passed a closing session fails them
+        if self._write_error is not None:
+            raise SessionClosed("connection closed") from self._write_error
+
+        if self._closed:
+            raise SessionClosed("connection closed")
 
-        # callback executor thread-pool
-        self._executor = ThreadPoolExecutor(max_workers=(cpu_count() or 1) * 4)
+    def _send(self, data: bytes | str):
+        self._check_writable()
+        if self._write_queue is None:
+            self._base_session.send(data)
+            return
+
+        self._write_queue.put(data)
+
+    def _send_many(self, data: list[bytes | str]):
+        self._check_writable()
+        if self._write_queue is None:
+            self._base_session.send_many(data)
+            return
+
+        for item in data:
+            self._write_queue.put(item)
 
-        thread = threading.Thread(target=self._wait, daemon=True)
-        thread.start()
+    def _write_loop(self):
+        while True:
+            batch = [self._write_queue.get()]
+            try:
+                while True:
+                    batch.append(self._write_queue.get_nowait())
+            except Empty:
+                pass
+
+            stop = None in batch
+            if stop:
+                batch = [data for data in batch if data is not None]
+
+            if batch:
+                try:
+                    self._base_session.send_many(batch)
+                except Exception as e:
+                    self._write_error = e
+                    # the requests of the batch are gone, don't leave their callers waiting
+                    self._fail_pending_requests()
+                    self._base_session.close()
+                    return
+
+            if stop:
+                return
 
     def _wait(self):
         while self._base_session.transport.is_connected():
@@ -85,8 +278,54 @@ class Session:
 
             self._process_incoming_message(self._session.receive(data))
 
-        # Shut down executor, cancelling anything still running
-        self._executor.shutdown(cancel_futures=True, wait=False)
+        self._cleanup()
+
+    def _fail_pending_requests(self):
+        """Nothing answers requests of a closed session anymore, fail them instead of waiting forever."""
+        for request_id in list(self._call_requests):
+            f = self._call_requests.pop(request_id, None)
+            if f is not None and f.set_running_or_notify_cancel():
+                f.set_exception(ConnectionError("connection closed before the call returned"))
+
+        for request_id in list(self._stream_requests):
+            if (stream := self._stream_requests.pop(request_id, None)) is not None:
+                stream.finish(ConnectionError("connection closed before the stream ended"))
+
+        for requests in (
+            self._register_requests,
+            self._unregister_requests,
+            self._subscribe_requests,
+            self._unsubscribe_requests,
+        ):
+            for request_id in list(requests):
+                if (request := requests.pop(request_id, None)) is not None and not request.future.done():
+                    request.future.set_exception(ConnectionError("connection closed"))
+
+        for request_id in list(self._publish_requests):
+            if (f := self._publish_requests.pop(request_id, None)) is not None and not f.done():
+                f.set_exception(ConnectionError("connection closed before the publication was acknowledged"))
+
+        if not self._goodbye_request.done():
+            self._goodbye_request.set_result(None)
+
+    def _on_reactor_message(self, data: bytes | str | memoryview):
+        self._process_incoming_message(self._session.receive(data))
+
+    def _on_reactor_close(self):
+        # disconnect callbacks may take a while, keep them off the reactor thread
+        threading.Thread(target=self._cleanup, daemon=True).start()
+
+    def _cleanup(self):
+        self._closed = True
+        # Shut down our own dispatcher, cancelling anything still queued. Dispatchers passed in
+        # by the user may be shared with other sessions, those are theirs to shut down.
+        if self._owns_dispatcher:
+            self._dispatcher.shutdown()
+
+        if self._write_queue is not None:
+            self._write_queue.put(None)
+
+        self._fail_pending_requests()
 
         if self._disconnect_callback:
             with ThreadPoolExecutor(max_workers=len(self._disconnect_callback)) as executor:
@@ -97,9 +336,23 @@ class Session:
 
         self._stopped.set()
 
-    def _handle_invocation(self, msg: messages.Invocation, endpoint: Callable[[types.Invocation], types.Result]):
+    def _handle_invocation(
+        self,
+        msg: messages.Invocation,
+        invocation: types.Invocation,
+        endpoint: Callable[[types.Invocation], types.Result],
+    ):
         try:
-            result = endpoint(types.Invocation(msg.args, msg.kwargs, msg.details))
+            if invocation.interrupted.is_set():
+                raise ApplicationError(xconn_uris.ERROR_CANCELED)
+
+            result = endpoint(invocation)
+            if inspect.isgenerator(result):
+                result = self._yield_progress(msg, invocation, result)
+
+            # the caller is gone, the router drops the result anyway
+            if invocation.interrupted.is_set():
+                raise ApplicationError(xconn_uris.ERROR_CANCELED)
 
             if result is None:
                 data = self._session.send_message(messages.Yield(messages.YieldFields(msg.request_id)))
@@ -116,49 +369,104 @@ class Session:
                 )
                 data = self._session.send_message(msg_to_send)
 
-            self._base_session.send(data)
+            self._send(data)
         except ApplicationError as e:
             msg_to_send = messages.Error(messages.ErrorFields(msg.TYPE, msg.request_id, e.message, e.args))
             data = self._session.send_message(msg_to_send)
-            self._base_session.send(data)
+            self._send(data)
         except Exception as e:
             msg_to_send = messages.Error(
                 messages.ErrorFields(msg.TYPE, msg.request_id, xconn_uris.ERROR_RUNTIME_ERROR, [e.__str__()])
             )
             data = self._session.send_message(msg_to_send)
-            self._base_session.send(data)
-
-    def _handle_event(self, msg: messages.Event, endpoint: Callable[[types.Event], None]):
+            self._send(data)
+        finally:
+            self._invocations.pop(msg.request_id, None)
+
+    def _yield_progress(
+        self, msg: messages.Invocation, invocation: types.Invocation, results: Generator[types.Result | None]
+    ) -> types.Result | None:
+        """
+        Send all but the last result of a streaming handler as progressive YIELDs, the last one is
+        returned as the final result. Callers that didn't ask for progress only get that one.
+        """
+        progress = msg.details.get("receive_progress", False)
+        previous: types.Result | None = None
+        started = False
+        for result in results:
+            if invocation.interrupted.is_set():
+                results.close()
+                raise ApplicationError(xconn_uris.ERROR_CANCELED)
+
+            if not (result is None or isinstance(result, types.Result)):
+                results.close()
+                raise TypeError(f"streaming handler must yield types.Result or None, got: {type(result)}")
+
+            if started and progress:
+                self._send(self._session.send_message(progressive_yield(msg.request_id, previous)))
+
+            previous = result
+            started = True
+
+        return previous
+
+    def _handle_event(self, event: types.Event, endpoint: Callable[[types.Event], None]):
         try:
-            endpoint(types.Event(msg.args, msg.kwargs, msg.details))
+            endpoint(event)
         except Exception as e:
             print(e)
 
     def _process_incoming_message(self, msg: messages.Message):
         if isinstance(msg, messages.Registered):
             request = self._register_requests.pop(msg.request_id)
-            self._registrations[msg.registration_id] = request.endpoint
+            self._registrations[msg.registration_id] = (request.endpoint, request.dispatcher or self._dispatcher)
             request.future.set_result(Registration(msg.registration_id, self))
         elif isinstance(msg, messages.Unregistered):
             request = self._unregister_requests.pop(msg.request_id)
             del self._registrations[request.registration_id]
             request.future.set_result(None)
+        elif isinstance(msg, messages.Result) and (stream := self._stream_requests.get(msg.request_id)) is not None:
+            # the consumer may drop the stream at any time, look it up only once
+            result = types.Result(msg.args, msg.kwargs, msg.details)
+            if msg.details.get("progress", False):
+                if not stream.put(result):
+                    self._overflow_stream(msg.request_id)
+            else:
+                self._stream_requests.pop(msg.request_id, None)
+                # the final result of a streaming callee is empty
+                stream.finish(last=result if msg.args or msg.kwargs else None)
         elif isinstance(msg, messages.Result):
-            request = self._call_requests.pop(msg.request_id)
-            request.set_result(types.Result(msg.args, msg.kwargs, msg.details))
+            # gone if the call was cancelled
+            request = self._call_requests.pop(msg.request_id, None)
+            if request is not None and request.set_running_or_notify_cancel():
+                request.set_result(types.Result(msg.args, msg.kwargs, msg.details))
         elif isinstance(msg, messages.Invocation):
             try:
-                endpoint = self._registrations[msg.registration_id]
-                self._executor.submit(self._handle_invocation, msg, endpoint)
+                endpoint, dispatcher = self._registrations[msg.registration_id]
+                invocation = types.Invocation(msg.args, msg.kwargs, msg.details)
+                self._invocations[msg.request_id] = invocation
+                dispatcher.submit(invocation, lambda: self._handle_invocation(msg, invocation, endpoint))
+            except DispatchRejected as e:
+                self._invocations.pop(msg.request_id, None)
+                msg_to_send = messages.Error(
+                    messages.ErrorFields(msg.TYPE, msg.request_id, xconn_uris.ERROR_UNAVAILABLE, [e.__str__()])
+                )
+                data = self._session.send_message(msg_to_send)
+                self._send(data)
             except Exception as e:
+                self._invocations.pop(msg.request_id, None)
                 msg_to_send = messages.Error(
                     messages.ErrorFields(msg.TYPE, msg.request_id, xconn_uris.ERROR_RUNTIME_ERROR, [e.__str__()])
                 )
                 data = self._session.send_message(msg_to_send)
-                self._base_session.send(data)
+                self._send(data)
+        elif isinstance(msg, messages.Interrupt):
+            invocation = self._invocations.get(msg.request_id)
+            if invocation is not None:
+                invocation.interrupted.set()
         elif isinstance(msg, messages.Subscribed):
             request = self._subscribe_requests.pop(msg.request_id)
-            self._subscriptions[msg.subscription_id] = request.endpoint
+            self._subscriptions[msg.subscription_id] = (request.endpoint, request.dispatcher or self._dispatcher)
             request.future.set_result(Subscription(msg.subscription_id, self))
         elif isinstance(msg, messages.Unsubscribed):
             request = self._unsubscribe_requests.pop(msg.request_id)
@@ -169,15 +477,22 @@ class Session:
             request.set_result(None)
         elif isinstance(msg, messages.Event):
             try:
-                endpoint = self._subscriptions[msg.subscription_id]
-                self._executor.submit(self._handle_event, msg, endpoint)
+                endpoint, dispatcher = self._subscriptions[msg.subscription_id]
+                event = types.Event(msg.args, msg.kwargs, msg.details)
+                dispatcher.submit(event, lambda: self._handle_event(event, endpoint))
+            except DispatchRejected:
+                # events have no reply, the dispatcher counts what it drops
+                pass
             except Exception as e:
                 print(e)
         elif isinstance(msg, messages.Error):
             match msg.message_type:
+                case messages.Call.TYPE if (stream := self._stream_requests.pop(msg.request_id, None)) is not None:
+                    stream.finish(exception_from_error(msg))
                 case messages.Call.TYPE:
-                    call_request = self._call_requests.pop(msg.request_id)
-                    call_request.set_exception(exception_from_error(msg))
+                    call_request = self._call_requests.pop(msg.request_id, None)
+                    if call_request is not None and call_request.set_running_or_notify_cancel():
+                        call_request.set_exception(exception_from_error(msg))
                 case messages.Register.TYPE:
                     register_request = self._register_requests.pop(msg.request_id)
                     register_request.future.set_exception(exception_from_error(msg))
@@ -200,15 +515,16 @@ class Session:
         else:
             raise ValueError("received unknown message")
 
-    def call(
+    def _build_call(
         self,
         procedure: str,
         args: list[Any] | None = None,
         kwargs: dict[str, Any] | None = None,
         options: dict[str, Any] | None = None,
-    ) -> types.Result:
+    ) -> messages.Call:
         if options is not None and options.get("x_payload_raw", False):
-            options.pop("x_payload_raw", None)
+            # the caller's options may be shared between calls, e.g. by call_many
+            options = {key: value for key, value in options.items() if key != "x_payload_raw"}
             if len(args) > 1:
                 raise TypeError("must provide at most one argument when 'x_payload_raw' is set")
 
@@ -216,49 +532,223 @@ class Session:
                 raise TypeError("must not provide kwargs when 'x_payload_raw' is set")
 
             if len(args) == 0:
-                call = messages.Call(
+                return messages.Call(
                     messages.CallFields(self._idgen.next(), procedure, options=options, serializer=0, binary=True)
                 )
-            else:
-                if not isinstance(args[0], bytearray):
-                    raise TypeError("argument must be of type bytearray when 'x_payload_raw' is set")
-
-                call = messages.Call(
-                    messages.CallFields(
-                        self._idgen.next(),
-                        procedure,
-                        options=options,
-                        payload=args[0],
-                        serializer=0,
-                        binary=True,
-                    )
+
+            if not isinstance(args[0], bytearray):
+                raise TypeError("argument must be of type bytearray when 'x_payload_raw' is set")
+
+            return messages.Call(
+                messages.CallFields(
+                    self._idgen.next(),
+                    procedure,
+                    options=options,
+                    payload=args[0],
+                    serializer=0,
+                    binary=True,
                 )
-        else:
-            call = messages.Call(messages.CallFields(self._idgen.next(), procedure, args, kwargs, options=options))
+            )
+
+        return messages.Call(messages.CallFields(self._idgen.next(), procedure, args, kwargs, options=options))
+
+    def call(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> types.Result:
+        """
+        Call procedure and wait for its result. With the "timeout" option (milliseconds) the call
+        is cancelled and TimeoutError raised once it passed, routers supporting call timeouts
+        enforce it as well.
+        """
+        f = self.call_async(procedure, args, kwargs, options)
+        try:
+            return f.result(_call_timeout(options))
+        except FutureTimeoutError:
+            if not f.cancel():
+                # the result arrived just as the time ran out
+                return f.result()
+
+            # a different class than the builtin before python 3.11
+            raise TimeoutError("call timed out") from None
 
+    def call_async(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> Future[types.Result]:
+        """
+        Send a CALL without waiting for it, the returned future resolves with its result.
+        Cancelling the future cancels the call.
+        """
+        call = self._build_call(procedure, args, kwargs, options)
         data = self._session.send_message(call)
 
-        f = Future()
+        f: Future[types.Result] = Future()
         self._call_requests[call.request_id] = f
-        self._base_session.send(data)
+        try:
+            self._send(data)
+        except Exception:
+            self._call_requests.pop(call.request_id, None)
+            raise
+
+        self._cancel_on_cancelled(call.request_id, f)
+        return f
+
+    def _cancel_on_cancelled(self, request_id: int, f: Future[types.Result]):
+        f.add_done_callback(lambda done: done.cancelled() and self._cancel_call(request_id))
+
+    def _cancel_call(self, request_id: int):
+        # if the entry is gone the reply was faster
+        if self._call_requests.pop(request_id, None) is None and self._stream_requests.pop(request_id, None) is None:
+            return
+
+        cancel = messages.Cancel(messages.CancelFields(request_id))
+        try:
+            self._send(self._session.send_message(cancel))
+        except Exception:
+            # nothing left to cancel on a dead connection
+            pass
+
+    def _overflow_stream(self, request_id: int):
+        if (stream := self._stream_requests.pop(request_id, None)) is None:
+            return
+
+        stream.finish(StreamOverflow(f"more than {stream._maxsize} results buffered"))
+        cancel = messages.Cancel(messages.CancelFields(request_id))
+        try:
+            self._send(self._session.send_message(cancel))
+        except Exception:
+            # nothing left to cancel on a dead connection
+            pass
+
+    def call_stream(
+        self,
+        procedure: str,
+        args: list[Any] | None = None,
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+        maxsize: int = 1024,
+    ) -> Iterator[types.Result]:
+        """
+        Call procedure asking for progressive results and iterate over them as they arrive.
+        At most maxsize results are buffered. The session never stops reading for a slow
+        consumer, as that would stall this session, or with the reactor every session of the
+        process, and deadlock a loop making calls on this session. Instead, a result arriving with
+        the buffer full cancels the call and the iterator raises StreamOverflow after what's buffered.
+        Leaving the loop early cancels the call, the "timeout" option (milliseconds) bounds the
+        whole stream.
+        """
+        options = dict(options or {})
+        options["receive_progress"] = True
+        call = self._build_call(procedure, args, kwargs, options)
+        data = self._session.send_message(call)
+
+        stream = _ResultStream(maxsize)
+        self._stream_requests[call.request_id] = stream
+        try:
+            self._send(data)
+        except Exception:
+            self._stream_requests.pop(call.request_id, None)
+            raise
+
+        return self._iterate_stream(call.request_id, stream, _call_timeout(options))
 
-        return f.result()
+    def _iterate_stream(self, request_id: int, stream: _ResultStream, timeout: float | None) -> Iterator[types.Result]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        finished = False
+        try:
+            while (result := stream.get(deadline)) is not None:
+                yield result
+
+            finished = True
+        finally:
+            if not finished:
+                stream.close()
+                self._cancel_call(request_id)
+
+    def call_many(
+        self,
+        procedure: str,
+        args_list: Sequence[list[Any] | None],
+        kwargs: dict[str, Any] | None = None,
+        options: dict[str, Any] | None = None,
+        return_exceptions: bool = False,
+    ) -> list[types.Result | Exception]:
+        """
+        Call procedure once per entry of args_list, all CALLs go out in one write burst and the
+        results are returned in the same order. With return_exceptions errors are returned in
+        place of their results, otherwise the first one is raised after all calls finished.
+        Calls still pending when the "timeout" option runs out are cancelled and fail with
+        TimeoutError.
+        """
+        calls = [self._build_call(procedure, args, kwargs, options) for args in args_list]
+        futures: list[Future[types.Result]] = []
+        data = []
+        for call in calls:
+            data.append(self._session.send_message(call))
+            f: Future[types.Result] = Future()
+            self._call_requests[call.request_id] = f
+            futures.append(f)
+
+        try:
+            self._send_many(data)
+        except Exception:
+            for call in calls:
+                self._call_requests.pop(call.request_id, None)
+            raise
+
+        for call, f in zip(calls, futures):
+            self._cancel_on_cancelled(call.request_id, f)
+
+        _, pending = wait(futures, _call_timeout(options))
+        for f in pending:
+            f.cancel()
+
+        futures = [_timed_out() if f.cancelled() else f for f in futures]
+        if not return_exceptions:
+            return [f.result() for f in futures]
+
+        return [f.exception() or f.result() for f in futures]
 
     def register(
         self,
         procedure: str,
         invocation_handler: Callable | Callable[[types.Invocation], types.Result],
         options: dict = None,
+        dispatcher: IDispatcher | None = None,
     ) -> Registration:
+        """
+        Register invocation_handler for procedure. dispatcher decides on which thread the handler
+        runs, defaults to the one of the session.
+        """
+        return self.register_async(procedure, invocation_handler, options, dispatcher).result()
+
+    def register_async(
+        self,
+        procedure: str,
+        invocation_handler: Callable | Callable[[types.Invocation], types.Result],
+        options: dict = None,
+        dispatcher: IDispatcher | None = None,
+    ) -> Future[Registration]:
+        """Send a REGISTER without waiting for it, many of them can be in flight at once."""
         register = messages.Register(messages.RegisterFields(self._idgen.next(), procedure, options=options))
         data = self._session.send_message(register)
 
         f: Future[Registration] = Future()
-        self._register_requests[register.request_id] = RegisterRequest(f, invocation_handler)
-
-        self._base_session.send(data)
+        self._register_requests[register.request_id] = RegisterRequest(f, invocation_handler, dispatcher)
+        try:
+            self._send(data)
+        except Exception:
+            self._register_requests.pop(register.request_id, None)
+            raise
 
-        return f.result()
+        return f
 
     def _unregister(self, reg: Registration) -> None:
         if not self._base_session.transport.is_connected():
@@ -269,19 +759,43 @@ class Session:
 
         f: Future = Future()
         self._unregister_requests[unregister.request_id] = types.UnregisterRequest(f, reg.registration_id)
-        self._base_session.send(data)
+        self._send(data)
 
         f.result()
 
-    def subscribe(self, topic: str, event_handler: Callable[[types.Event], None], options: dict = None) -> Subscription:
+    def subscribe(
+        self,
+        topic: str,
+        event_handler: Callable[[types.Event], None],
+        options: dict = None,
+        dispatcher: IDispatcher | None = None,
+    ) -> Subscription:
+        """
+        Subscribe event_handler to topic. dispatcher decides on which thread the handler runs,
+        defaults to the one of the session.
+        """
+        return self.subscribe_async(topic, event_handler, options, dispatcher).result()
+
+    def subscribe_async(
+        self,
+        topic: str,
+        event_handler: Callable[[types.Event], None],
+        options: dict = None,
+        dispatcher: IDispatcher | None = None,
+    ) -> Future[Subscription]:
+        """Send a SUBSCRIBE without waiting for it, many of them can be in flight at once."""
         subscribe = messages.Subscribe(messages.SubscribeFields(self._idgen.next(), topic, options=options))
         data = self._session.send_message(subscribe)
 
         f: Future[Subscription] = Future()
-        self._subscribe_requests[subscribe.request_id] = SubscribeRequest(f, event_handler)
-        self._base_session.send(data)
+        self._subscribe_requests[subscribe.request_id] = SubscribeRequest(f, event_handler, dispatcher)
+        try:
+            self._send(data)
+        except Exception:
+            self._subscribe_requests.pop(subscribe.request_id, None)
+            raise
 
-        return f.result()
+        return f
 
     def publish(self, topic: str, args: list[Any] = None, kwargs: dict = None, options: dict = None):
         publish = messages.Publish(messages.PublishFields(self._idgen.next(), topic, args, kwargs, options))
@@ -290,10 +804,15 @@ class Session:
         if options is not None and options.get("acknowledge", False):
             f: Future = Future()
             self._publish_requests[publish.request_id] = f
-            self._base_session.send(data)
+            try:
+                self._send(data)
+            except Exception:
+                self._publish_requests.pop(publish.request_id, None)
+                raise
+
             return f.result()
 
-        self._base_session.send(data)
+        self._send(data)
 
     def _unsubscribe(self, sub: Subscription) -> None:
         if not self._base_session.transport.is_connected():
@@ -304,7 +823,7 @@ class Session:
 
         f: Future = Future()
         self._unsubscribe_requests[unsubscribe.request_id] = types.UnsubscribeRequest(f, sub.subscription_id)
-        self._base_session.send(data)
+        self._send(data)
 
         f.result()
 
@@ -313,8 +832,8 @@ class Session:
 
         goodbye = messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM))
         data = self._session.send_message(goodbye)
-        self._base_session.send(data)
         try:
+            self._send(data)
             self._goodbye_request.result(timeout=10)
         finally:
             self._base_session.close()
@@ -322,6 +841,16 @@ class Session:
     def ping(self, timeout: int = 10) -> float:
         return self._base_session.transport.ping(timeout)
 
+    @property
+    def rtt_stats(self) -> types.RTTStats:
+        """Round-trip times of the pings sent on this session's transport, including keepalive pings."""
+        return self._base_session.transport.rtt_stats
+
+    @property
+    def compression_stats(self) -> types.CompressionStats | None:
+        """Per-message-deflate counters of this session's transport, None if it doesn't compress."""
+        return self._base_session.transport.compression_stats
+
     def _on_disconnect(self, callback: Callable[[], None]) -> None:
         if callback is not None:
             self._disconnect_callback.append(callback)
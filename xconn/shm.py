@@ -0,0 +1,581 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+from asyncio import StreamReader, StreamWriter, Future
+from concurrent.futures import Future as ConcurrentFuture, TimeoutError as ConcurrentTimeoutError
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Sequence
+from urllib.parse import urlparse
+
+from wampproto.transports.rawsocket import (
+    Handshake,
+    MessageHeader,
+    DEFAULT_MAX_MSG_SIZE,
+    SERIALIZER_TYPE_CBOR,
+    MSG_TYPE_WAMP,
+    MSG_TYPE_PING,
+    MSG_TYPE_PONG,
+)
+
+from xconn.transports import (
+    RAW_SOCKET_HEADER_LENGTH,
+    PendingPing,
+    create_ping,
+    _ASYNC_CONNECTION_ERRORS,
+    _CONNECTION_ERRORS,
+    _fail_pending_pings,
+    _frame_decoder,
+    _recv_exactly,
+)
+from xconn.types import IAsyncTransport, ITransport, TransportConfig, RTTStats
+
+# head and tail live on their own cache lines, so producer and consumer don't contend on them
+_CAPACITY_OFFSET = 0
+_HEAD_OFFSET = 64
+_TAIL_OFFSET = 128
+_DATA_OFFSET = 192
+
+_U64 = struct.Struct("<Q")
+
+# ring capacity a client asks the server for, sent after the rawsocket handshake
+_RING_SIZE = struct.Struct("!Q")
+MIN_RING_SIZE = 4096
+MAX_RING_SIZE = 64 * 1024 * 1024
+
+# segments created by this process, they are tracked by our resource tracker until unlinked
+_created_segments: set[str] = set()
+
+# byte sent over the unix socket to wake up the reader of a ring
+DOORBELL = b"d"
+
+
+class ShmRing:
+    """
+    Single-producer single-consumer byte ring in a shared memory segment. head and tail are
+    monotonic byte counters, the producer only ever stores head and the consumer only tail.
+    """
+
+    def __init__(self, shm: SharedMemory):
+        if shm.size <= _DATA_OFFSET:
+            raise ValueError(f"shared memory segment {shm.name} is too small for a ring")
+
+        capacity = _U64.unpack_from(shm.buf, _CAPACITY_OFFSET)[0]
+        if capacity == 0 or _DATA_OFFSET + capacity > shm.size:
+            raise ValueError(f"shared memory segment {shm.name} has an invalid ring capacity {capacity}")
+
+        self._shm = shm
+        self._buf = shm.buf
+        self.capacity = capacity
+
+    @staticmethod
+    def create(capacity: int) -> "ShmRing":
+        shm = SharedMemory(create=True, size=_DATA_OFFSET + capacity)
+        _created_segments.add(shm.name)
+        _U64.pack_into(shm.buf, _CAPACITY_OFFSET, capacity)
+        _U64.pack_into(shm.buf, _HEAD_OFFSET, 0)
+        _U64.pack_into(shm.buf, _TAIL_OFFSET, 0)
+        return ShmRing(shm)
+
+    @staticmethod
+    def attach(name: str) -> "ShmRing":
+        try:
+            shm = SharedMemory(name=name, track=False)
+        except TypeError:
+            # before python 3.13 attaching registers the segment with the resource tracker,
+            # which would unlink it when this process exits although the creator owns it.
+            shm = SharedMemory(name=name)
+            if name not in _created_segments:
+                resource_tracker.unregister(shm._name, "shared_memory")
+
+        try:
+            return ShmRing(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def unlink(self):
+        """Remove the segment name, mappings stay valid until both sides close them."""
+        self._shm.unlink()
+        _created_segments.discard(self._shm.name)
+
+    def close(self):
+        """Unmap the segment, the ring can't be used afterwards."""
+        self._shm.close()
+
+    def write(self, data: memoryview) -> int:
+        """Copy as much of data as fits into the ring, returns the number of bytes written."""
+        head = _U64.unpack_from(self._buf, _HEAD_OFFSET)[0]
+        tail = _U64.unpack_from(self._buf, _TAIL_OFFSET)[0]
+        size = min(len(data), self.capacity - (head - tail))
+        if size == 0:
+            return 0
+
+        start = _DATA_OFFSET + head % self.capacity
+        first = min(size, _DATA_OFFSET + self.capacity - start)
+        self._buf[start : start + first] = data[:first]
+        if size > first:
+            self._buf[_DATA_OFFSET : _DATA_OFFSET + size - first] = data[first:size]
+
+        _U64.pack_into(self._buf, _HEAD_OFFSET, head + size)
+        return size
+
+    def read_into(self, out: memoryview) -> int:
+        """Move up to len(out) bytes out of the ring, returns the number of bytes read."""
+        head = _U64.unpack_from(self._buf, _HEAD_OFFSET)[0]
+        tail = _U64.unpack_from(self._buf, _TAIL_OFFSET)[0]
+        size = min(len(out), head - tail)
+        if size == 0:
+            return 0
+
+        start = _DATA_OFFSET + tail % self.capacity
+        first = min(size, _DATA_OFFSET + self.capacity - start)
+        out[:first] = self._buf[start : start + first]
+        if size > first:
+            out[first:size] = self._buf[_DATA_OFFSET : _DATA_OFFSET + size - first]
+
+        _U64.pack_into(self._buf, _TAIL_OFFSET, tail + size)
+        return size
+
+
+class ShmFrameReader:
+    """Reassembles rawsocket frames from a ring without blocking, frames may be larger than the ring."""
+
+    def __init__(self, ring: ShmRing):
+        self._ring = ring
+        self._header = bytearray(RAW_SOCKET_HEADER_LENGTH)
+        self._header_size = 0
+        self._kind = 0
+        self._payload: bytearray | None = None
+        self._payload_size = 0
+
+    def next_frame(self) -> tuple[int, bytearray] | None:
+        """Return the next complete frame or None if the ring doesn't hold all of it yet."""
+        if self._payload is None:
+            self._header_size += self._ring.read_into(memoryview(self._header)[self._header_size :])
+            if self._header_size < RAW_SOCKET_HEADER_LENGTH:
+                return None
+
+            header = MessageHeader.from_bytes(bytes(self._header))
+            self._header_size = 0
+            self._kind = header.kind
+            self._payload = bytearray(header.length)
+            self._payload_size = 0
+
+        if self._payload_size < len(self._payload):
+            self._payload_size += self._ring.read_into(memoryview(self._payload)[self._payload_size :])
+            if self._payload_size < len(self._payload):
+                return None
+
+        payload, self._payload = self._payload, None
+        return self._kind, payload
+
+
+def encode_ring_names(inbound: str, outbound: str) -> bytes:
+    names = f"{inbound} {outbound}".encode()
+    return struct.pack("!H", len(names)) + names
+
+
+def decode_ring_names(data: bytes) -> tuple[str, str]:
+    try:
+        names = data.decode("ascii").split(" ")
+    except UnicodeDecodeError:
+        raise ValueError("shared memory ring names must be ascii") from None
+
+    if len(names) != 2 or not all(names):
+        raise ValueError(f"expected two shared memory ring names, got {data!r}")
+
+    return names[0], names[1]
+
+
+def _ring_size(requested: int, max_ring_size: int) -> int:
+    return max(MIN_RING_SIZE, min(requested, max_ring_size))
+
+
+def _spin_delay(delay: float) -> float:
+    """Backoff while waiting for the peer to drain a full ring."""
+    return min(delay * 2 or 0.00001, 0.001)
+
+
+class ShmRawSocketTransport(ITransport):
+    """
+    Rawsocket framing over two shared memory rings, one per direction. The unix socket carries
+    the handshake and then only doorbell bytes, payloads never pass through the kernel.
+    """
+
+    def __init__(self, sock: socket.socket, inbound: ShmRing, outbound: ShmRing, protocol: int = SERIALIZER_TYPE_CBOR):
+        super().__init__()
+        self._sock = sock
+        self._inbound = inbound
+        self._outbound = outbound
+        self._reader = ShmFrameReader(inbound)
+        self._decode = _frame_decoder(protocol)
+        self._connected = True
+        self._pending_pings: dict[bytes, PendingPing] = {}
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._rtt_stats = RTTStats()
+
+    @staticmethod
+    def connect(
+        uri: str,
+        protocol: int = SERIALIZER_TYPE_CBOR,
+        max_msg_size: int = DEFAULT_MAX_MSG_SIZE,
+        config: TransportConfig = TransportConfig(),
+    ) -> "ShmRawSocketTransport":
+        parsed = urlparse(uri)
+        if parsed.scheme != "shm+rs":
+            raise RuntimeError(f"Unsupported scheme {parsed.scheme}")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(config.open_timeout)
+        try:
+            sock.connect(parsed.path)
+            hs_request = Handshake(protocol, max_msg_size)
+            sock.sendall(hs_request.to_bytes() + _RING_SIZE.pack(config.shm_ring_size))
+
+            hs_response = Handshake.from_bytes(_recv_exactly(sock, RAW_SOCKET_HEADER_LENGTH))
+            if hs_request.protocol != hs_response.protocol:
+                raise ValueError("Handshake protocol mismatch.")
+
+            (names_length,) = struct.unpack("!H", _recv_exactly(sock, 2))
+            inbound_name, outbound_name = decode_ring_names(_recv_exactly(sock, names_length))
+            inbound = ShmRing.attach(inbound_name)
+            try:
+                outbound = ShmRing.attach(outbound_name)
+            except BaseException:
+                inbound.close()
+                raise
+
+            # tells the server both rings are mapped, it unlinks their names then
+            sock.sendall(DOORBELL)
+        except BaseException:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        return ShmRawSocketTransport(sock, inbound, outbound, protocol)
+
+    def _mark_disconnected(self, _: Exception | None):
+        if self._connected:
+            self._connected = False
+            _fail_pending_pings(self._pending_pings)
+
+    def _send(self, buffers: list[bytes | memoryview]):
+        try:
+            with self._write_lock:
+                for buffer in buffers:
+                    view = memoryview(buffer)
+                    delay = 0.0
+                    while view:
+                        if not self._connected:
+                            raise ConnectionError("shared memory transport is closed")
+
+                        written = self._outbound.write(view)
+                        view = view[written:]
+                        if view:
+                            if written:
+                                # the ring just filled up, let the peer drain it and wait for space
+                                self._sock.send(DOORBELL)
+
+                            delay = _spin_delay(delay) if written == 0 else 0.0
+                            time.sleep(delay)
+
+                self._sock.send(DOORBELL)
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+            raise
+
+    def _next_frame(self) -> tuple[int, bytearray] | None:
+        with self._read_lock:
+            if not self._connected:
+                # the rings are unmapped on close
+                raise ConnectionError("shared memory transport is closed")
+
+            return self._reader.next_frame()
+
+    def read(self) -> str | bytes | memoryview:
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                try:
+                    doorbells = self._sock.recv(4096)
+                except _CONNECTION_ERRORS as e:
+                    self._mark_disconnected(e)
+                    raise
+
+                if not doorbells:
+                    self._mark_disconnected(None)
+                    raise ConnectionError("shared memory transport closed by peer")
+
+                continue
+
+            kind, payload = frame
+            if kind == MSG_TYPE_WAMP:
+                return self._decode(memoryview(payload))
+            elif kind == MSG_TYPE_PING:
+                self._send([MessageHeader(MSG_TYPE_PONG, len(payload)).to_bytes(), payload])
+            elif kind == MSG_TYPE_PONG:
+                pending_ping = self._pending_pings.pop(bytes(payload), None)
+                if pending_ping is not None:
+                    rtt = time.time() * 1000 - pending_ping.created_at
+                    self._rtt_stats.add(rtt)
+                    pending_ping.future.set_result(rtt)
+            else:
+                raise ValueError(f"Unsupported message type {kind}")
+
+    def write(self, data: str | bytes):
+        payload = data.encode() if isinstance(data, str) else data
+        self._send([MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes(), payload])
+
+    def write_many(self, data: Sequence[str | bytes]):
+        buffers = []
+        for item in data:
+            payload = item.encode() if isinstance(item, str) else item
+            buffers.append(MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes())
+            buffers.append(payload)
+
+        self._send(buffers)
+
+    def close(self):
+        try:
+            # also wakes up a thread blocked in read()
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        try:
+            self._sock.close()
+        finally:
+            self._mark_disconnected(None)
+            # a reader or writer still busy with the rings notices the close before they are unmapped
+            with self._read_lock, self._write_lock:
+                self._inbound.close()
+                self._outbound.close()
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def ping(self, timeout: int = 10) -> float:
+        f: ConcurrentFuture[float] = ConcurrentFuture()
+        payload, ping_header, created_at = create_ping()
+        self._pending_pings[payload] = PendingPing(f, created_at)
+
+        try:
+            self._send([ping_header.to_bytes(), payload])
+            return f.result(timeout)
+        except ConcurrentTimeoutError:
+            self._rtt_stats.timeouts += 1
+            raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+
+class AsyncShmRawSocketTransport(IAsyncTransport):
+    def __init__(
+        self,
+        reader: StreamReader,
+        writer: StreamWriter,
+        inbound: ShmRing,
+        outbound: ShmRing,
+        protocol: int = SERIALIZER_TYPE_CBOR,
+    ):
+        super().__init__()
+        self._doorbell_reader = reader
+        self._doorbell_writer = writer
+        self._inbound = inbound
+        self._outbound = outbound
+        self.protocol = protocol
+        self._reader = ShmFrameReader(inbound)
+        self._decode = _frame_decoder(protocol)
+        self._connected = True
+        self._pending_pings: dict[bytes, PendingPing] = {}
+        self._write_lock = asyncio.Lock()
+        self._rtt_stats = RTTStats()
+
+    @staticmethod
+    async def connect(
+        uri: str,
+        protocol: int = SERIALIZER_TYPE_CBOR,
+        max_msg_size: int = DEFAULT_MAX_MSG_SIZE,
+        config: TransportConfig = TransportConfig(),
+    ) -> "AsyncShmRawSocketTransport":
+        parsed = urlparse(uri)
+        if parsed.scheme != "shm+rs":
+            raise RuntimeError(f"Unsupported scheme {parsed.scheme}")
+
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(parsed.path), config.open_timeout)
+        try:
+            hs_request = Handshake(protocol, max_msg_size)
+            writer.write(hs_request.to_bytes() + _RING_SIZE.pack(config.shm_ring_size))
+
+            hs_response = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+            if hs_request.protocol != hs_response.protocol:
+                raise ValueError("Handshake protocol mismatch.")
+
+            (names_length,) = struct.unpack("!H", await reader.readexactly(2))
+            inbound_name, outbound_name = decode_ring_names(await reader.readexactly(names_length))
+            inbound = ShmRing.attach(inbound_name)
+            try:
+                outbound = ShmRing.attach(outbound_name)
+            except BaseException:
+                inbound.close()
+                raise
+
+            writer.write(DOORBELL)
+            await writer.drain()
+        except BaseException:
+            writer.close()
+            raise
+
+        return AsyncShmRawSocketTransport(reader, writer, inbound, outbound, protocol)
+
+    @staticmethod
+    async def accept(
+        reader: StreamReader,
+        writer: StreamWriter,
+        max_msg_size: int = DEFAULT_MAX_MSG_SIZE,
+        max_ring_size: int = MAX_RING_SIZE,
+    ) -> "AsyncShmRawSocketTransport":
+        """
+        Server side of the handshake. The server creates both rings, sized as the client asked within
+        MIN_RING_SIZE and max_ring_size, and unlinks their names once the client has mapped them.
+        """
+        hs_request = Handshake.from_bytes(await reader.readexactly(RAW_SOCKET_HEADER_LENGTH))
+        (requested,) = _RING_SIZE.unpack(await reader.readexactly(_RING_SIZE.size))
+
+        ring_size = _ring_size(requested, max_ring_size)
+        inbound = ShmRing.create(ring_size)
+        try:
+            outbound = ShmRing.create(ring_size)
+        except BaseException:
+            inbound.unlink()
+            inbound.close()
+            raise
+
+        try:
+            # the client reads what we write and the other way around
+            writer.write(
+                Handshake(hs_request.protocol, max_msg_size).to_bytes() + encode_ring_names(outbound.name, inbound.name)
+            )
+            if await reader.readexactly(1) != DOORBELL:
+                raise ValueError("shared memory rings were not acknowledged")
+        except BaseException:
+            inbound.close()
+            outbound.close()
+            raise
+        finally:
+            inbound.unlink()
+            outbound.unlink()
+
+        return AsyncShmRawSocketTransport(reader, writer, inbound, outbound, hs_request.protocol)
+
+    def _mark_disconnected(self, _: Exception | None):
+        if self._connected:
+            self._connected = False
+            _fail_pending_pings(self._pending_pings)
+
+    async def _send(self, buffers: list[bytes | memoryview]):
+        async with self._write_lock:
+            for buffer in buffers:
+                view = memoryview(buffer)
+                delay = 0.0
+                while view:
+                    if not self._connected:
+                        raise ConnectionError("shared memory transport is closed")
+
+                    written = self._outbound.write(view)
+                    view = view[written:]
+                    if view:
+                        if written:
+                            self._doorbell_writer.write(DOORBELL)
+
+                        delay = _spin_delay(delay) if written == 0 else 0.0
+                        await asyncio.sleep(delay)
+
+            self._doorbell_writer.write(DOORBELL)
+            try:
+                await self._doorbell_writer.drain()
+            except _ASYNC_CONNECTION_ERRORS as e:
+                self._mark_disconnected(e)
+                raise
+
+    async def read(self) -> str | bytes | memoryview:
+        while True:
+            if not self._connected:
+                # the rings are unmapped on close
+                raise ConnectionError("shared memory transport is closed")
+
+            frame = self._reader.next_frame()
+            if frame is None:
+                try:
+                    doorbells = await self._doorbell_reader.read(4096)
+                except _ASYNC_CONNECTION_ERRORS as e:
+                    self._mark_disconnected(e)
+                    raise
+
+                if not doorbells:
+                    self._mark_disconnected(None)
+                    raise ConnectionError("shared memory transport closed by peer")
+
+                continue
+
+            kind, payload = frame
+            if kind == MSG_TYPE_WAMP:
+                return self._decode(memoryview(payload))
+            elif kind == MSG_TYPE_PING:
+                await self._send([MessageHeader(MSG_TYPE_PONG, len(payload)).to_bytes(), payload])
+            elif kind == MSG_TYPE_PONG:
+                pending_ping = self._pending_pings.pop(bytes(payload), None)
+                if pending_ping is not None:
+                    rtt = time.time() * 1000 - pending_ping.created_at
+                    self._rtt_stats.add(rtt)
+                    pending_ping.future.set_result(rtt)
+            else:
+                raise ValueError(f"Unsupported message type {kind}")
+
+    async def write(self, data: str | bytes):
+        payload = data.encode() if isinstance(data, str) else data
+        await self._send([MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes(), payload])
+
+    async def close(self):
+        self._mark_disconnected(None)
+        self._doorbell_writer.close()
+        try:
+            await self._doorbell_writer.wait_closed()
+        except _ASYNC_CONNECTION_ERRORS:
+            pass
+        finally:
+            self._inbound.close()
+            self._outbound.close()
+
+    async def is_connected(self) -> bool:
+        return self._connected
+
+    async def ping(self, timeout: int = 10) -> float:
+        f: Future[float] = asyncio.get_running_loop().create_future()
+        payload, ping_header, created_at = create_ping()
+        self._pending_pings[payload] = PendingPing(f, created_at)
+
+        try:
+            await self._send([ping_header.to_bytes(), payload])
+            return await asyncio.wait_for(f, timeout)
+        except asyncio.TimeoutError:
+            self._rtt_stats.timeouts += 1
+            raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
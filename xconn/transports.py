@@ -1,14 +1,20 @@
 import asyncio
+import functools
 import os
 import socket
+import ssl
 from asyncio import StreamReader, StreamWriter, Future
-from concurrent.futures import Future as ConcurrentFuture
+from concurrent.futures import Future as ConcurrentFuture, TimeoutError as ConcurrentTimeoutError
 from dataclasses import dataclass
+from collections import deque
+import heapq
+import itertools
 import time
-from typing import Sequence
+from typing import Callable, Sequence
 import threading
 from urllib.parse import urlparse
 
+import aiohttp
 from wampproto.transports.rawsocket import (
     Handshake,
     MessageHeader,
@@ -17,18 +23,31 @@ from wampproto.transports.rawsocket import (
     MSG_TYPE_WAMP,
     MSG_TYPE_PING,
     MSG_TYPE_PONG,
+    SERIALIZER_TYPE_JSON,
+    SERIALIZER_TYPE_MSGPACK,
+    MAGIC,
 )
 from websockets import State, Subprotocol
-from websockets.sync.client import connect, unix_connect
-from websockets.sync.connection import Connection
+from websockets.client import ClientProtocol
+from websockets.frames import Frame, Opcode
+from websockets.http11 import Response, USER_AGENT
+from websockets.protocol import SEND_EOF
+from websockets.uri import parse_uri
 from websockets.asyncio.client import connect as async_connect, unix_connect as async_unix_connect
 from websockets.asyncio.client import ClientConnection
 
-from xconn.types import IAsyncTransport, ITransport, WebsocketConfig, TransportConfig
+from xconn.compression import DeflatePolicyFactory, CompressionStats, AIOHttpDeflateSender
+from xconn.types import IAsyncTransport, ITransport, WebsocketConfig, TransportConfig, RTTStats
 
 # Applies to handshake and message itself.
 RAW_SOCKET_HEADER_LENGTH = 4
 
+# rawsocket handshake error sent to clients asking for a serializer the server doesn't speak.
+RAW_SOCKET_ERROR_SERIALIZER_UNSUPPORTED = 1
+
+# initial size of the receive buffer of the rawsocket frame reader, grown on demand for larger frames.
+READ_BUFFER_SIZE = 64 * 1024
+
 _ASYNC_CONNECTION_ERRORS = (
     asyncio.IncompleteReadError,
     BrokenPipeError,
@@ -57,6 +76,112 @@ def create_ping():
     return payload, ping_header, created_at
 
 
+def _fail_pending_pings(pending_pings: dict[bytes, PendingPing]):
+    for pending_ping in list(pending_pings.values()):
+        if not pending_ping.future.done():
+            pending_ping.future.set_exception(ConnectionError("connection closed before pong was received"))
+
+    pending_pings.clear()
+
+
+class KeepaliveScheduler:
+    """A single background thread that drives the keepalive pings of all sync transports."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, SyncKeepalive]] = []
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, transport: "SyncKeepalive", when: float):
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._counter), transport))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="xconn-keepalive", daemon=True)
+                self._thread.start()
+
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+
+                when, _, transport = self._heap[0]
+                delay = when - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                heapq.heappop(self._heap)
+
+            try:
+                next_run = transport._keepalive()
+            except Exception:
+                next_run = None
+
+            if next_run is not None:
+                self.schedule(transport, next_run)
+
+
+_keepalive_scheduler = KeepaliveScheduler()
+
+
+class ResumableSSLContext(ssl.SSLContext):
+    """
+    Client SSLContext that remembers the TLS session of every server it connected to and offers it
+    on the next handshake, so reconnects resume the session instead of doing a full handshake.
+    """
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT):
+        super().__init__()
+        self._sessions: dict[str, ssl.SSLSession] = {}
+
+    def wrap_socket(self, sock, server_side=False, *args, server_hostname=None, session=None, **kwargs):
+        if session is None and not server_side:
+            session = self._sessions.get(server_hostname)
+
+        return super().wrap_socket(sock, server_side, *args, server_hostname=server_hostname, session=session, **kwargs)
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = self._sessions.get(server_hostname)
+
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+    def remember(self, server_hostname: str, session: ssl.SSLSession | None):
+        if session is not None:
+            self._sessions[server_hostname] = session
+
+
+def create_client_ssl_context(
+    cafile: str | None = None, capath: str | None = None, cadata: str | bytes | None = None
+) -> ResumableSSLContext:
+    """Create a verifying client context that resumes TLS sessions, trusting the given or system CAs."""
+    context = ResumableSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if cafile is not None or capath is not None or cadata is not None:
+        context.load_verify_locations(cafile, capath, cadata)
+    else:
+        context.load_default_certs()
+
+    return context
+
+
+@functools.cache
+def _default_ssl_context() -> ResumableSSLContext:
+    return create_client_ssl_context()
+
+
+def _client_ssl_context(config: TransportConfig) -> ssl.SSLContext:
+    return config.ssl_context if config.ssl_context is not None else _default_ssl_context()
+
+
+def _remember_tls_session(ssl_object: ssl.SSLSocket | ssl.SSLObject | None):
+    if ssl_object is not None and isinstance(ssl_object.context, ResumableSSLContext):
+        ssl_object.context.remember(ssl_object.server_hostname, ssl_object.session)
+
+
 def _recv_exactly(sock, n: int) -> bytes:
     """Receive exactly n bytes from a socket or raise if connection breaks."""
     chunks = []
@@ -72,14 +197,185 @@ def _recv_exactly(sock, n: int) -> bytes:
     return b"".join(chunks)
 
 
-class RawSocketTransport(ITransport):
-    def __init__(self, sock: socket.socket):
+def _iov_max() -> int:
+    try:
+        return os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 1024
+
+
+# max number of buffers a single sendmsg call accepts.
+IOV_MAX = _iov_max()
+
+
+def _sendmsg_all(sock: socket.socket, buffers: list[bytes | memoryview]):
+    """Send all buffers with scatter/gather writes, the buffers are never concatenated."""
+    while buffers:
+        sent = sock.sendmsg(buffers[:IOV_MAX])
+
+        index = 0
+        while index < len(buffers) and sent >= len(buffers[index]):
+            sent -= len(buffers[index])
+            index += 1
+
+        buffers = buffers[index:]
+        if sent:
+            buffers[0] = memoryview(buffers[0])[sent:]
+
+
+def _frame_decoder(protocol: int) -> Callable[[memoryview], str | bytes | memoryview]:
+    if protocol == SERIALIZER_TYPE_JSON:
+        # the JSON serializer can't parse a memoryview, decode the text right away instead.
+        return lambda payload: str(payload, "utf-8")
+    elif protocol == SERIALIZER_TYPE_CBOR or protocol == SERIALIZER_TYPE_MSGPACK:
+        return lambda payload: payload
+
+    return bytes
+
+
+class FrameReader:
+    """
+    Buffered reader for rawsocket frames.
+
+    Data is received with ``recv_into`` into a reusable bytearray, so a single syscall can
+    pull in many frames which are then returned one by one without touching the socket.
+    Returned payloads are memoryview slices of the internal buffer and are only valid
+    until the next call to ``next_frame``.
+    """
+
+    def __init__(self, sock: socket.socket, buffer_size: int = READ_BUFFER_SIZE):
+        self._sock = sock
+        self._buffer_size = buffer_size
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    def next_frame(self) -> tuple[int, memoryview]:
+        while True:
+            available = self._end - self._start
+            if available >= RAW_SOCKET_HEADER_LENGTH:
+                buf = self._buffer
+                start = self._start
+                length = buf[start + 1] << 16 | buf[start + 2] << 8 | buf[start + 3]
+                frame_end = start + RAW_SOCKET_HEADER_LENGTH + length
+                if frame_end <= self._end:
+                    self._start = frame_end
+                    return buf[start], self._view[start + RAW_SOCKET_HEADER_LENGTH : frame_end]
+
+                self._fill(RAW_SOCKET_HEADER_LENGTH + length)
+            else:
+                self._fill(RAW_SOCKET_HEADER_LENGTH)
+
+    def poll_frame(self) -> tuple[int, memoryview] | None:
+        """Like next_frame() but never touches the socket, None unless a whole frame is buffered."""
+        if self._end - self._start < RAW_SOCKET_HEADER_LENGTH:
+            return None
+
+        buf = self._buffer
+        start = self._start
+        length = buf[start + 1] << 16 | buf[start + 2] << 8 | buf[start + 3]
+        frame_end = start + RAW_SOCKET_HEADER_LENGTH + length
+        if frame_end > self._end:
+            return None
+
+        self._start = frame_end
+        return buf[start], self._view[start + RAW_SOCKET_HEADER_LENGTH : frame_end]
+
+    def receive_nonblocking(self) -> bool:
+        """Receive once without blocking, returns False if the socket had nothing to read."""
+        needed = RAW_SOCKET_HEADER_LENGTH
+        if self._end - self._start >= RAW_SOCKET_HEADER_LENGTH:
+            buf = self._buffer
+            start = self._start
+            needed += buf[start + 1] << 16 | buf[start + 2] << 8 | buf[start + 3]
+
+        try:
+            self._fill(needed, socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return False
+
+        return True
+
+    def _fill(self, needed: int, flags: int = 0):
+        available = self._end - self._start
+        if self._start + needed > len(self._buffer):
+            if needed > len(self._buffer) or (available == 0 and len(self._buffer) > self._buffer_size):
+                # allocate a new buffer instead of resizing, previously returned frames may still reference the
+                # old one. Shrink back to the default size once a large frame has been consumed.
+                buffer = bytearray(max(needed, self._buffer_size))
+                buffer[:available] = self._view[self._start : self._end]
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            else:
+                self._buffer[:available] = self._view[self._start : self._end]
+
+            self._start = 0
+            self._end = available
+
+        received = self._sock.recv_into(self._view[self._end :], 0, flags)
+        if received == 0:
+            raise ConnectionError("Socket connection broken")
+
+        self._end += received
+
+
+class SyncKeepalive:
+    """
+    Keepalive bookkeeping of the sync transports, driven by the shared KeepaliveScheduler thread.
+    Subclasses provide _connected, _pending_pings, _rtt_stats, _send_keepalive_ping() and _abort().
+    """
+
+    _ping_interval: float | None = None
+    _ping_timeout: float | None = None
+    _last_ping_at = 0.0
+
+    def _start_keepalive(self, interval: float, timeout: float | None):
+        self._ping_interval = interval
+        # a ping that never expires would stop the keepalive for good
+        self._ping_timeout = timeout or interval
+        self._last_ping_at = time.time() * 1000
+        _keepalive_scheduler.schedule(self, time.monotonic() + self._keepalive_period())
+
+    def _keepalive_period(self) -> float:
+        return min(self._ping_interval, self._ping_timeout)
+
+    def _keepalive(self) -> float | None:
+        """Run by the keepalive scheduler, returns the monotonic time of the next run."""
+        if not self._connected:
+            return None
+
+        now = time.time() * 1000
+        for pending_ping in list(self._pending_pings.values()):
+            if now - pending_ping.created_at > self._ping_timeout * 1000:
+                self._rtt_stats.timeouts += 1
+                self._abort()
+                return None
+
+        if not self._pending_pings and now - self._last_ping_at >= self._ping_interval * 1000:
+            self._send_keepalive_ping()
+
+        return time.monotonic() + self._keepalive_period()
+
+
+class RawSocketTransport(SyncKeepalive, ITransport):
+    def __init__(self, sock: socket.socket, protocol: int = SERIALIZER_TYPE_CBOR):
         super().__init__()
         self._sock = sock
         self._connected = True
         self._pending_pings: dict[bytes, PendingPing] = {}
         self._write_lock = threading.Lock()
 
+        self._reader = FrameReader(sock)
+        self._decode = _frame_decoder(protocol)
+        # SSL sockets support neither sendmsg nor send flags
+        self._vectored = hasattr(sock, "sendmsg") and not isinstance(sock, ssl.SSLSocket)
+        self._nonblocking_flag = 0 if isinstance(sock, ssl.SSLSocket) else getattr(socket, "MSG_DONTWAIT", 0)
+
+        self._rtt_stats = RTTStats()
+        # set while xconn.reactor.Reactor reads this transport instead of a thread calling read()
+        self._reactor = None
+
     @staticmethod
     def connect(
         uri: str,
@@ -93,6 +389,9 @@ class RawSocketTransport(ITransport):
             sock = socket.create_connection((parsed.hostname, parsed.port))
             if config.tcp_nodelay:
                 sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            if parsed.scheme == "rss" or parsed.scheme == "tcps":
+                sock = _client_ssl_context(config).wrap_socket(sock, server_hostname=parsed.hostname)
         elif parsed.scheme == "unix" or parsed.scheme == "unix+rs":
             sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             sock.connect(parsed.path)
@@ -109,53 +408,144 @@ class RawSocketTransport(ITransport):
         if hs_request.protocol != hs_response.protocol:
             raise ValueError("Handshake protocol mismatch.")
 
-        return RawSocketTransport(sock)
+        if isinstance(sock, ssl.SSLSocket):
+            _remember_tls_session(sock)
+
+        transport = RawSocketTransport(sock, protocol)
+        if config.ping_interval:
+            transport._start_keepalive(config.ping_interval, config.ping_timeout)
+
+        return transport
 
     def _mark_disconnected(self, _: Exception | None):
         if self._connected:
             self._connected = False
+            _fail_pending_pings(self._pending_pings)
 
-    def read(self) -> str | bytes:
-        msg_header_bytes = _recv_exactly(self._sock, RAW_SOCKET_HEADER_LENGTH)
-        msg_header = MessageHeader.from_bytes(msg_header_bytes)
+    def _send_keepalive_ping(self):
+        # never block the shared scheduler thread, if a writer currently owns the socket it's clearly alive.
+        if not self._write_lock.acquire(blocking=False):
+            return
 
-        if msg_header.kind == MSG_TYPE_WAMP:
-            return _recv_exactly(self._sock, msg_header.length)
-        elif msg_header.kind == MSG_TYPE_PING:
-            ping_payload = _recv_exactly(self._sock, msg_header.length)
-            pong_header = MessageHeader(MSG_TYPE_PONG, msg_header.length)
+        try:
+            payload, ping_header, created_at = create_ping()
+            data = ping_header.to_bytes() + payload
+            self._pending_pings[payload] = PendingPing(ConcurrentFuture(), created_at)
+            try:
+                sent = self._sock.send(data, self._nonblocking_flag)
+            except BlockingIOError:
+                del self._pending_pings[payload]
+                return
+
+            if sent < len(data):
+                self._sock.sendall(data[sent:])
+
+            self._last_ping_at = created_at
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+        finally:
+            self._write_lock.release()
+
+    def _abort(self):
+        """Close a dead connection and wake up the thread blocked in read()."""
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.close()
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+    def _send(self, buffers: list[bytes | memoryview]):
+        try:
+            with self._write_lock:
+                if self._vectored:
+                    _sendmsg_all(self._sock, buffers)
+                else:
+                    self._sock.sendall(b"".join(buffers))
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+            raise
 
+    def read(self) -> str | bytes | memoryview:
+        """
+        Return the next WAMP message. Binary messages are returned as a memoryview
+        into the receive buffer which stays valid only until the next call to read().
+        """
+        while True:
             try:
-                with self._write_lock:
-                    self._sock.sendall(pong_header.to_bytes() + ping_payload)
+                kind, payload = self._reader.next_frame()
             except _CONNECTION_ERRORS as e:
                 self._mark_disconnected(e)
                 raise
 
-            return self.read()
-        elif msg_header.kind == MSG_TYPE_PONG:
-            pong_payload = _recv_exactly(self._sock, msg_header.length)
-            pending_ping = self._pending_pings.pop(pong_payload, None)
-            if pending_ping is not None:
-                received_at = time.time() * 1000
-                pending_ping.future.set_result(received_at - pending_ping.created_at)
+            if kind == MSG_TYPE_WAMP:
+                return self._decode(payload)
+
+            self._handle_control_frame(kind, payload)
+
+    def read_ready(self, on_message: Callable[[str | bytes | memoryview], None]):
+        """
+        Called by the reactor once the socket is readable: receive without blocking and pass every
+        complete message to on_message. Like with read(), memoryviews are only valid during the call.
+        """
+        try:
+            self._reader.receive_nonblocking()
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+            raise
 
-            return self.read()
+        while (frame := self._reader.poll_frame()) is not None:
+            kind, payload = frame
+            if kind == MSG_TYPE_WAMP:
+                on_message(self._decode(payload))
+            else:
+                self._handle_control_frame(kind, payload)
+
+    def _handle_control_frame(self, kind: int, payload: memoryview):
+        if kind == MSG_TYPE_PING:
+            pong_header = MessageHeader(MSG_TYPE_PONG, len(payload))
+            self._send([pong_header.to_bytes(), payload])
+        elif kind == MSG_TYPE_PONG:
+            pending_ping = self._pending_pings.pop(bytes(payload), None)
+            if pending_ping is not None:
+                rtt = time.time() * 1000 - pending_ping.created_at
+                self._rtt_stats.add(rtt)
+                pending_ping.future.set_result(rtt)
         else:
-            raise ValueError(f"Unsupported message type {msg_header.kind}")
+            raise ValueError(f"Unsupported message type {kind}")
 
     def write(self, data: str | bytes):
         payload = data.encode() if isinstance(data, str) else data
         msg_header = MessageHeader(MSG_TYPE_WAMP, len(payload))
+        self._send([msg_header.to_bytes(), payload])
 
-        try:
-            with self._write_lock:
-                self._sock.sendall(msg_header.to_bytes() + payload)
-        except _CONNECTION_ERRORS as e:
-            self._mark_disconnected(e)
-            raise
+    def write_many(self, data: Sequence[str | bytes]):
+        buffers = []
+        for item in data:
+            payload = item.encode() if isinstance(item, str) else item
+            buffers.append(MessageHeader(MSG_TYPE_WAMP, len(payload)).to_bytes())
+            buffers.append(payload)
+
+        self._send(buffers)
 
     def close(self):
+        reactor = self._reactor
+        if reactor is not None:
+            # the reactor closes the socket once it stopped watching it, shutting down already
+            # lets the peer know.
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            reactor.remove(self)
+            self._mark_disconnected(None)
+            return
+
         try:
             self._sock.close()
         finally:
@@ -170,23 +560,104 @@ class RawSocketTransport(ITransport):
         self._pending_pings[payload] = PendingPing(f, created_at)
 
         try:
-            with self._write_lock:
-                self._sock.sendall(ping_header.to_bytes() + payload)
-        except _CONNECTION_ERRORS as e:
-            self._mark_disconnected(e)
+            self._send([ping_header.to_bytes(), payload])
+            return f.result(timeout)
+        except ConcurrentTimeoutError:
+            self._rtt_stats.timeouts += 1
             raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+
+async def _keepalive(transport: IAsyncTransport, interval: float, timeout: float | None):
+    """
+    Ping the peer every interval seconds and close the transport if a pong doesn't arrive in time,
+    within interval seconds if no timeout is set.
+    """
+    while await transport.is_connected():
+        await asyncio.sleep(interval)
+        try:
+            await transport.ping(timeout or interval)
+        except asyncio.TimeoutError:
+            await transport.close()
+            return
+        except Exception:
+            return
+
+
+def _cancel_keepalive(task: asyncio.Task | None):
+    if task is not None and task is not asyncio.current_task():
+        task.cancel()
+
+
+class WriteCoalescer:
+    """
+    Collects outgoing frames and hands them to the asyncio transport once per event loop iteration.
+
+    Writers only have to wait for the socket once more than ``high`` bytes are pending, the transport
+    then pauses writing until its buffer drops below ``low``.
+    """
+
+    def __init__(self, transport: asyncio.WriteTransport, high: int, low: int | None = None):
+        self._transport = transport
+        self._high = high
+        transport.set_write_buffer_limits(high, low if low is not None else high // 4)
+
+        self._loop = asyncio.get_running_loop()
+        self._buffers: list[bytes] = []
+        self._queued = 0
+        self._handle: asyncio.Handle | None = None
+
+    def write(self, header: bytes, payload: bytes):
+        if self._transport.is_closing():
+            raise ConnectionError("Socket connection broken")
+
+        self._buffers.append(header)
+        self._buffers.append(payload)
+        self._queued += len(header) + len(payload)
+
+        if self._queued > self._high:
+            self.flush()
+        elif self._handle is None:
+            self._handle = self._loop.call_soon(self.flush)
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        if not self._buffers:
+            return
+
+        buffers = self._buffers
+        self._buffers = []
+        self._queued = 0
 
-        return f.result(timeout)
+        if not self._transport.is_closing():
+            self._transport.writelines(buffers)
+
+    def above_high_watermark(self) -> bool:
+        return self._transport.get_write_buffer_size() > self._high
+
+
+def _create_coalescer(transport: asyncio.WriteTransport, config: TransportConfig) -> WriteCoalescer | None:
+    if not config.coalesce_writes:
+        return None
+
+    return WriteCoalescer(transport, config.write_buffer_high, config.write_buffer_low)
 
 
 class AsyncRawSocketTransport(IAsyncTransport):
-    def __init__(self, reader: StreamReader, writer: StreamWriter):
+    def __init__(self, reader: StreamReader, writer: StreamWriter, config: TransportConfig = TransportConfig()):
         super().__init__()
         self._reader = reader
         self._writer = writer
+        self._coalescer = _create_coalescer(writer.transport, config)
 
         self._connected = True
         self._pending_pings: dict[bytes, PendingPing] = {}
+        self._rtt_stats = RTTStats()
+        self._keepalive_task: asyncio.Task | None = None
 
     @staticmethod
     async def connect(
@@ -198,7 +669,12 @@ class AsyncRawSocketTransport(IAsyncTransport):
         parsed = urlparse(uri)
 
         if parsed.scheme == "rs" or parsed.scheme == "rss" or parsed.scheme == "tcp" or parsed.scheme == "tcps":
-            reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port)
+            if parsed.scheme == "rss" or parsed.scheme == "tcps":
+                ssl_context = _client_ssl_context(config)
+            else:
+                ssl_context = None
+
+            reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port, ssl=ssl_context)
             if config.tcp_nodelay and (sock := writer.get_extra_info("socket")):
                 sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         elif parsed.scheme == "unix" or parsed.scheme == "unix+rs":
@@ -217,11 +693,20 @@ class AsyncRawSocketTransport(IAsyncTransport):
         if hs_request.protocol != hs_response.protocol:
             raise ValueError("Handshake protocol mismatch.")
 
-        return AsyncRawSocketTransport(reader, writer)
+        _remember_tls_session(writer.get_extra_info("ssl_object"))
+
+        transport = AsyncRawSocketTransport(reader, writer, config)
+        if config.ping_interval:
+            transport._keepalive_task = asyncio.create_task(
+                _keepalive(transport, config.ping_interval, config.ping_timeout)
+            )
+
+        return transport
 
     def _mark_disconnected(self, _: Exception | None):
         if self._connected:
             self._connected = False
+            _fail_pending_pings(self._pending_pings)
 
     async def read(self) -> str | bytes:
         try:
@@ -264,8 +749,9 @@ class AsyncRawSocketTransport(IAsyncTransport):
 
             pending_ping = self._pending_pings.pop(pong_payload, None)
             if pending_ping is not None:
-                received_at = time.time() * 1000
-                pending_ping.future.set_result(received_at - pending_ping.created_at)
+                rtt = time.time() * 1000 - pending_ping.created_at
+                self._rtt_stats.add(rtt)
+                pending_ping.future.set_result(rtt)
 
             return await self.read()
         else:
@@ -276,14 +762,23 @@ class AsyncRawSocketTransport(IAsyncTransport):
         msg_header = MessageHeader(MSG_TYPE_WAMP, len(payload))
 
         try:
-            self._writer.write(msg_header.to_bytes() + payload)
-            await self._writer.drain()
+            if self._coalescer is not None:
+                self._coalescer.write(msg_header.to_bytes(), payload)
+                if self._coalescer.above_high_watermark():
+                    await self._writer.drain()
+            else:
+                self._writer.write(msg_header.to_bytes() + payload)
+                await self._writer.drain()
         except _CONNECTION_ERRORS as e:
             self._mark_disconnected(e)
             raise
 
     async def close(self):
+        _cancel_keepalive(self._keepalive_task)
         try:
+            if self._coalescer is not None:
+                self._coalescer.flush()
+
             self._writer.close()
         finally:
             self._mark_disconnected(None)
@@ -297,85 +792,655 @@ class AsyncRawSocketTransport(IAsyncTransport):
         self._pending_pings[payload] = PendingPing(f, created_at)
 
         try:
-            self._writer.write(ping_header.to_bytes() + payload)
-            await self._writer.drain()
-        except _CONNECTION_ERRORS as e:
-            self._mark_disconnected(e)
+            try:
+                self._writer.write(ping_header.to_bytes() + payload)
+                await self._writer.drain()
+            except _CONNECTION_ERRORS as e:
+                self._mark_disconnected(e)
+                raise
+
+            return await asyncio.wait_for(f, timeout)
+        except asyncio.TimeoutError:
+            self._rtt_stats.timeouts += 1
             raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+
+class RawSocketProtocol(asyncio.BufferedProtocol):
+    """
+    Rawsocket framing implemented on top of asyncio.BufferedProtocol.
 
-        return await asyncio.wait_for(f, timeout)
+    The event loop reads straight into a preallocated buffer, complete frames are parsed out of it
+    in place. PINGs are answered inline and WAMP frames are queued so that a reader can take every
+    frame that arrived in one go.
+    """
 
+    # stop reading from the socket when this many frames are waiting to be processed
+    MAX_QUEUED_FRAMES = 1024
 
-class WebSocketTransport(ITransport):
-    def __init__(self, websocket: Connection):
+    def __init__(self, protocol: int = SERIALIZER_TYPE_CBOR, buffer_size: int = READ_BUFFER_SIZE):
         super().__init__()
-        self._websocket = websocket
+        self._text = protocol == SERIALIZER_TYPE_JSON
+        self._buffer_size = buffer_size
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._needed = RAW_SOCKET_HEADER_LENGTH
+
+        self.transport: asyncio.Transport | None = None
+        self._loop = asyncio.get_running_loop()
+        self.handshake: Future[bytes] = self._loop.create_future()
+        self._handshake_done = False
+
+        self._frames: deque[str | bytes] = deque()
+        self._waiter: Future[None] | None = None
+        self._reading_paused = False
+        self._drain_waiter: Future[None] | None = None
+        self._writing_paused = False
+
+        self.pending_pings: dict[bytes, PendingPing] = {}
+        self.rtt_stats = RTTStats()
+        self.exception: Exception | None = None
+        self.connected = False
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.connected = True
+
+    def connection_lost(self, exc: Exception | None):
+        self.connected = False
+        self.exception = exc if exc is not None else ConnectionError("Socket connection broken")
+        _fail_pending_pings(self.pending_pings)
+
+        if not self.handshake.done():
+            self.handshake.set_exception(self.exception)
+
+        self._wakeup()
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_exception(self.exception)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        available = self._end - self._start
+        if self._needed > len(self._buffer) - self._start or self._end == len(self._buffer):
+            # make room for the pending frame, a new buffer is allocated because the view is still exported
+            if self._needed > len(self._buffer) or (available == 0 and len(self._buffer) > self._buffer_size):
+                buffer = bytearray(max(self._needed, self._buffer_size))
+                buffer[:available] = self._view[self._start : self._end]
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            else:
+                self._buffer[:available] = self._view[self._start : self._end]
+
+            self._start = 0
+            self._end = available
+
+        return self._view[self._end :]
+
+    def buffer_updated(self, nbytes: int):
+        self._end += nbytes
+
+        if not self._handshake_done:
+            if self._end - self._start < RAW_SOCKET_HEADER_LENGTH:
+                return
+
+            self.handshake.set_result(bytes(self._view[self._start : self._start + RAW_SOCKET_HEADER_LENGTH]))
+            self._start += RAW_SOCKET_HEADER_LENGTH
+            self._handshake_done = True
+
+        buf = self._buffer
+        queued = len(self._frames)
+        while True:
+            start = self._start
+            if self._end - start < RAW_SOCKET_HEADER_LENGTH:
+                self._needed = RAW_SOCKET_HEADER_LENGTH
+                break
+
+            length = buf[start + 1] << 16 | buf[start + 2] << 8 | buf[start + 3]
+            frame_end = start + RAW_SOCKET_HEADER_LENGTH + length
+            if frame_end > self._end:
+                self._needed = RAW_SOCKET_HEADER_LENGTH + length
+                break
+
+            kind = buf[start]
+            payload = self._view[start + RAW_SOCKET_HEADER_LENGTH : frame_end]
+            self._start = frame_end
+
+            if kind == MSG_TYPE_WAMP:
+                self._frames.append(str(payload, "utf-8") if self._text else bytes(payload))
+            elif kind == MSG_TYPE_PING:
+                self.transport.write(MessageHeader(MSG_TYPE_PONG, length).to_bytes() + payload)
+            elif kind == MSG_TYPE_PONG:
+                pending_ping = self.pending_pings.pop(bytes(payload), None)
+                if pending_ping is not None:
+                    rtt = time.time() * 1000 - pending_ping.created_at
+                    self.rtt_stats.add(rtt)
+                    pending_ping.future.set_result(rtt)
+            else:
+                self.exception = ValueError(f"Unsupported message type {kind}")
+                self.transport.close()
+                break
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+        if len(self._frames) != queued:
+            self._wakeup()
+            if len(self._frames) >= self.MAX_QUEUED_FRAMES and not self._reading_paused:
+                self._reading_paused = True
+                self.transport.pause_reading()
+
+    def eof_received(self) -> bool:
+        return False
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+
+    def _wakeup(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def wait_frames(self) -> deque[str | bytes]:
+        while not self._frames:
+            if self.exception is not None:
+                raise self.exception
+
+            self._waiter = self._loop.create_future()
+            await self._waiter
+
+        if self._reading_paused:
+            self._reading_paused = False
+            self.transport.resume_reading()
+
+        return self._frames
+
+    def write(self, data: bytes):
+        if not self.connected:
+            raise self.exception or ConnectionError("Socket connection broken")
+
+        self.transport.write(data)
+
+    async def drain(self):
+        if not self._writing_paused:
+            return
+
+        self._drain_waiter = self._loop.create_future()
+        await self._drain_waiter
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AsyncBufferedRawSocketTransport(IAsyncTransport):
+    """RawSocket transport that parses frames with RawSocketProtocol instead of asyncio streams."""
+
+    def __init__(self, protocol: RawSocketProtocol, config: TransportConfig = TransportConfig()):
+        super().__init__()
+        self._protocol = protocol
+        self._coalescer = _create_coalescer(protocol.transport, config)
+        self._keepalive_task: asyncio.Task | None = None
+
+    @staticmethod
+    async def connect(
+        uri: str,
+        protocol: int = SERIALIZER_TYPE_CBOR,
+        max_msg_size: int = DEFAULT_MAX_MSG_SIZE,
+        config: TransportConfig = TransportConfig(),
+    ) -> "AsyncBufferedRawSocketTransport":
+        parsed = urlparse(uri)
+        loop = asyncio.get_running_loop()
+
+        if parsed.scheme == "rs" or parsed.scheme == "rss" or parsed.scheme == "tcp" or parsed.scheme == "tcps":
+            if parsed.scheme == "rss" or parsed.scheme == "tcps":
+                ssl_context = _client_ssl_context(config)
+            else:
+                ssl_context = None
+
+            transport, proto = await loop.create_connection(
+                lambda: RawSocketProtocol(protocol), parsed.hostname, parsed.port, ssl=ssl_context
+            )
+            if config.tcp_nodelay and (sock := transport.get_extra_info("socket")):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        elif parsed.scheme == "unix" or parsed.scheme == "unix+rs":
+            transport, proto = await loop.create_unix_connection(lambda: RawSocketProtocol(protocol), parsed.path)
+        else:
+            raise RuntimeError(f"Unsupported scheme {parsed.scheme}")
+
+        hs_request = Handshake(protocol, max_msg_size)
+        transport.write(hs_request.to_bytes())
+
+        hs_response = Handshake.from_bytes(await proto.handshake)
+        if hs_request.protocol != hs_response.protocol:
+            transport.close()
+            raise ValueError("Handshake protocol mismatch.")
+
+        _remember_tls_session(transport.get_extra_info("ssl_object"))
+
+        buffered_transport = AsyncBufferedRawSocketTransport(proto, config)
+        if config.ping_interval:
+            buffered_transport._keepalive_task = asyncio.create_task(
+                _keepalive(buffered_transport, config.ping_interval, config.ping_timeout)
+            )
+
+        return buffered_transport
+
+    @staticmethod
+    async def accept(
+        protocol: RawSocketProtocol,
+        serializers: Sequence[int] = (SERIALIZER_TYPE_JSON, SERIALIZER_TYPE_MSGPACK, SERIALIZER_TYPE_CBOR),
+        max_msg_size: int = DEFAULT_MAX_MSG_SIZE,
+        config: TransportConfig = TransportConfig(),
+    ) -> tuple["AsyncBufferedRawSocketTransport", int]:
+        """
+        Server side of the handshake on a connection accepted with RawSocketProtocol. Returns the
+        transport along with the serializer the client asked for, clients asking for one that isn't
+        in serializers get an error handshake.
+        """
+        try:
+            hs_request = Handshake.from_bytes(await protocol.handshake)
+        except ValueError:
+            protocol.close()
+            raise
+
+        if hs_request.protocol not in serializers:
+            protocol.write(bytes([MAGIC, RAW_SOCKET_ERROR_SERIALIZER_UNSUPPORTED << 4, 0x00, 0x00]))
+            protocol.close()
+            raise ValueError(f"unsupported rawsocket serializer {hs_request.protocol}")
+
+        # clients only send frames once they have the response, so nothing was decoded yet
+        protocol._text = hs_request.protocol == SERIALIZER_TYPE_JSON
+        # the response tells the client how large the frames we accept may be
+        protocol.write(Handshake(hs_request.protocol, max_msg_size).to_bytes())
+
+        return AsyncBufferedRawSocketTransport(protocol, config), hs_request.protocol
+
+    async def read(self) -> str | bytes:
+        frames = await self._protocol.wait_frames()
+        return frames.popleft()
+
+    async def read_batch(self) -> list[str | bytes]:
+        frames = await self._protocol.wait_frames()
+        batch = list(frames)
+        frames.clear()
+        return batch
+
+    async def write(self, data: str | bytes):
+        payload = data.encode() if isinstance(data, str) else data
+        msg_header = MessageHeader(MSG_TYPE_WAMP, len(payload))
+
+        if self._coalescer is not None:
+            self._coalescer.write(msg_header.to_bytes(), payload)
+            if self._coalescer.above_high_watermark():
+                await self._protocol.drain()
+        else:
+            self._protocol.write(msg_header.to_bytes() + payload)
+            await self._protocol.drain()
+
+    async def close(self):
+        _cancel_keepalive(self._keepalive_task)
+        if self._coalescer is not None:
+            self._coalescer.flush()
+
+        self._protocol.close()
+
+    async def is_connected(self) -> bool:
+        return self._protocol.connected
+
+    async def ping(self, timeout: int = 10) -> float:
+        f: Future[float] = asyncio.get_running_loop().create_future()
+        payload, ping_header, created_at = create_ping()
+        self._protocol.pending_pings[payload] = PendingPing(f, created_at)
+
+        try:
+            self._protocol.write(ping_header.to_bytes() + payload)
+            await self._protocol.drain()
+
+            return await asyncio.wait_for(f, timeout)
+        except asyncio.TimeoutError:
+            self._protocol.rtt_stats.timeouts += 1
+            raise
+        finally:
+            self._protocol.pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._protocol.rtt_stats
+
+
+class WebSocketTransport(SyncKeepalive, ITransport):
+    """
+    WebSocket transport built on the websockets sans-io protocol over a plain socket.
+    There is no background reader thread, frames are parsed on the thread that calls read().
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        protocol: ClientProtocol,
+        events: Sequence[Frame] = (),
+        compression_stats: CompressionStats | None = None,
+    ):
+        super().__init__()
+        self._sock = sock
+        self._protocol = protocol
+        self._events: deque[Frame] = deque(events)
+        self._connected = True
+        self._pending_pings: dict[bytes, PendingPing] = {}
+        # guards the protocol state machine and the socket writes
+        self._lock = threading.Lock()
+        self._nonblocking_flag = 0 if isinstance(sock, ssl.SSLSocket) else getattr(socket, "MSG_DONTWAIT", 0)
+
+        self._fragments: list[bytes] = []
+        self._fragments_opcode: Opcode | None = None
+
+        self._rtt_stats = RTTStats()
+        self._compression_stats = compression_stats
 
     @staticmethod
     def connect(uri: str, subprotocols: Sequence[Subprotocol], config: WebsocketConfig) -> "WebSocketTransport":
         parsed_url = urlparse(uri)
         if parsed_url.scheme == "unix+ws":
             sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(config.open_timeout)
             sock.connect(parsed_url.path)
-            ws = unix_connect(
-                parsed_url.path,
-                subprotocols=subprotocols,
-                open_timeout=config.open_timeout,
-                ping_interval=config.ping_interval,
-                ping_timeout=config.ping_timeout,
-                close_timeout=config.close_timeout,
-            )
+            ws_uri = parse_uri("ws://localhost/")
+        elif parsed_url.scheme == "ws" or parsed_url.scheme == "wss":
+            ws_uri = parse_uri(uri)
+            sock = socket.create_connection((ws_uri.host, ws_uri.port), timeout=config.open_timeout)
+            if config.tcp_nodelay:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            if ws_uri.secure:
+                sock = _client_ssl_context(config).wrap_socket(sock, server_hostname=ws_uri.host)
         else:
-            ws = connect(
-                uri,
-                subprotocols=subprotocols,
-                open_timeout=config.open_timeout,
-                ping_interval=config.ping_interval,
-                ping_timeout=config.ping_timeout,
-                close_timeout=config.close_timeout,
-            )
+            raise RuntimeError(f"Unsupported scheme {parsed_url.scheme}")
+
+        compression_stats = CompressionStats() if config.compression is not None else None
+        protocol = ClientProtocol(
+            ws_uri,
+            subprotocols=subprotocols,
+            extensions=_deflate_extensions(config, compression_stats),
+        )
+
+        try:
+            events = _websocket_handshake(sock, protocol)
+        except BaseException:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        if isinstance(sock, ssl.SSLSocket):
+            _remember_tls_session(sock)
 
-        return WebSocketTransport(ws)
+        transport = WebSocketTransport(sock, protocol, events, compression_stats)
+        if config.ping_interval:
+            transport._start_keepalive(config.ping_interval, config.ping_timeout)
+
+        return transport
+
+    def _mark_disconnected(self, _: Exception | None):
+        if self._connected:
+            self._connected = False
+            _fail_pending_pings(self._pending_pings)
+
+    def _send_pending(self):
+        """Write out everything the protocol produced, must be called with the lock held."""
+        writes = self._protocol.data_to_send()
+        try:
+            data = b"".join(writes)
+            if data:
+                self._sock.sendall(data)
+
+            if SEND_EOF in writes:
+                self._sock.shutdown(socket.SHUT_WR)
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+            raise
+
+    def _ensure_open(self):
+        if not self._connected or self._protocol.state is not State.OPEN:
+            raise ConnectionError("websocket connection is closed")
+
+    def _send_keepalive_ping(self):
+        # never block the shared scheduler thread, if a writer currently owns the socket it's clearly alive.
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            if self._protocol.state is not State.OPEN:
+                return
+
+            payload, _, created_at = create_ping()
+            self._pending_pings[payload] = PendingPing(ConcurrentFuture(), created_at)
+            self._protocol.send_ping(payload)
+            data = b"".join(self._protocol.data_to_send())
+            try:
+                sent = self._sock.send(data, self._nonblocking_flag)
+            except BlockingIOError:
+                # control frames carry no compression state, so the ping can simply be dropped.
+                del self._pending_pings[payload]
+                return
+
+            if sent < len(data):
+                self._sock.sendall(data[sent:])
+
+            self._last_ping_at = created_at
+        except _CONNECTION_ERRORS as e:
+            self._mark_disconnected(e)
+        finally:
+            self._lock.release()
+
+    def _abort(self):
+        """Close a dead connection and wake up the thread blocked in read()."""
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.close()
+
+    def _handle_frame(self, frame: Frame) -> str | bytes | None:
+        if frame.opcode is Opcode.TEXT or frame.opcode is Opcode.BINARY:
+            if frame.fin:
+                return frame.data.decode() if frame.opcode is Opcode.TEXT else bytes(frame.data)
+
+            self._fragments_opcode = frame.opcode
+            self._fragments = [bytes(frame.data)]
+        elif frame.opcode is Opcode.CONT:
+            self._fragments.append(bytes(frame.data))
+            if frame.fin:
+                data = b"".join(self._fragments)
+                opcode = self._fragments_opcode
+                self._fragments, self._fragments_opcode = [], None
+                return data.decode() if opcode is Opcode.TEXT else data
+        elif frame.opcode is Opcode.PONG:
+            pending_ping = self._pending_pings.pop(bytes(frame.data), None)
+            if pending_ping is not None:
+                rtt = time.time() * 1000 - pending_ping.created_at
+                self._rtt_stats.add(rtt)
+                pending_ping.future.set_result(rtt)
+        elif frame.opcode is Opcode.CLOSE:
+            self.close()
+            raise ConnectionError("websocket connection closed by peer")
+
+        # pings are answered by the protocol itself
+        return None
 
     def read(self) -> str | bytes:
-        return self._websocket.recv()
+        while True:
+            while self._events:
+                message = self._handle_frame(self._events.popleft())
+                if message is not None:
+                    return message
+
+            try:
+                data = self._sock.recv(READ_BUFFER_SIZE)
+            except _CONNECTION_ERRORS as e:
+                self._mark_disconnected(e)
+                if isinstance(e, ConnectionError):
+                    raise
+
+                # e.g. EBADF when close() released the socket underneath recv()
+                raise ConnectionError("websocket connection closed") from e
+
+            with self._lock:
+                if data:
+                    self._protocol.receive_data(data)
+                else:
+                    self._protocol.receive_eof()
+
+                self._events.extend(self._protocol.events_received())
+                self._send_pending()
+
+            if not data:
+                self.close()
+                raise ConnectionError("websocket connection closed")
 
     def write(self, data: str | bytes):
-        self._websocket.send(data)
+        with self._lock:
+            self._ensure_open()
+            if isinstance(data, str):
+                self._protocol.send_text(data.encode())
+            else:
+                self._protocol.send_binary(data)
+
+            self._send_pending()
+
+    def write_many(self, data: Sequence[str | bytes]):
+        with self._lock:
+            self._ensure_open()
+            for item in data:
+                if isinstance(item, str):
+                    self._protocol.send_text(item.encode())
+                else:
+                    self._protocol.send_binary(item)
+
+            self._send_pending()
 
     def close(self):
-        self._websocket.close()
+        with self._lock:
+            if self._protocol.state is State.OPEN:
+                self._protocol.send_close()
+                try:
+                    self._send_pending()
+                except _CONNECTION_ERRORS:
+                    pass
+
+        try:
+            # also wakes up a thread blocked in read()
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        try:
+            self._sock.close()
+        finally:
+            self._mark_disconnected(None)
 
     def is_connected(self) -> bool:
-        return self._websocket.state == State.OPEN
+        return self._connected and self._protocol.state is State.OPEN
 
     def ping(self, timeout: int = 10) -> float:
+        f: ConcurrentFuture[float] = ConcurrentFuture()
         payload, _, created_at = create_ping()
+        self._pending_pings[payload] = PendingPing(f, created_at)
+
+        try:
+            with self._lock:
+                self._ensure_open()
+                self._protocol.send_ping(payload)
+                self._send_pending()
+
+            return f.result(timeout)
+        except ConcurrentTimeoutError:
+            self._rtt_stats.timeouts += 1
+            raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+    @property
+    def compression_stats(self) -> CompressionStats | None:
+        return self._compression_stats
+
+
+def _websocket_handshake(sock: socket.socket, protocol: ClientProtocol) -> list[Frame]:
+    """Perform the opening handshake, returns the frames that arrived along with the response."""
+    request = protocol.connect()
+    request.headers["User-Agent"] = USER_AGENT
+    protocol.send_request(request)
+    sock.sendall(b"".join(protocol.data_to_send()))
+
+    while True:
+        data = sock.recv(READ_BUFFER_SIZE)
+        if data:
+            protocol.receive_data(data)
+        else:
+            protocol.receive_eof()
+
+        events = protocol.events_received()
+        if events and isinstance(events[0], Response):
+            if protocol.handshake_exc is not None:
+                raise protocol.handshake_exc
+
+            return events[1:]
 
-        event = self._websocket.ping(payload)
-        event.wait(timeout)
-        received_at = time.time() * 1000
-        return received_at - created_at
+        if not data:
+            raise ConnectionError("connection closed during websocket handshake")
+
+
+def _deflate_extensions(config: TransportConfig, stats: CompressionStats | None) -> list[DeflatePolicyFactory] | None:
+    if config.compression is None:
+        return None
+
+    return [DeflatePolicyFactory(config.compression, stats)]
+
+
+def _websocket_write_limit(config: TransportConfig) -> int | tuple[int, int]:
+    if config.write_buffer_low is None:
+        return config.write_buffer_high
+
+    return config.write_buffer_high, config.write_buffer_low
 
 
 class AsyncWebSocketTransport(IAsyncTransport):
-    def __init__(self, websocket: ClientConnection):
+    def __init__(self, websocket: ClientConnection, compression_stats: CompressionStats | None = None):
         super().__init__()
         self._websocket = websocket
+        self._rtt_stats = RTTStats()
+        self._compression_stats = compression_stats
 
     @staticmethod
     async def connect(
         uri: str, subprotocols: Sequence[Subprotocol], config: WebsocketConfig
     ) -> "AsyncWebSocketTransport":
         parsed_url = urlparse(uri)
+        compression_stats = CompressionStats() if config.compression is not None else None
         if parsed_url.scheme == "unix+ws":
             ws = await async_unix_connect(
                 parsed_url.path,
                 subprotocols=subprotocols,
                 open_timeout=config.open_timeout,
                 ping_interval=config.ping_interval,
-                ping_timeout=config.ping_timeout,
+                ping_timeout=config.ping_timeout or config.ping_interval,
                 close_timeout=config.close_timeout,
+                write_limit=_websocket_write_limit(config),
+                compression=None,
+                extensions=_deflate_extensions(config, compression_stats),
             )
         else:
             ws = await async_connect(
@@ -383,11 +1448,17 @@ class AsyncWebSocketTransport(IAsyncTransport):
                 subprotocols=subprotocols,
                 open_timeout=config.open_timeout,
                 ping_interval=config.ping_interval,
-                ping_timeout=config.ping_timeout,
+                ping_timeout=config.ping_timeout or config.ping_interval,
                 close_timeout=config.close_timeout,
+                write_limit=_websocket_write_limit(config),
+                compression=None,
+                extensions=_deflate_extensions(config, compression_stats),
+                ssl=_client_ssl_context(config) if parsed_url.scheme == "wss" else None,
             )
 
-        return AsyncWebSocketTransport(ws)
+            _remember_tls_session(ws.transport.get_extra_info("ssl_object"))
+
+        return AsyncWebSocketTransport(ws, compression_stats)
 
     async def read(self) -> str | bytes:
         return await self._websocket.recv()
@@ -405,6 +1476,140 @@ class AsyncWebSocketTransport(IAsyncTransport):
         payload, _, created_at = create_ping()
 
         awaitable = await self._websocket.ping(payload)
-        await asyncio.wait_for(awaitable, timeout)
-        received_at = time.time() * 1000
-        return received_at - created_at
+        try:
+            await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self._rtt_stats.timeouts += 1
+            raise
+
+        rtt = time.time() * 1000 - created_at
+        self._rtt_stats.add(rtt)
+        return rtt
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+    @property
+    def compression_stats(self) -> CompressionStats | None:
+        return self._compression_stats
+
+
+class AIOHttpWebSocketTransport(IAsyncTransport):
+    """Async websocket transport on top of the aiohttp client, the same stack the router side uses."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        websocket: aiohttp.ClientWebSocketResponse,
+        config: TransportConfig = TransportConfig(),
+    ):
+        super().__init__()
+        self._session = session
+        self._websocket = websocket
+        self._pending_pings: dict[bytes, PendingPing] = {}
+        self._rtt_stats = RTTStats()
+        self._keepalive_task: asyncio.Task | None = None
+
+        self._sender = websocket
+        self._compression_stats: CompressionStats | None = None
+        if config.compression is not None and websocket.compress:
+            self._compression_stats = CompressionStats()
+            self._sender = AIOHttpDeflateSender(websocket, config.compression, self._compression_stats)
+
+        if config.ping_interval:
+            self._keepalive_task = asyncio.create_task(_keepalive(self, config.ping_interval, config.ping_timeout))
+
+    @staticmethod
+    async def connect(
+        uri: str, subprotocols: Sequence[Subprotocol], config: WebsocketConfig
+    ) -> "AIOHttpWebSocketTransport":
+        parsed_url = urlparse(uri)
+        kwargs = {}
+        if parsed_url.scheme == "unix+ws":
+            session = aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=parsed_url.path))
+            uri = "ws://localhost/"
+        else:
+            session = aiohttp.ClientSession()
+            if parsed_url.scheme == "wss":
+                kwargs["ssl"] = _client_ssl_context(config)
+
+        try:
+            ws = await asyncio.wait_for(
+                session.ws_connect(
+                    uri,
+                    protocols=subprotocols,
+                    timeout=aiohttp.ClientWSTimeout(ws_close=config.close_timeout),
+                    # pings and pongs are handled in read() to measure round trip times
+                    autoping=False,
+                    compress=config.compression.window_bits if config.compression is not None else 0,
+                    **kwargs,
+                ),
+                config.open_timeout,
+            )
+        except BaseException:
+            await session.close()
+            raise
+
+        _remember_tls_session(ws.get_extra_info("ssl_object"))
+
+        return AIOHttpWebSocketTransport(session, ws, config)
+
+    async def read(self) -> str | bytes:
+        while True:
+            msg = await self._websocket.receive()
+            if msg.type is aiohttp.WSMsgType.TEXT or msg.type is aiohttp.WSMsgType.BINARY:
+                return msg.data
+            elif msg.type is aiohttp.WSMsgType.PING:
+                await self._websocket.pong(msg.data)
+            elif msg.type is aiohttp.WSMsgType.PONG:
+                pending_ping = self._pending_pings.pop(msg.data, None)
+                if pending_ping is not None:
+                    rtt = time.time() * 1000 - pending_ping.created_at
+                    self._rtt_stats.add(rtt)
+                    pending_ping.future.set_result(rtt)
+            else:
+                await self.close()
+                if msg.type is aiohttp.WSMsgType.ERROR:
+                    raise ConnectionError("websocket connection failed") from msg.data
+
+                raise ConnectionError("websocket connection closed")
+
+    async def write(self, data: str | bytes):
+        if isinstance(data, str):
+            await self._sender.send_str(data)
+        else:
+            await self._sender.send_bytes(data)
+
+    async def close(self):
+        _cancel_keepalive(self._keepalive_task)
+        try:
+            await self._websocket.close()
+        finally:
+            _fail_pending_pings(self._pending_pings)
+            await self._session.close()
+
+    async def is_connected(self) -> bool:
+        return not self._websocket.closed
+
+    async def ping(self, timeout: int = 10) -> float:
+        f: Future[float] = asyncio.get_running_loop().create_future()
+        payload, _, created_at = create_ping()
+        self._pending_pings[payload] = PendingPing(f, created_at)
+
+        try:
+            await self._websocket.ping(payload)
+            return await asyncio.wait_for(f, timeout)
+        except asyncio.TimeoutError:
+            self._rtt_stats.timeouts += 1
+            raise
+        finally:
+            self._pending_pings.pop(payload, None)
+
+    @property
+    def rtt_stats(self) -> RTTStats:
+        return self._rtt_stats
+
+    @property
+    def compression_stats(self) -> CompressionStats | None:
+        return self._compression_stats
@@ -3,15 +3,20 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import inspect
+import math
+import ssl
+import threading
 from asyncio import Future
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Sequence
 
 from aiohttp import web
 from wampproto import messages, joiner, serializers
 
+from xconn.compression import DeflateConfig, CompressionStats, AIOHttpDeflateSender
+
 
 @dataclass
 class UnregisterRequest:
@@ -37,6 +42,9 @@ class Invocation:
     args: list | None
     kwargs: dict | None
     details: dict | None
+    # set once the caller cancelled the call, long running sync handlers can poll or wait on it.
+    # Async handlers are cancelled right away.
+    interrupted: threading.Event = field(default_factory=threading.Event, compare=False, repr=False)
 
 
 @dataclass
@@ -46,6 +54,24 @@ class Event:
     details: dict | None
 
 
+class OverflowPolicy(Enum):
+    # wait for room, pushing back on the producer
+    BLOCK = "block"
+    # refuse the new item
+    REJECT = "reject"
+    # make room by discarding the oldest queued item
+    DROP_OLDEST = "drop_oldest"
+    # discard the new item quietly
+    DROP_NEWEST = "drop_newest"
+    # give up on the consumer that can't keep up and close its connection
+    DISCONNECT = "disconnect"
+
+
+class WebsocketBackend(Enum):
+    WEBSOCKETS = "websockets"
+    AIOHTTP = "aiohttp"
+
+
 @dataclass
 class TransportConfig:
     # max wait time for connection to be established
@@ -54,7 +80,7 @@ class TransportConfig:
     # send ping automatically after every x seconds
     ping_interval: float | None = 20
 
-    # wait for x seconds for a pong from server before closing the connection
+    # wait for x seconds for a pong from server before closing the connection, ping_interval if None
     ping_timeout: float | None = 20
 
     # max wait time for closing the connection
@@ -63,11 +89,171 @@ class TransportConfig:
     # whether to enable TCP_NODELAY flag on the socket
     tcp_nodelay: bool = False
 
+    # use the asyncio.BufferedProtocol based rawsocket transport for async clients
+    rawsocket_buffered_protocol: bool = False
+
+    # coalesce outgoing messages into fewer writes. Sync sessions write everything queued by their threads
+    # with a single syscall, async rawsocket transports flush once per event loop iteration.
+    coalesce_writes: bool = False
+
+    # async writers only wait for the socket once more than this many bytes are pending
+    write_buffer_high: int = 64 * 1024
+
+    # resume writing once pending bytes drop below this, defaults to a quarter of write_buffer_high
+    write_buffer_low: int | None = None
+
+    # TLS context for the rss, tcps and wss schemes. Share one context created with
+    # xconn.transports.create_client_ssl_context() to resume TLS sessions across reconnects.
+    ssl_context: ssl.SSLContext | None = None
+
+    # websocket library used by async clients, aiohttp shares its stack with the router side
+    websocket_backend: WebsocketBackend = WebsocketBackend.WEBSOCKETS
+
+    # per-message-deflate for websocket transports, None disables compression
+    compression: DeflateConfig | None = DeflateConfig()
+
+    # capacity of each direction's shared memory ring of the shm+rs transport
+    shm_ring_size: int = 4 * 1024 * 1024
+
+    # read sync rawsocket sessions from the single process-wide reactor thread instead of one
+    # thread per session. TLS sessions keep their own thread. Sessions without a dispatcher of
+    # their own run handlers on the process-wide shared_dispatcher().
+    reactor: bool = False
+
 
 # deprecated, rename all usage to TransportConfig
 WebsocketConfig = TransportConfig
 
 
+@dataclass(frozen=True)
+class ReconnectConfig:
+    # wait before the second reconnect attempt in seconds, the first one is made right away
+    initial_delay: float = 0.01
+
+    # upper bound of the wait between two attempts
+    max_delay: float = 5.0
+
+    # the wait grows by this factor after every failed attempt
+    multiplier: float = 2.0
+
+    # fraction of every wait that is randomized, so clients don't hammer a restarted router in lockstep
+    jitter: float = 0.5
+
+    # give up after this many failed attempts in a row, None retries forever
+    max_attempts: int | None = None
+
+    # call again calls (and acknowledged publishes) whose connection dropped before the result arrived.
+    # Only enable it for idempotent procedures, the callee may have run them already.
+    retry_calls: bool = False
+
+    # publishes kept while disconnected, sent once the session is back
+    publish_buffer: int = 1024
+
+    # what happens to a publish when the buffer is full
+    publish_overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+
+
+class PoolStrategy(Enum):
+    # take turns
+    ROUND_ROBIN = "round_robin"
+    # the member with the fewest requests in flight
+    LEAST_OUTSTANDING = "least_outstanding"
+
+
+@dataclass
+class PoolStats:
+    # members whose connection is up
+    connected: int
+    # requests routed to every member so far, and how many of them are still in flight
+    requests: list[int]
+    outstanding: list[int]
+    # requests that raised
+    errors: int
+    # reconnects of all members together
+    reconnects: int
+
+
+@dataclass(frozen=True)
+class OutboundConfig:
+    # messages the router holds for a client whose connection is slower than the router
+    maxsize: int = 1024
+
+    # what happens to an event for a client whose queue is full: DROP_NEWEST drops the event,
+    # DISCONNECT closes the slow client's connection and BLOCK waits for room, holding up the
+    # publisher and with it the delivery to every other subscriber. Other messages are never
+    # dropped, they answer requests of the client itself.
+    overflow: OverflowPolicy = OverflowPolicy.DROP_NEWEST
+
+
+@dataclass
+class OutboundStats:
+    # messages waiting right now, and the most that ever did
+    depth: int = 0
+    max_depth: int = 0
+    sent: int = 0
+    dropped: int = 0
+
+
+@dataclass
+class ReconnectStats:
+    reconnects: int = 0
+
+    # publishes discarded because the buffer was full or reconnecting was given up
+    dropped_publishes: int = 0
+
+    # seconds from noticing the disconnect to being usable again, of the latest reconnect
+    last_recovery: float | None = None
+
+
+class RTTStats:
+    """Rolling window of ping round-trip times in milliseconds."""
+
+    # upper bounds (ms) of the histogram buckets, slower samples are counted under math.inf
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, window: int = 128):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.timeouts = 0
+
+    def add(self, rtt: float):
+        self._samples.append(rtt)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    @property
+    def last(self) -> float | None:
+        return self._samples[-1] if self._samples else None
+
+    @property
+    def min(self) -> float | None:
+        return min(self._samples) if self._samples else None
+
+    @property
+    def max(self) -> float | None:
+        return max(self._samples) if self._samples else None
+
+    @property
+    def mean(self) -> float | None:
+        return sum(self._samples) / len(self._samples) if self._samples else None
+
+    def percentile(self, percent: float) -> float | None:
+        if not self._samples:
+            return None
+
+        samples = sorted(self._samples)
+        index = min(len(samples) - 1, max(0, math.ceil(percent / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def histogram(self) -> dict[float, int]:
+        buckets = {bound: 0 for bound in (*self.BUCKETS, math.inf)}
+        for sample in self._samples:
+            buckets[next(bound for bound in buckets if sample <= bound)] += 1
+
+        return buckets
+
+
 class ITransport:
     def read(self) -> str | bytes:
         raise NotImplementedError()
@@ -75,6 +261,10 @@ class ITransport:
     def write(self, data: str | bytes):
         raise NotImplementedError()
 
+    def write_many(self, data: Sequence[str | bytes]):
+        for item in data:
+            self.write(item)
+
     def close(self):
         raise NotImplementedError()
 
@@ -84,11 +274,23 @@ class ITransport:
     def ping(self, timeout: int = 10) -> float:
         raise NotImplementedError()
 
+    @property
+    def rtt_stats(self) -> RTTStats:
+        raise NotImplementedError()
+
+    @property
+    def compression_stats(self) -> CompressionStats | None:
+        return None
+
 
 class IAsyncTransport:
     async def read(self) -> str | bytes:
         raise NotImplementedError()
 
+    async def read_batch(self) -> list[str | bytes]:
+        """Return all messages that are already available, waiting for at least one."""
+        return [await self.read()]
+
     async def write(self, data: str | bytes):
         raise NotImplementedError()
 
@@ -101,6 +303,14 @@ class IAsyncTransport:
     async def ping(self, timeout: int = 10) -> float:
         raise NotImplementedError()
 
+    @property
+    def rtt_stats(self) -> RTTStats:
+        raise NotImplementedError()
+
+    @property
+    def compression_stats(self) -> CompressionStats | None:
+        return None
+
 
 class IBasePeer:
     def read(self) -> str | bytes:
@@ -162,6 +372,9 @@ class IBaseSession:
     def send(self, data: bytes):
         raise NotImplementedError()
 
+    def send_many(self, data: Sequence[bytes]):
+        raise NotImplementedError()
+
     def receive(self) -> bytes:
         raise NotImplementedError()
 
@@ -207,6 +420,9 @@ class BaseSession(IBaseSession):
     def send(self, data: bytes):
         self._transport.write(data)
 
+    def send_many(self, data: Sequence[bytes]):
+        self._transport.write_many(data)
+
     def receive(self) -> bytes:
         return self._transport.read()
 
@@ -251,6 +467,16 @@ class IAsyncBaseSession:
     async def receive(self) -> bytes | str:
         raise NotImplementedError()
 
+    async def receive_batch(self) -> list[bytes | str]:
+        return [await self.receive()]
+
+    async def send_serialized(self, data: bytes | str):
+        """
+        Send a message that is already serialized with this session's serializer. The router uses it to
+        encode an event once and hand the same bytes to all subscribers sharing a serializer.
+        """
+        await self.send(data)
+
     async def send_message(self, msg: messages.Message):
         raise NotImplementedError()
 
@@ -300,6 +526,9 @@ class AsyncBaseSession(IAsyncBaseSession):
     async def receive(self) -> bytes:
         return await self._transport.read()
 
+    async def receive_batch(self) -> list[bytes | str]:
+        return await self._transport.read_batch()
+
     async def send_message(self, msg: messages.Message):
         await self.send(self.serializer.serialize(msg))
 
@@ -312,17 +541,27 @@ class AsyncBaseSession(IAsyncBaseSession):
 
 class AIOHttpBaseSession(IAsyncBaseSession):
     def __init__(
-        self, ws: web.WebSocketResponse, session_details: joiner.SessionDetails, serializer: serializers.Serializer
+        self,
+        ws: web.WebSocketResponse,
+        session_details: joiner.SessionDetails,
+        serializer: serializers.Serializer,
+        compression: DeflateConfig | None = None,
+        compression_stats: CompressionStats | None = None,
     ):
         super().__init__()
         self.ws = ws
         self.session_details = session_details
         self._serializer = serializer
+
+        sender = ws
+        if compression is not None and ws.compress:
+            sender = AIOHttpDeflateSender(ws, compression, compression_stats or CompressionStats())
+
         if serializer is None or isinstance(serializer, serializers.JSONSerializer):
-            self._send_func = ws.send_str
+            self._send_func = sender.send_str
             self._receive_func = ws.receive_str
         else:
-            self._send_func = ws.send_bytes
+            self._send_func = sender.send_bytes
             self._receive_func = ws.receive_bytes
 
     @property
@@ -395,7 +634,7 @@ class ClientSideLocalBaseSession(IAsyncBaseSession):
         return self._serializer
 
     async def send(self, data: bytes | str):
-        await self.send_message(self.serializer.deserialize(data))
+        await self.send_message(self._router.decode(self, data))
 
     async def receive(self) -> bytes | str:
         async with self._cond:
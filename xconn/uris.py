@@ -1,5 +1,7 @@
 ERROR_RUNTIME_ERROR = "wamp.error.runtime_error"
 ERROR_INVALID_ARGUMENT = "wamp.error.invalid_argument"
 ERROR_INTERNAL_ERROR = "wamp.error.internal_error"
+ERROR_UNAVAILABLE = "wamp.error.unavailable"
+ERROR_CANCELED = "wamp.error.canceled"
 CLOSE_REALM = "wamp.close.close_realm"
 CLOSE_GOODBYE_AND_OUT = "wamp.close.goodbye_and_out"